@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from response_cache import config_fingerprint
+
+
+class AgentPool:
+    """Thread-safe pool of ready-built agents, keyed by role and model config.
+
+    Building an agent means a new LLM client and a new set of tools; the pool does
+    that once per concurrent user of a role and then hands the same agents out
+    again. An agent is checked out exclusively until it is released, so no two
+    requests ever run on the same agent at the same time.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._idle: Dict[Tuple[str, str], List] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.reuses = 0
+        self.build_seconds = 0.0
+
+    def register(self, role: str, factory: Callable):
+        """Register `factory(llm_config)` as the way to build agents for `role`."""
+        self._factories[role] = factory
+
+    def acquire(self, role: str, llm_config: Dict):
+        """Check out an idle agent for `role`, building one if none is free."""
+        key = (role, config_fingerprint(llm_config))
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reuses += 1
+                return idle.pop()
+
+        # Built outside the lock so other roles are not held up
+        start = time.perf_counter()
+        agent = self._factories[role](llm_config)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.builds += 1
+            self.build_seconds += elapsed
+        return agent
+
+    def release(self, role: str, llm_config: Dict, agent):
+        """Return a checked-out agent to the pool."""
+        with self._lock:
+            self._idle.setdefault((role, config_fingerprint(llm_config)), []).append(agent)
+
+    @contextmanager
+    def agent(self, role: str, llm_config: Dict):
+        """Check out an agent for the duration of a `with` block."""
+        agent = self.acquire(role, llm_config)
+        try:
+            yield agent
+        finally:
+            self.release(role, llm_config, agent)
+
+    def stats(self) -> Dict:
+        """Return build/reuse counts and the construction time the reuses avoided."""
+        with self._lock:
+            average_build = self.build_seconds / self.builds if self.builds else 0.0
+            return {
+                'builds': self.builds,
+                'reuses': self.reuses,
+                'idle': sum(len(agents) for agents in self._idle.values()),
+                'average_build_seconds': average_build,
+                'build_seconds_avoided': self.reuses * average_build
+            }
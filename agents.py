@@ -1,9 +1,16 @@
-from crewai import Agent
+from crewai import Agent, Task, Crew
+from langchain.chat_models import ChatOpenAI
 from langchain.tools import Tool
-from utils import create_uae_legal_tools, is_arabic
+from utils import create_uae_legal_tools
+from response_cache import ResponseCache, config_fingerprint
+from agent_pool import AgentPool
+from streaming import ResponseStream, StreamingTokenHandler
+from singleflight import SingleFlight
 from config import LEGAL_CATEGORIES
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -42,7 +49,45 @@ SUMMARY_LLM_CONFIG = {
     ]
 }
 
-def create_judge_agent():
+# Same model settings with token streaming on; only used for answers shown as they stream in
+STREAMING_LLM_CONFIG = {
+    "config_list": [dict(BASE_LLM_CONFIG["config_list"][0], stream=True)]
+}
+
+_llm_clients = {}
+_llm_lock = threading.Lock()
+
+def get_llm(llm_config):
+    """Return the shared chat model client for a config, so its HTTP connections are reused.
+
+    Only configs with "stream" set get a streaming client; the others make plain requests.
+    """
+    key = config_fingerprint(llm_config)
+    with _llm_lock:
+        if key not in _llm_clients:
+            settings = llm_config["config_list"][0]
+            _llm_clients[key] = ChatOpenAI(
+                model_name=settings["model"],
+                openai_api_key=settings["api_key"],
+                temperature=settings["temperature"],
+                max_tokens=settings["max_tokens"],
+                model_kwargs={
+                    "presence_penalty": settings["presence_penalty"],
+                    "frequency_penalty": settings["frequency_penalty"],
+                    "response_format": settings["response_format"]
+                },
+                # Tokens only reach a caller that opened a ResponseStream
+                streaming=settings.get("stream", False),
+                callbacks=[StreamingTokenHandler()] if settings.get("stream", False) else None
+            )
+        return _llm_clients[key]
+
+@lru_cache(maxsize=None)
+def get_legal_tools():
+    """The legal tools are stateless, so every agent shares one set."""
+    return create_uae_legal_tools()
+
+def create_judge_agent(llm_config=BASE_LLM_CONFIG):
     return Agent(
         role='قاضي قانوني إماراتي',
         goal='تقديم أحكام وتفسيرات قانونية دقيقة بناءً على القانون الإماراتي',
@@ -56,11 +101,12 @@ def create_judge_agent():
         """,
         verbose=True,
         allow_delegation=False,
-        llm_config=BASE_LLM_CONFIG,
-        tools=create_uae_legal_tools()
+        llm=get_llm(llm_config),
+        llm_config=llm_config,
+        tools=get_legal_tools()
     )
 
-def create_advocate_agent():
+def create_advocate_agent(llm_config=BASE_LLM_CONFIG):
     return Agent(
         role='محامي إماراتي',
         goal='تقديم التمثيل القانوني والمشورة المتخصصة بناءً على القانون الإماراتي',
@@ -72,11 +118,12 @@ def create_advocate_agent():
         """,
         verbose=True,
         allow_delegation=False,
-        llm_config=BASE_LLM_CONFIG,
-        tools=create_uae_legal_tools()
+        llm=get_llm(llm_config),
+        llm_config=llm_config,
+        tools=get_legal_tools()
     )
 
-def create_consultant_agent():
+def create_consultant_agent(llm_config=BASE_LLM_CONFIG):
     return Agent(
         role='مستشار قضائي إماراتي',
         goal='تقديم الاستشارات والتوجيه القانوني المتخصص في القانون الإماراتي',
@@ -88,6 +135,65 @@ def create_consultant_agent():
         """,
         verbose=True,
         allow_delegation=False,
-        llm_config=BASE_LLM_CONFIG,
-        tools=create_uae_legal_tools()
-    )
\ No newline at end of file
+        llm=get_llm(llm_config),
+        llm_config=llm_config,
+        tools=get_legal_tools()
+    )
+
+# Agents are built once per concurrent user of a role and reused across requests
+agent_pool = AgentPool()
+agent_pool.register('judge', create_judge_agent)
+agent_pool.register('advocate', create_advocate_agent)
+agent_pool.register('consultant', create_consultant_agent)
+
+# Shared across Streamlit reruns and sessions, since the module is imported once per process
+response_cache = ResponseCache()
+# Identical questions asked while the first is still being answered wait for that answer
+consultation_flights = SingleFlight('consultation')
+
+def _consult(role, agent, query, category):
+    # Repeated questions to the same role are answered from the cache without calling the model
+    result = response_cache.get(role, category, BASE_LLM_CONFIG, query)
+    if result is None:
+        # Prepare the task with context
+        task_description = f"""
+        تحليل والرد على الاستفسار التالي في مجال {category}:
+        {query}
+
+        يجب أن يكون الرد:
+        1. مستنداً إلى القانون الإماراتي
+        2. مدعوماً بالمراجع القانونية
+        3. واضحاً ومفهوماً
+        4. متوافقاً مع أحدث التشريعات
+        """
+
+        task = Task(
+            description=task_description,
+            agent=agent,
+            expected_output="تحليل قانوني ورد بناءً على القانون الإماراتي"
+        )
+
+        crew = Crew(
+            agents=[agent],
+            tasks=[task]
+        )
+
+        result = str(crew.kickoff())
+        response_cache.put(role, category, BASE_LLM_CONFIG, query, result)
+    return result
+
+def get_agent_response_stream(role, query, category):
+    """Stream the answer of the pooled `role` agent token by token.
+
+    The agent is checked out by the background thread itself, so it is only returned
+    to the pool once the crew has finished, even if the caller stops reading early.
+    """
+    def consult():
+        with agent_pool.agent(role, STREAMING_LLM_CONFIG) as agent:
+            return _consult(role, agent, query, category)
+
+    def produce():
+        # A request that joins one in flight receives the whole answer when it completes
+        key = ResponseCache.make_key(role, category, BASE_LLM_CONFIG, query)
+        return consultation_flights.do(key, consult)[0]
+    return ResponseStream(produce, label=role)
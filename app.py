@@ -1,7 +1,9 @@
+import hashlib
+import html
+import time
 import streamlit as st
-from agents import create_judge_agent, create_advocate_agent, create_consultant_agent
-from crewai import Task, Crew
-from utils import is_arabic, format_legal_response
+from agents import get_agent_response_stream
+from utils import is_arabic, format_legal_response, format_legal_response_stream
 from config import LEGAL_CATEGORIES, DEFAULT_LANGUAGE
 
 st.set_page_config(page_title="المساعد القانوني الإماراتي", layout="wide")
@@ -17,8 +19,19 @@ st.write("احصل على المساعدة القانونية من خبراء ق
 from pdf_processor import PDFProcessor
 from document_exporter import DocumentExporter
 from translator import Translator
+from model_registry import registry
+from config import MODEL_WARMUP
 
-# Initialize components
+@st.cache_resource
+def warm_up_models():
+    """Load the configured models once per server process, before the first request."""
+    registry.warm_up(MODEL_WARMUP)
+    return True
+
+if MODEL_WARMUP:
+    warm_up_models()
+
+# Initialize components; the models behind them are shared by all sessions
 if 'pdf_processor' not in st.session_state:
     st.session_state.pdf_processor = PDFProcessor()
 if 'document_exporter' not in st.session_state:
@@ -26,6 +39,64 @@ if 'document_exporter' not in st.session_state:
 if 'translator' not in st.session_state:
     st.session_state.translator = Translator()
 
+# Seconds between refreshes of the download buttons while a translation streams in
+TRANSLATION_DOWNLOAD_REFRESH_SECONDS = 2.0
+
+def aligned_target_text(aligned):
+    """Join the translated sentences of aligned paragraphs into the translated text."""
+    return '\n\n'.join(' '.join(target for _, target in paragraph) for paragraph in aligned)
+
+def render_translation_downloads(container, aligned, key):
+    """Render the download buttons for the (possibly partial) translation into `container`.
+
+    The buttons are rendered again as the translation grows, so each rendering needs its own `key`.
+    """
+    translated_text = aligned_target_text(aligned)
+    download_col1, download_col2 = container.columns(2)
+    
+    with download_col1:
+        st.download_button(
+            label="تحميل النص المترجم",
+            data=translated_text.encode(),
+            file_name=f"translated_document.txt",
+            mime="text/plain",
+            key=f"translation_download_{key}"
+        )
+    
+    with download_col2:
+        # Create a simple HTML file with the texts side by side, one row per sentence
+        rows = "".join(
+            f"<tr><td>{html.escape(source)}</td><td>{html.escape(target)}</td></tr>"
+            for paragraph in aligned for source, target in paragraph
+        )
+        html_content = f"""
+        <html dir="auto">
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                table {{ border-collapse: collapse; width: 100%; }}
+                td, th {{ border: 1px solid #ddd; padding: 8px; vertical-align: top; }}
+                th {{ color: #2c3e50; }}
+            </style>
+        </head>
+        <body>
+            <table>
+                <tr><th>Original Text</th><th>Translated Text</th></tr>
+                {rows}
+            </table>
+        </body>
+        </html>
+        """
+        
+        st.download_button(
+            label="تحميل النصين معاً (HTML)",
+            data=html_content.encode(),
+            file_name="translation_with_original.html",
+            mime="text/html",
+            key=f"html_download_{key}"
+        )
+
 # Create a new tab for PDF upload
 tab1, tab2, tab3, tab4 = st.tabs(["تحليل المستندات", "القاضي", "المحامي", "المستشار"])
 
@@ -40,6 +111,14 @@ with tab1:
         horizontal=True
     )
     
+    if service_type == "تلخيص وتحليل المستند":
+        summary_mode_label = st.radio(
+            "نوع الملخص / Summary Mode",
+            ["ملخص تفصيلي / Detailed", "ملخص سريع / Fast"],
+            horizontal=True
+        )
+        summary_mode = "extractive" if summary_mode_label == "ملخص سريع / Fast" else "abstractive"
+
     if service_type == "ترجمة المستند":
         target_language = st.selectbox(
             "اختر لغة الترجمة / Select Target Language",
@@ -65,11 +144,22 @@ with tab1:
                 status_text.text(message)
                 progress_bar.progress(progress)
 
+            # Show the summary while the rest of the document is still being processed
+            partial_summary = st.empty()
+
+            def update_summary(summary):
+                partial_summary.info(summary)
+
             st.session_state.pdf_processor.set_progress_callback(update_progress)
+            st.session_state.pdf_processor.set_summary_callback(update_summary)
 
             try:
                 # Process the uploaded PDF
-                results = st.session_state.pdf_processor.process_document(uploaded_file.read())
+                results = st.session_state.pdf_processor.process_document(
+                    uploaded_file.read(),
+                    summary_mode=summary_mode
+                )
+                partial_summary.empty()
                 
                 # Display results in collapsible sections
                 with st.expander("ملخص المستند", expanded=True):
@@ -110,23 +200,29 @@ with tab1:
                 st.error(f"حدث خطأ غير متوقع: {str(e)}")
                 st.error("يرجى المحاولة مرة أخرى أو الاتصال بالدعم الفني")
             finally:
-                # Clear progress bar and status
+                # Clear progress bar, status and partial summary
                 progress_bar.empty()
                 status_text.empty()
+                partial_summary.empty()
         
         else:  # Translation service
             with st.spinner("جاري تحليل المستند..."):
                 try:
-                    # Extract text from PDF
-                    text = st.session_state.pdf_processor.extract_text_from_pdf(uploaded_file.read())
+                    # Extract text from PDF in logical order: detection and translation need the
+                    # letters as written, not reshaped and reordered for display
+                    text = st.session_state.pdf_processor.extract_text_from_pdf(uploaded_file.read(), display=False)
                     
                     if not text.strip():
                         st.error("لم يتم العثور على نص قابل للقراءة في المستند")
                         st.stop()
                     
-                    # Detect source language
+                    # Detect source language, and the language of each paragraph of bilingual documents
                     source_lang = st.session_state.translator.detect_language(text)
+                    paragraph_langs = st.session_state.translator.detect_paragraph_languages(text)
                     st.info(f"تم اكتشاف لغة المستند: {st.session_state.translator.get_language_name(source_lang)}")
+                    other_langs = sorted(set(paragraph_langs) - {source_lang})
+                    if other_langs:
+                        st.info(f"يحتوي المستند أيضاً على فقرات بـ: {', '.join(other_langs)}")
                     
                     # Map language names to codes
                     lang_map = {
@@ -139,19 +235,17 @@ with tab1:
                     
                     target_lang = lang_map[target_language]
                     
-                    # Check if source and target are the same
-                    if source_lang == target_lang:
+                    # Check if source and target are the same; paragraphs already in the target language are kept
+                    if all(lang == target_lang for lang in paragraph_langs or [source_lang]):
                         st.warning("لغة المصدر ولغة الهدف متطابقتان. يرجى اختيار لغة مختلفة للترجمة.")
                         st.stop()
                     
-                    with st.spinner("جاري الترجمة..."):
-                        # Preprocess and translate the text
-                        processed_text = st.session_state.translator.preprocess_text(text)
-                        translated_text = st.session_state.translator.translate(
-                            processed_text,
-                            source_lang,
-                            target_lang
-                        )
+                    # Translation progress survives reruns, so an interrupted stream resumes where it stopped
+                    translation_key = (hashlib.sha256(uploaded_file.getvalue()).hexdigest(), target_lang)
+                    if st.session_state.get('translation', {}).get('key') != translation_key:
+                        st.session_state.translation = {'key': translation_key, 'aligned': [], 'failed': []}
+                    aligned = st.session_state.translation['aligned']
+                    failed = st.session_state.translation['failed']
                     
                     # Display results
                     col1, col2 = st.columns(2)
@@ -161,52 +255,44 @@ with tab1:
                     
                     with col2:
                         st.subheader("النص المترجم / Translated Text")
-                        st.text_area("", value=translated_text, height=300, key="translated_text")
+                        translated_view = st.empty()
                     
                     # Add download buttons
                     st.markdown("### تحميل الترجمة")
-                    download_col1, download_col2 = st.columns(2)
+                    downloads = st.empty()
                     
-                    with download_col1:
-                        st.download_button(
-                            label="تحميل النص المترجم",
-                            data=translated_text.encode(),
-                            file_name=f"translated_document.txt",
-                            mime="text/plain",
-                            key="translation_download"
+                    if len(aligned) < len(paragraph_langs):
+                        progress_bar = st.progress(len(aligned) / len(paragraph_langs))
+                        stream = st.session_state.translator.translate_stream(
+                            text, source_lang, target_lang, start=len(aligned), failed=failed
                         )
+                        last_refresh = 0.0
+                        try:
+                            # Paragraphs appear as they are translated; a rerun (the user leaving the
+                            # page or changing the file) stops the script here and closes the stream
+                            for paragraph in stream:
+                                aligned.append(paragraph)
+                                translated_view.text(aligned_target_text(aligned))
+                                progress_bar.progress(len(aligned) / len(paragraph_langs))
+                                if time.monotonic() - last_refresh > TRANSLATION_DOWNLOAD_REFRESH_SECONDS:
+                                    render_translation_downloads(downloads.container(), aligned, len(aligned))
+                                    last_refresh = time.monotonic()
+                        finally:
+                            stream.close()
+                        progress_bar.empty()
                     
-                    with download_col2:
-                        # Create a simple HTML file with both texts
-                        html_content = f"""
-                        <html dir="auto">
-                        <head>
-                            <meta charset="UTF-8">
-                            <style>
-                                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                                .text-container {{ margin-bottom: 20px; }}
-                                h2 {{ color: #2c3e50; }}
-                            </style>
-                        </head>
-                        <body>
-                            <div class="text-container">
-                                <h2>Original Text</h2>
-                                <p>{text}</p>
-                            </div>
-                            <div class="text-container">
-                                <h2>Translated Text</h2>
-                                <p>{translated_text}</p>
-                            </div>
-                        </body>
-                        </html>
-                        """
-                        
-                        st.download_button(
-                            label="تحميل النصين معاً (HTML)",
-                            data=html_content.encode(),
-                            file_name="translation_with_original.html",
-                            mime="text/html",
-                            key="html_download"
+                    translated_view.text_area("", value=aligned_target_text(aligned), height=300, key="translated_text")
+                    if failed:
+                        numbers = ', '.join(str(number + 1) for number in failed)
+                        st.warning(f"تعذرت ترجمة بعض الفقرات وبقيت بلغتها الأصلية / "
+                                   f"Some paragraphs could not be translated and were kept as they are: {numbers}")
+                    render_translation_downloads(downloads.container(), aligned, 'final')
+                    
+                    with st.expander("عرض الجمل متقابلة / Sentence by sentence"):
+                        st.dataframe(
+                            [{"Original": source, "Translation": target}
+                             for paragraph in aligned for source, target in paragraph],
+                            use_container_width=True
                         )
                     
                 except ValueError as ve:
@@ -233,36 +319,17 @@ selected_category = st.sidebar.selectbox(
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-# Create tabs for different agents
-tab1, tab2, tab3 = st.tabs(["القاضي", "المحامي", "المستشار"])
-
-def get_agent_response(agent, query, category):
-    # Prepare the task with context
-    task_description = f"""
-    تحليل والرد على الاستفسار التالي في مجال {category}:
-    {query}
-    
-    يجب أن يكون الرد:
-    1. مستنداً إلى القانون الإماراتي
-    2. مدعوماً بالمراجع القانونية
-    3. واضحاً ومفهوماً
-    4. متوافقاً مع أحدث التشريعات
-    """
-    
-    task = Task(
-        description=task_description,
-        agent=agent,
-        expected_output="تحليل قانوني ورد بناءً على القانون الإماراتي"
-
-    )
-    
-    crew = Crew(
-        agents=[agent],
-        tasks=[task]
-    )
-    
-    result = crew.kickoff()
-    return format_legal_response(result, 'ar' if is_arabic(query) else 'en')
+def stream_agent_response(role, query, category):
+    """Render an agent's answer as it streams in and return the formatted final answer."""
+    language = 'ar' if is_arabic(query) else 'en'
+    placeholder = st.empty()
+    stream = get_agent_response_stream(role, query, category)
+    for partial in format_legal_response_stream(stream, language):
+        placeholder.markdown(partial, unsafe_allow_html=True)
+    response = format_legal_response(stream.text, language)
+    placeholder.markdown(response, unsafe_allow_html=True)
+    st.caption(f"أول كلمة بعد {stream.time_to_first_token:.1f} ثانية / first token after {stream.time_to_first_token:.1f}s")
+    return response
 
 # Judge Tab
 with tab2:
@@ -281,12 +348,9 @@ with tab2:
     )
     if st.button("الحصول على رأي القاضي", key="judge_button"):
         if judge_query:
-            with st.spinner("القاضي يحلل قضيتك..."):
-                judge_agent = create_judge_agent()
-                response = get_agent_response(judge_agent, judge_query, selected_category)
-                st.session_state.chat_history.append(("القاضي", judge_query, response))
-                st.write("رد القاضي:")
-                st.markdown(response, unsafe_allow_html=True)
+            st.write("رد القاضي:")
+            response = stream_agent_response('judge', judge_query, selected_category)
+            st.session_state.chat_history.append(("القاضي", judge_query, response))
 
 # Advocate Tab
 with tab3:
@@ -305,12 +369,9 @@ with tab3:
     )
     if st.button("الحصول على رأي المحامي", key="advocate_button"):
         if advocate_query:
-            with st.spinner("المحامي يحلل قضيتك..."):
-                advocate_agent = create_advocate_agent()
-                response = get_agent_response(advocate_agent, advocate_query, selected_category)
-                st.session_state.chat_history.append(("المحامي", advocate_query, response))
-                st.write("رد المحامي:")
-                st.markdown(response, unsafe_allow_html=True)
+            st.write("رد المحامي:")
+            response = stream_agent_response('advocate', advocate_query, selected_category)
+            st.session_state.chat_history.append(("المحامي", advocate_query, response))
 
 # Consultant Tab
 with tab4:
@@ -327,3 +388,8 @@ with tab4:
         """,
         unsafe_allow_html=True
         )
+    if st.button("الحصول على رأي المستشار", key="consultant_button"):
+        if consultant_query:
+            st.write("رد المستشار:")
+            response = stream_agent_response('consultant', consultant_query, selected_category)
+            st.session_state.chat_history.append(("المستشار", consultant_query, response))
@@ -0,0 +1,281 @@
+"""Micro-benchmarks for the document processing pipeline.
+
+Usage:
+    python benchmarks.py summarization [--chunks 32] [--max-batch-size 16]
+    python benchmarks.py quantization
+    python benchmarks.py translation [--pages 100] [--batch-size 16]
+    python benchmarks.py normalize [--megabytes 4]
+"""
+import argparse
+import math
+import re
+import time
+from collections import Counter
+
+SAMPLE_SENTENCES = [
+    "The employer shall pay the employee's wages on the due dates agreed in the employment contract.",
+    "Either party may terminate the contract for a legitimate reason by giving written notice of at least thirty days.",
+    "The tenant may not sublet the leased property without the prior written approval of the landlord.",
+    "Any dispute arising from this agreement shall be referred to the competent courts of the Emirate of Dubai.",
+    "The court of cassation held that the lower court had erred in applying the limitation period to the claim.",
+]
+
+ARABIC_SAMPLE_SENTENCES = [
+    "يلتزم صاحب العمل بدفع أجر العامل في المواعيد المتفق عليها في عقد العمل.",
+    "يجوز لأي من الطرفين إنهاء العقد لسبب مشروع بموجب إخطار كتابي لا تقل مدته عن ثلاثين يوماً.",
+    "لا يجوز للمستأجر تأجير العين المؤجرة من الباطن دون موافقة كتابية مسبقة من المؤجر.",
+    "تختص محاكم إمارة دبي بالنظر في أي نزاع ينشأ عن هذه الاتفاقية.",
+    "قضت محكمة التمييز بأن المحكمة الأدنى أخطأت في تطبيق مدة التقادم على الدعوى.",
+]
+
+
+def _sample_chunks(count: int):
+    """Build chunks of varying length so batching has to pad across sizes."""
+    chunks = []
+    for i in range(count):
+        repeats = 1 + i % 6
+        sentences = [SAMPLE_SENTENCES[(i + j) % len(SAMPLE_SENTENCES)] for j in range(repeats * 2)]
+        chunks.append(" ".join(sentences))
+    return chunks
+
+
+def benchmark_summarization(chunk_count: int = 32, max_batch_size: int = 16):
+    """Report summarization throughput in input tokens per second for each batch size."""
+    from summarizer import DocumentSummarizer
+
+    summarizer = DocumentSummarizer()
+    chunks = _sample_chunks(chunk_count)
+    total_tokens = sum(summarizer.count_tokens(chunks))
+
+    # Warm up so model loading and first-call allocation are not timed
+    summarizer.summarize_batch(chunks[:2], batch_size=2)
+
+    print(f"{chunk_count} chunks, {total_tokens} input tokens")
+    for batch_size in range(1, max_batch_size + 1):
+        start = time.perf_counter()
+        summarizer.summarize_batch(chunks, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"batch_size={batch_size:2d}  {total_tokens / elapsed:8.1f} tokens/sec  {elapsed:7.2f}s")
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    """ROUGE-L F1 between two texts, on whitespace tokens."""
+    cand, ref = candidate.split(), reference.split()
+    if not cand or not ref:
+        return 0.0
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(ref) + 1)
+    for token in cand:
+        current = [0]
+        for j, ref_token in enumerate(ref, start=1):
+            current.append(previous[j - 1] + 1 if token == ref_token else max(previous[j], current[j - 1]))
+        previous = current
+    lcs = previous[-1]
+    if not lcs:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def corpus_bleu(candidates, references, max_n: int = 4) -> float:
+    """Corpus BLEU (0-100) with add-one smoothing of the higher-order precisions."""
+    matches, totals = [0] * max_n, [0] * max_n
+    cand_length = ref_length = 0
+    for candidate, reference in zip(candidates, references):
+        cand, ref = candidate.split(), reference.split()
+        cand_length += len(cand)
+        ref_length += len(ref)
+        for n in range(1, max_n + 1):
+            cand_ngrams = Counter(tuple(cand[i:i + n]) for i in range(len(cand) - n + 1))
+            ref_ngrams = Counter(tuple(ref[i:i + n]) for i in range(len(ref) - n + 1))
+            matches[n - 1] += sum((cand_ngrams & ref_ngrams).values())
+            totals[n - 1] += max(len(cand) - n + 1, 0)
+    if not matches[0]:
+        return 0.0
+    # Unigrams are unsmoothed; n > 1 get +1 so short sentences do not zero the score
+    log_precision = sum(
+        math.log((matches[n] + min(n, 1)) / (totals[n] + min(n, 1))) for n in range(max_n)
+    ) / max_n
+    brevity = min(1.0, math.exp(1 - ref_length / cand_length))
+    return 100 * brevity * math.exp(log_precision)
+
+
+def _timed(func, inputs):
+    start = time.perf_counter()
+    outputs = [func(item) for item in inputs]
+    return outputs, time.perf_counter() - start
+
+
+def compare_quantization():
+    """Compare int8 models with fp32 on latency, memory and output drift."""
+    from model_registry import estimate_model_size
+    from summarizer import _load_summarization_pipeline
+    from translator import _load_marian
+
+    print(f"{'model':<28}{'fp32 s':>9}{'int8 s':>9}{'fp32 MB':>10}{'int8 MB':>10}  drift")
+
+    def summarize(summarizer):
+        return lambda text: summarizer(text, max_length=130, min_length=30, do_sample=False,
+                                       num_beams=2, truncation=True)[0]['summary_text']
+
+    documents = [" ".join(SAMPLE_SENTENCES[i:] + SAMPLE_SENTENCES[:i]) for i in range(len(SAMPLE_SENTENCES))]
+    fp32, int8 = _load_summarization_pipeline(quantized=False), _load_summarization_pipeline(quantized=True)
+    fp32_outputs, fp32_time = _timed(summarize(fp32), documents)
+    int8_outputs, int8_time = _timed(summarize(int8), documents)
+    rouge = sum(rouge_l(c, r) for c, r in zip(int8_outputs, fp32_outputs)) / len(documents)
+    print(f"{'summarizer':<28}{fp32_time:9.2f}{int8_time:9.2f}"
+          f"{estimate_model_size(fp32) / 2**20:10.0f}{estimate_model_size(int8) / 2**20:10.0f}"
+          f"  ROUGE-L {rouge:.3f}")
+
+    def translate(loaded):
+        tokenizer, model = loaded
+        def run(text):
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+            generated = model.generate(**inputs, num_beams=2, max_length=512)
+            return tokenizer.batch_decode(generated, skip_special_tokens=True)[0]
+        return run
+
+    for src, tgt, sentences in [('en', 'ar', SAMPLE_SENTENCES), ('ar', 'en', ARABIC_SAMPLE_SENTENCES)]:
+        model_name = f'Helsinki-NLP/opus-mt-{src}-{tgt}'
+        fp32, int8 = _load_marian(model_name, quantized=False), _load_marian(model_name, quantized=True)
+        fp32_outputs, fp32_time = _timed(translate(fp32), sentences)
+        int8_outputs, int8_time = _timed(translate(int8), sentences)
+        bleu = corpus_bleu(int8_outputs, fp32_outputs)
+        print(f"{'marian ' + src + '-' + tgt:<28}{fp32_time:9.2f}{int8_time:9.2f}"
+              f"{estimate_model_size(fp32) / 2**20:10.0f}{estimate_model_size(int8) / 2**20:10.0f}"
+              f"  BLEU vs fp32 {bleu:.1f}")
+
+
+def benchmark_translation(pages: int = 100, batch_size: int = 16):
+    """Compare chunk-by-chunk translation with length-bucketed batches on a document-sized input."""
+    from translator import Translator
+    from config import TRANSLATION_CHUNK_TOKENS
+
+    translator = Translator()
+    # Roughly a page of contract text per paragraph, in sentences of varying length
+    paragraphs = [
+        " ".join(SAMPLE_SENTENCES[(page + j) % len(SAMPLE_SENTENCES)] for j in range(2 + page % 5))
+        for page in range(pages)
+    ]
+    tokenizer, model = translator._load_model('en', 'ar')
+    chunks = [' '.join(chunk) for chunk in translator._pack_chunks(
+        tokenizer, translator._segment(tokenizer, paragraphs, TRANSLATION_CHUNK_TOKENS), TRANSLATION_CHUNK_TOKENS
+    )]
+
+    # Warm up so model loading and first-call allocation are not timed
+    translator._generate(tokenizer, model, chunks[:2], 2)
+
+    print(f"{pages} pages, {len(chunks)} chunks")
+    results = {}
+    for size in (1, batch_size):
+        start = time.perf_counter()
+        translator._generate(tokenizer, model, chunks, size)
+        results[size] = time.perf_counter() - start
+        print(f"batch_size={size:2d}  {len(chunks) / results[size]:6.2f} chunks/sec  {results[size]:7.2f}s")
+    print(f"speed-up: {results[1] / results[batch_size]:.2f}x")
+
+
+def _legacy_clean_text(text: str) -> str:
+    """PDFProcessor._clean_text and _process_arabic_text's regex passes before text_normalizer."""
+    text = "".join(char for char in text if char.isprintable() or char in "\n\r\t")
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)
+    text = re.sub(r'([.!?])\s*(?=[A-Z])', r'\1\n', text)
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(line for line in lines if line).strip()
+    text = re.sub(r'([ء-ي])\s+([ء-ي])', r'\1\2', text)
+    return re.sub(r'[\u200B-\u200F\u202A-\u202E]', '', text)
+
+
+def _legacy_post_process_arabic(text: str) -> str:
+    """Translator._post_process_translation for Arabic before text_normalizer."""
+    text = re.sub(r'([ء-ي])\s+([ء-ي])', r'\1\2', text)
+    text = re.sub(r'[\u200B-\u200F\u202A-\u202E]', '', text)
+    text = text.replace('،,', '،')
+    text = text.replace('.,', '.')
+    text = text.replace('؟?', '؟')
+    text = text.replace('!!', '!')
+    text = re.sub(r'([0-9])([ء-ي])', r'\1 \2', text)
+    text = re.sub(r'([ء-ي])([0-9])', r'\1 \2', text)
+    text = re.sub(r'([a-zA-Z])([ء-ي])', r'\1 \2', text)
+    text = re.sub(r'([ء-ي])([a-zA-Z])', r'\1 \2', text)
+    return text.strip()
+
+
+def _legacy_preprocess_translation(text: str) -> str:
+    """Translator.preprocess_text before text_normalizer."""
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r'\n\s*\n\s*', '\n\n', text)
+    text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
+    text = re.sub(r'[^\w\s\.,!?؟،؛:;()。！？।۔-]', '', text)
+    return text.strip()
+
+
+def benchmark_normalize(megabytes: float = 4):
+    """Compare the legacy cleaning passes with text_normalizer profiles on multi-MB Arabic text."""
+    from text_normalizer import normalize
+
+    # Extracted-page noise: bidi marks, no-break spaces, tabs, CRLF line ends and blank lines
+    noisy = [
+        sentence.replace(' ', ' \u00a0', 1) + "\u200f" + ("\r\n" if i % 3 else "\n\n\t")
+        for i, sentence in enumerate(ARABIC_SAMPLE_SENTENCES + SAMPLE_SENTENCES[:1])
+    ]
+    unit = "".join(noisy)
+    text = unit * max(1, int(megabytes * 2**20 / len(unit.encode('utf-8'))))
+    size = len(text.encode('utf-8')) / 2**20
+    sentences = [sentence + "،, 2024" for sentence in ARABIC_SAMPLE_SENTENCES] * 2000
+
+    print(f"{size:.1f} MB of page text, {len(sentences)} translated sentences")
+    print(f"{'':<24}{'legacy':>12}{'normalizer':>12}{'speed-up':>10}")
+
+    def page_clean(text):
+        return normalize(normalize(text, 'pdf'), 'arabic_display')
+
+    for label, legacy, current, inputs in [
+        ('page cleaning (MB/s)', _legacy_clean_text, page_clean, [text]),
+        ('translation input (MB/s)', _legacy_preprocess_translation,
+         lambda text: normalize(text, 'translation_input'), [text]),
+        ('translation ar (sent/s)', _legacy_post_process_arabic,
+         lambda sentence: normalize(sentence, 'translation_ar'), sentences),
+    ]:
+        timings = []
+        for fn in (legacy, current):
+            start = time.perf_counter()
+            for item in inputs:
+                fn(item)
+            timings.append(time.perf_counter() - start)
+        amount = size if len(inputs) == 1 else len(inputs)
+        print(f"{label:<24}{amount / timings[0]:12.1f}{amount / timings[1]:12.1f}{timings[0] / timings[1]:9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    summarization = subparsers.add_parser('summarization', help='Batched BART summarization throughput')
+    summarization.add_argument('--chunks', type=int, default=32)
+    summarization.add_argument('--max-batch-size', type=int, default=16)
+
+    subparsers.add_parser('quantization', help='Int8 vs fp32 latency, memory and ROUGE/BLEU drift')
+
+    translation = subparsers.add_parser('translation', help='Batched vs chunk-by-chunk Marian translation')
+    translation.add_argument('--pages', type=int, default=100)
+    translation.add_argument('--batch-size', type=int, default=16)
+
+    normalization = subparsers.add_parser('normalize', help='Text normalization throughput on Arabic text')
+    normalization.add_argument('--megabytes', type=float, default=4)
+
+    args = parser.parse_args()
+    if args.benchmark == 'summarization':
+        benchmark_summarization(args.chunks, args.max_batch_size)
+    elif args.benchmark == 'quantization':
+        compare_quantization()
+    elif args.benchmark == 'translation':
+        benchmark_translation(args.pages, args.batch_size)
+    elif args.benchmark == 'normalize':
+        benchmark_normalize(args.megabytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,4 +28,93 @@ LEGAL_CATEGORIES = {
     'labor': 'قانون العمل',
     'family': 'قانون الأسرة',
     'property': 'قانون العقارات'
-}
\ No newline at end of file
+}
+
+# OCR Settings
+OCR_DPI = int(os.getenv('OCR_DPI', 300))  # Higher DPI for better quality
+OCR_TESSERACT_CONFIG = r'--oem 1 --psm 3 -l ara+eng'  # Better Arabic text recognition
+OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', os.cpu_count() or 1))
+OCR_MAX_IN_FLIGHT = int(os.getenv('OCR_MAX_IN_FLIGHT', 4))  # Pages rendered or queued at once
+
+# Text layer quality thresholds; pages failing any of them are sent to OCR
+OCR_MIN_PAGE_CHARS = int(os.getenv('OCR_MIN_PAGE_CHARS', 20))  # Minimum letters on a page
+OCR_MIN_SCRIPT_RATIO = float(os.getenv('OCR_MIN_SCRIPT_RATIO', 0.6))  # Share of Arabic or Latin letters
+OCR_MAX_MOJIBAKE_RATIO = float(os.getenv('OCR_MAX_MOJIBAKE_RATIO', 0.05))  # Share of garbled characters
+
+# Extraction cache
+EXTRACTION_CACHE_PATH = os.getenv('EXTRACTION_CACHE_PATH', '.cache/extraction_cache.db')
+EXTRACTION_CACHE_MAX_MB = int(os.getenv('EXTRACTION_CACHE_MAX_MB', 512))
+
+# Summarization
+SUMMARY_MODE = os.getenv('SUMMARY_MODE', 'abstractive')  # "abstractive" (BART) or "extractive" (fast, no model)
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'facebook/bart-large-cnn')
+SUMMARY_BATCH_SIZE = int(os.getenv('SUMMARY_BATCH_SIZE', 8))  # Chunks per generate() call
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 900))  # Packed close to BART's 1024-token window
+SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv('SUMMARY_CHUNK_OVERLAP_TOKENS', 50))
+SUMMARY_TARGET_TOKENS = int(os.getenv('SUMMARY_TARGET_TOKENS', 400))  # Final summary length bound
+SUMMARY_MAX_REDUCE_ROUNDS = int(os.getenv('SUMMARY_MAX_REDUCE_ROUNDS', 5))
+SUMMARY_STREAM_BATCHES = int(os.getenv('SUMMARY_STREAM_BATCHES', 4))  # Batches buffered and length-sorted together while streaming
+SUMMARY_PREVIEW_EVERY_PAGES = int(os.getenv('SUMMARY_PREVIEW_EVERY_PAGES', 5))  # Extractive preview refreshed every N pages
+SUMMARY_PREVIEW_PAGES = int(os.getenv('SUMMARY_PREVIEW_PAGES', 10))  # Latest pages the preview is built from
+
+# Model registry
+MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', 4096))  # Loaded models above this are evicted LRU
+MODEL_WARMUP = [name for name in os.getenv('MODEL_WARMUP', '').split(',') if name]  # e.g. "summarizer,marian:en-ar"
+
+# Int8 quantized CPU inference (opt-in)
+QUANTIZED_INFERENCE = os.getenv('QUANTIZED_INFERENCE', '0').lower() in ('1', 'true', 'yes')
+QUANTIZED_MODEL_DIR = os.getenv('QUANTIZED_MODEL_DIR', '.cache/quantized_models')
+
+# Per-stage timeouts for the concurrent document analysis stages, in seconds
+STAGE_TIMEOUTS = {
+    'summary': float(os.getenv('SUMMARY_TIMEOUT_SECONDS', 600)),
+    'legal_analysis': float(os.getenv('LEGAL_ANALYSIS_TIMEOUT_SECONDS', 300)),
+    'legislation_mapping': float(os.getenv('LEGISLATION_MAPPING_TIMEOUT_SECONDS', 300))
+}
+
+# Retrieval of relevant passages for the judge and advocate prompts
+# Documents and questions are mostly Arabic, so the default embedding model is multilingual.
+# Set to empty to use Chroma's bundled all-MiniLM-L6-v2, which only handles English well
+RETRIEVAL_EMBEDDING_MODEL = os.getenv('RETRIEVAL_EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+RETRIEVAL_PASSAGE_TOKENS = int(os.getenv('RETRIEVAL_PASSAGE_TOKENS', 300))
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', 8))  # Passages retrieved per question
+RETRIEVAL_TOKEN_BUDGETS = {
+    'legal_analysis': int(os.getenv('LEGAL_ANALYSIS_TOKEN_BUDGET', 3000)),
+    'legislation_mapping': int(os.getenv('LEGISLATION_MAPPING_TOKEN_BUDGET', 3000))
+}
+
+# Map-reduce legal analysis for documents that do not fit one prompt
+LEGAL_ANALYSIS_MODE = os.getenv('LEGAL_ANALYSIS_MODE', 'retrieval')  # "retrieval" or "map_reduce"
+ANALYSIS_SECTION_TOKENS = int(os.getenv('ANALYSIS_SECTION_TOKENS', 6000))
+ANALYSIS_REDUCE_TOKENS = int(os.getenv('ANALYSIS_REDUCE_TOKENS', 12000))  # Findings merged per reduce call
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', 4))
+ANALYSIS_MAX_RETRIES = int(os.getenv('ANALYSIS_MAX_RETRIES', 3))
+ANALYSIS_CHECKPOINT_PATH = os.getenv('ANALYSIS_CHECKPOINT_PATH', '.cache/analysis_checkpoints.db')
+ANALYSIS_CHECKPOINT_TTL_HOURS = float(os.getenv('ANALYSIS_CHECKPOINT_TTL_HOURS', 24))  # Unfinished runs resume within this window
+ANALYSIS_CHECKPOINT_MAX_ENTRIES = int(os.getenv('ANALYSIS_CHECKPOINT_MAX_ENTRIES', 2000))  # Section findings kept across documents
+
+# Persistent cache of agent consultation answers
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '.cache/response_cache.db')
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv('RESPONSE_CACHE_TTL_HOURS', 24 * 7))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+# Near-duplicate lookup by embedding, off by default. It is only honoured with a multilingual
+# RETRIEVAL_EMBEDDING_MODEL, since an English-only model scores unrelated Arabic questions as similar
+RESPONSE_CACHE_SEMANTIC = os.getenv('RESPONSE_CACHE_SEMANTIC', '0').lower() in ('1', 'true', 'yes')
+RESPONSE_CACHE_SIMILARITY = float(os.getenv('RESPONSE_CACHE_SIMILARITY', 0.95))  # Cosine similarity for a near-duplicate hit
+
+# Local full-text index of UAE legislation and case law used by the agents' search tools
+LEGAL_CORPUS_DIR = os.getenv('LEGAL_CORPUS_DIR', 'data/legal_corpus')  # legislation/ and case_law/ sub-directories
+LEGAL_CORPUS_INDEX_PATH = os.getenv('LEGAL_CORPUS_INDEX_PATH', '.cache/legal_corpus.db')
+LEGAL_CORPUS_REFRESH_SECONDS = float(os.getenv('LEGAL_CORPUS_REFRESH_SECONDS', 300))  # How often to look for new files
+LEGAL_SEARCH_RESULTS = int(os.getenv('LEGAL_SEARCH_RESULTS', 5))
+
+# Bilingual legal glossary: TSV ("arabic<TAB>english") or JSON; merged with the built-in terms
+LEGAL_GLOSSARY_PATH = os.getenv('LEGAL_GLOSSARY_PATH', 'data/legal_glossary.tsv')
+
+# Translation
+TRANSLATION_BATCH_SIZE = int(os.getenv('TRANSLATION_BATCH_SIZE', 16))  # Chunks per generate() call
+TRANSLATION_CHUNK_TOKENS = int(os.getenv('TRANSLATION_CHUNK_TOKENS', 400))  # Source tokens packed per Marian input, below its 512 window
+TRANSLATION_STREAM_WINDOW = int(os.getenv('TRANSLATION_STREAM_WINDOW', 32))  # Most paragraphs translated per step when streaming
+TRANSLATION_MEMORY_PATH = os.getenv('TRANSLATION_MEMORY_PATH', '.cache/translation_memory.db')
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', 200000))  # Segments kept, LRU beyond
+TRANSLATION_MEMORY_FUZZY_THRESHOLD = float(os.getenv('TRANSLATION_MEMORY_FUZZY_THRESHOLD', 0.85))  # Similarity for suggestions
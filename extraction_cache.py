@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import sqlite_utils
+
+from config import EXTRACTION_CACHE_MAX_MB, EXTRACTION_CACHE_PATH
+
+
+class ExtractionCache:
+    """Persistent page-level cache of extracted PDF text, stored in SQLite.
+
+    Documents are addressed by the SHA-256 of their bytes combined with the extraction
+    settings, so changing the DPI, tesseract config or cleaning rules never serves stale
+    text. Whole documents are evicted least-recently-used once the store exceeds its
+    size budget.
+    """
+
+    def __init__(self, path: str = EXTRACTION_CACHE_PATH, max_mb: int = EXTRACTION_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Streamlit serves sessions from several threads; access is serialized by the lock
+        self.db = sqlite_utils.Database(sqlite3.connect(path, check_same_thread=False))
+        self.db['documents'].create({
+            'doc_key': str,
+            'page_count': int,
+            'size': int,
+            'last_access': float
+        }, pk='doc_key', if_not_exists=True)
+        self.db['pages'].create({
+            'doc_key': str,
+            'page_number': int,
+            'text': str,
+            'size': int
+        }, pk=('doc_key', 'page_number'), if_not_exists=True)
+        self.db['documents'].create_index(['last_access'], if_not_exists=True)
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes, settings: Dict) -> str:
+        """Build the cache key from the PDF content and the extraction settings."""
+        content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+        return f"{content_hash}:{settings_hash[:16]}"
+
+    def get_document(self, doc_key: str) -> Optional[List[str]]:
+        """Return every page of a fully extracted document, or None on a miss."""
+        with self._lock:
+            rows = list(self.db.query(
+                "select page_count from documents where doc_key = ? and page_count is not null",
+                [doc_key]
+            ))
+            if rows:
+                pages = [row['text'] for row in self.db.query(
+                    "select text from pages where doc_key = ? order by page_number",
+                    [doc_key]
+                )]
+                if len(pages) == rows[0]['page_count']:
+                    self._touch(doc_key)
+                    self.hits += 1
+                    return pages
+            self.misses += 1
+            return None
+
+    def get_page(self, doc_key: str, page_number: int) -> Optional[str]:
+        """Return a single cached page, e.g. from an extraction that was interrupted."""
+        with self._lock:
+            rows = list(self.db.query(
+                "select text from pages where doc_key = ? and page_number = ?",
+                [doc_key, page_number]
+            ))
+            if rows:
+                self.page_hits += 1
+                return rows[0]['text']
+            self.page_misses += 1
+            return None
+
+    def store_page(self, doc_key: str, page_number: int, text: str):
+        """Store the cleaned text of one page."""
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            self.db['pages'].upsert({
+                'doc_key': doc_key,
+                'page_number': page_number,
+                'text': text,
+                'size': size
+            }, pk=('doc_key', 'page_number'))
+            document_size = self.db.execute(
+                "select coalesce(sum(size), 0) from pages where doc_key = ?", [doc_key]
+            ).fetchone()[0]
+            self.db['documents'].upsert({
+                'doc_key': doc_key,
+                'size': document_size,
+                'last_access': time.time()
+            }, pk='doc_key')
+            self._evict(keep=doc_key)
+
+    def mark_complete(self, doc_key: str, page_count: int):
+        """Record that all pages of the document have been stored."""
+        with self._lock:
+            self.db['documents'].upsert({
+                'doc_key': doc_key,
+                'page_count': page_count,
+                'last_access': time.time()
+            }, pk='doc_key')
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the current size of the store."""
+        with self._lock:
+            documents, size = self.db.execute(
+                "select count(*), coalesce(sum(size), 0) from documents"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'page_hits': self.page_hits,
+            'page_misses': self.page_misses,
+            'documents': documents,
+            'size_bytes': size
+        }
+
+    def _touch(self, doc_key: str):
+        self.db.execute("update documents set last_access = ? where doc_key = ?", [time.time(), doc_key])
+        self.db.conn.commit()
+
+    def _evict(self, keep: str):
+        """Drop least-recently-used documents until the store fits its budget."""
+        total = self.db.execute("select coalesce(sum(size), 0) from documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = self.db.execute(
+            "select doc_key, size from documents where doc_key != ? order by last_access",
+            [keep]
+        ).fetchall()
+        for doc_key, size in victims:
+            if total <= self.max_bytes:
+                break
+            self.db.execute("delete from pages where doc_key = ?", [doc_key])
+            self.db.execute("delete from documents where doc_key = ?", [doc_key])
+            total -= size or 0
+        self.db.conn.commit()
@@ -0,0 +1,99 @@
+import re
+from typing import List
+
+import numpy as np
+
+from utils import ARABIC_FOLD_TABLE
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?؟])\s+|\n+')
+TOKEN_PATTERN = re.compile(r'[^\W\d_]{2,}')
+
+# Function words that carry no topical weight, in normalized form
+STOPWORDS = {
+    'في', 'من', 'علي', 'الي', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'التي', 'الذي', 'الذين', 'او', 'ان',
+    'كان', 'كانت', 'قد', 'لا', 'ما', 'كل', 'بعد', 'قبل', 'بين', 'حتي', 'اذا', 'تم', 'هو', 'هي',
+    'the', 'of', 'and', 'to', 'in', 'a', 'an', 'is', 'are', 'be', 'by', 'for', 'on', 'or', 'as',
+    'at', 'this', 'that', 'with', 'from', 'shall', 'any', 'its', 'it', 'was', 'were', 'has', 'have',
+}
+
+
+class ExtractiveSummarizer:
+    """TextRank over TF-IDF sentence vectors, fully vectorized with NumPy.
+
+    The sentence similarity graph is never materialized: with L2-normalized TF-IDF
+    rows X, the cosine similarity matrix is X @ X.T, so each PageRank step is two
+    sparse products computed with `np.bincount`. Cost is linear in the number of
+    tokens, which keeps a 500-page document well under a second.
+    """
+
+    def __init__(self, damping: float = 0.85, max_iterations: int = 50,
+                 tolerance: float = 1e-6, min_sentence_length: int = 30):
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.min_sentence_length = min_sentence_length
+
+    def split_sentences(self, text: str) -> List[str]:
+        """Split text into sentences, dropping fragments too short to stand alone."""
+        sentences = (sentence.strip() for sentence in SENTENCE_PATTERN.split(text))
+        return [sentence for sentence in sentences if len(sentence) > self.min_sentence_length]
+
+    def rank(self, sentences: List[str]) -> np.ndarray:
+        """Return a TextRank score for each sentence."""
+        n = len(sentences)
+        if n == 0:
+            return np.zeros(0)
+
+        # Fold the whole document in one pass; sentences never contain newlines after splitting
+        normalized = "\n".join(sentences).translate(ARABIC_FOLD_TABLE).lower().split("\n")
+
+        # Sparse term counts in coordinate form: one (sentence, term) pair per token
+        vocabulary = {}
+        rows, cols = [], []
+        for i, sentence in enumerate(normalized):
+            for token in TOKEN_PATTERN.findall(sentence):
+                if token not in STOPWORDS:
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(token, len(vocabulary)))
+        if not rows:
+            return np.full(n, 1.0 / n)
+
+        vocab_size = len(vocabulary)
+        pairs, tf = np.unique(np.array(rows, dtype=np.int64) * vocab_size + np.array(cols), return_counts=True)
+        rows, cols = pairs // vocab_size, pairs % vocab_size
+
+        # TF-IDF weights with L2-normalized rows
+        df = np.bincount(cols, minlength=vocab_size)
+        idf = np.log((1 + n) / (1 + df)) + 1
+        data = (1 + np.log(tf)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=n))
+        data /= norms[rows]
+        self_similarity = (norms > 0).astype(float)
+
+        def similarity_product(vector: np.ndarray) -> np.ndarray:
+            # (X @ X.T - I) @ vector, without the self-loops
+            term_weights = np.bincount(cols, weights=data * vector[rows], minlength=vocab_size)
+            return np.bincount(rows, weights=data * term_weights[cols], minlength=n) - self_similarity * vector
+
+        degree = similarity_product(np.ones(n))
+        inverse_degree = np.divide(1.0, degree, out=np.zeros(n), where=degree > 1e-12)
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) / n + self.damping * similarity_product(scores * inverse_degree)
+            updated /= updated.sum()
+            converged = np.abs(updated - scores).sum() < self.tolerance
+            scores = updated
+            if converged:
+                break
+        return scores
+
+    def summarize(self, text: str, sentences_count: int = 5) -> str:
+        """Return the top-ranked sentences in their original order."""
+        sentences = self.split_sentences(text)
+        if not sentences:
+            return ""
+        scores = self.rank(sentences)
+        # Stable sort keeps earlier sentences first among equal scores
+        top = np.sort(np.argsort(-scores, kind='stable')[:sentences_count])
+        return " ".join(sentences[i] for i in top)
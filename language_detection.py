@@ -0,0 +1,139 @@
+"""Language detection from Unicode script ratios.
+
+Arabic, Urdu, Hindi and Chinese are told apart by their scripts alone: every character
+is mapped to a script class with one table lookup over the whole text, and the classes
+are counted per paragraph in a single numpy pass. Arabic presentation forms, as found in
+reshaped display text, count as the letters they stand for. Only Latin-script text that
+does not read as English is handed to langdetect, seeded so the same text always gets
+the same label.
+"""
+import re
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+from langdetect import DetectorFactory, detect
+
+from utils import ARABIC_RANGES
+
+DetectorFactory.seed = 0
+
+# Script classes
+OTHER, LATIN, ARABIC, URDU, DEVANAGARI, HAN = range(6)
+SCRIPT_CLASSES = 6
+
+# Letters used by Urdu but not Arabic or Persian (tteh, ddal, rreh, noon ghunna, yeh barree);
+# they are also counted as Arabic script. Farsi yeh, keheh, heh goal and heh doachashmee are
+# left out: Persian keyboards type them in Arabic text too
+URDU_LETTERS = 'ٹڈڑںےۓ'
+# Share of Arabic-script letters that must be Urdu letters to label the text Urdu
+URDU_MIN_RATIO = 0.03
+# Fewer letters than this and a paragraph gets no label of its own
+MIN_LETTERS = 3
+# Documents longer than this are labelled from evenly spaced windows of the text
+SAMPLE_CHARS = 20000
+SAMPLE_WINDOWS = 10
+
+# Latin-script text with this share of English function words is English without asking langdetect
+ENGLISH_MIN_STOPWORD_RATIO = 0.15
+ENGLISH_STOPWORDS = {
+    'the', 'of', 'and', 'to', 'in', 'a', 'an', 'is', 'are', 'be', 'by', 'for', 'on', 'or', 'with',
+    'as', 'that', 'this', 'which', 'shall', 'may', 'any', 'not', 'from', 'at', 'it', 'its', 'such'
+}
+LATIN_WORD_PATTERN = re.compile(r'[A-Za-z]+')
+LANGDETECT_CODES = {'ar': 'ar', 'en': 'en', 'zh-cn': 'zh', 'zh-tw': 'zh', 'hi': 'hi', 'ur': 'ur'}
+
+
+# Arabic presentation forms, as produced by reshaping for display and by some PDF text layers
+PRESENTATION_FORM_RANGES = [(0xFB50, 0xFDFF), (0xFE70, 0xFEFF)]
+
+
+def _build_script_table() -> np.ndarray:
+    table = np.full(0x10000, OTHER, dtype=np.uint8)
+    table[ord('A'):ord('Z') + 1] = LATIN
+    table[ord('a'):ord('z') + 1] = LATIN
+    table[0x00C0:0x0250] = LATIN
+    for start, end in ARABIC_RANGES:
+        table[start:end + 1] = ARABIC
+    # Arabic-Indic digits, punctuation and diacritics say nothing about the language
+    table[0x0600:0x0621] = OTHER
+    table[0x064B:0x0670] = OTHER
+    table[[ord(char) for char in URDU_LETTERS]] = URDU
+    # A presentation form counts as the letters it stands for: Urdu if one of them is an
+    # Urdu letter, other for the forms of diacritics and for ornaments with no letters at all
+    for start, end in PRESENTATION_FORM_RANGES:
+        for code in range(start, end + 1):
+            letters = unicodedata.normalize('NFKC', chr(code))
+            classes = {table[ord(char)] for char in letters if ord(char) < start} if letters != chr(code) else set()
+            table[code] = URDU if URDU in classes else ARABIC if ARABIC in classes else OTHER
+    table[0x0900:0x0980] = DEVANAGARI
+    table[0x3400:0x4DC0] = HAN
+    table[0x4E00:0xA000] = HAN
+    table[0xF900:0xFB00] = HAN
+    return table
+
+
+SCRIPT_TABLE = _build_script_table()
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _classify(codepoints: np.ndarray) -> np.ndarray:
+    # Characters outside the Basic Multilingual Plane count as other
+    return np.where(codepoints < 0x10000, SCRIPT_TABLE[np.minimum(codepoints, 0xFFFF)], OTHER)
+
+
+def _language_from_counts(counts: np.ndarray, text: str) -> Optional[str]:
+    arabic_script = counts[ARABIC] + counts[URDU]
+    scripts = {'latin': counts[LATIN], 'arabic': arabic_script, 'devanagari': counts[DEVANAGARI], 'han': counts[HAN]}
+    if sum(scripts.values()) < MIN_LETTERS:
+        return None
+    script = max(scripts, key=scripts.get)
+    if script == 'arabic':
+        return 'ur' if counts[URDU] / arabic_script >= URDU_MIN_RATIO else 'ar'
+    if script == 'devanagari':
+        return 'hi'
+    if script == 'han':
+        return 'zh'
+    return _latin_language(text)
+
+
+def _latin_language(text: str) -> str:
+    words = LATIN_WORD_PATTERN.findall(text.lower())
+    if words and sum(word in ENGLISH_STOPWORDS for word in words) / len(words) >= ENGLISH_MIN_STOPWORD_RATIO:
+        return 'en'
+    try:
+        # Latin text in a language without a translation model is treated as English, as before
+        return LANGDETECT_CODES.get(detect(text), 'en')
+    except Exception:
+        return 'en'
+
+
+def sample_text(text: str, sample_chars: int = SAMPLE_CHARS, windows: int = SAMPLE_WINDOWS) -> str:
+    """Return `text`, or evenly spaced windows totalling `sample_chars` characters of it."""
+    if len(text) <= sample_chars:
+        return text
+    width = sample_chars // windows
+    step = (len(text) - width) // (windows - 1)
+    return '\n'.join(text[start:start + width] for start in range(0, step * windows, step))
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Return the language code of the dominant language of `text`, or None if it has too few letters."""
+    sample = sample_text(text)
+    counts = np.bincount(_classify(_codepoints(sample)), minlength=SCRIPT_CLASSES)
+    return _language_from_counts(counts, sample)
+
+
+def detect_paragraph_languages(paragraphs: List[str]) -> List[Optional[str]]:
+    """Return the language code of each paragraph (None if it has too few letters)."""
+    if not paragraphs:
+        return []
+    codepoints = _codepoints(''.join(paragraphs))
+    owners = np.repeat(np.arange(len(paragraphs)), [len(paragraph) for paragraph in paragraphs])
+    # One bincount over (paragraph, script class) pairs counts every paragraph at once
+    counts = np.bincount(owners * SCRIPT_CLASSES + _classify(codepoints),
+                         minlength=len(paragraphs) * SCRIPT_CLASSES).reshape(len(paragraphs), SCRIPT_CLASSES)
+    return [_language_from_counts(row, paragraph) for row, paragraph in zip(counts, paragraphs)]
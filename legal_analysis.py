@@ -0,0 +1,208 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import sqlite_utils
+from crewai import Task, Crew
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from agents import agent_pool, BASE_LLM_CONFIG
+from retrieval import count_tokens
+from config import (
+    ANALYSIS_CHECKPOINT_MAX_ENTRIES, ANALYSIS_CHECKPOINT_PATH, ANALYSIS_CHECKPOINT_TTL_HOURS, ANALYSIS_MAX_CONCURRENCY,
+    ANALYSIS_MAX_RETRIES, ANALYSIS_REDUCE_TOKENS, ANALYSIS_SECTION_TOKENS
+)
+
+
+class MapReduceAnalyzer:
+    """Legal analysis of long documents, section by section, merged by a final call.
+
+    Sections are analyzed by the judge agent in parallel under a concurrency limit.
+    Every finished section is checkpointed in SQLite, so a run that fails part-way
+    resumes with the sections that are still missing. Checkpoints of runs that are
+    never resumed expire after a TTL, and the oldest are evicted beyond
+    `max_checkpoints`. The findings are then merged and de-duplicated, in several
+    rounds if they do not fit one prompt.
+    """
+
+    def __init__(self, checkpoint_path: str = ANALYSIS_CHECKPOINT_PATH,
+                 max_concurrency: int = ANALYSIS_MAX_CONCURRENCY, max_retries: int = ANALYSIS_MAX_RETRIES,
+                 ttl_hours: float = ANALYSIS_CHECKPOINT_TTL_HOURS,
+                 max_checkpoints: int = ANALYSIS_CHECKPOINT_MAX_ENTRIES):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.ttl = ttl_hours * 3600
+        self.max_checkpoints = max_checkpoints
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=ANALYSIS_SECTION_TOKENS,
+            chunk_overlap=ANALYSIS_SECTION_TOKENS // 20,
+            length_function=count_tokens,
+            separators=["\n\n", "\n", ".", " ", ""]
+        )
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite_utils.Database(sqlite3.connect(checkpoint_path, check_same_thread=False))
+        self.db['section_findings'].create({
+            'doc_key': str,
+            'section_index': int,
+            'findings': str,
+            'created': float
+        }, pk=('doc_key', 'section_index'), if_not_exists=True)
+        self.db['section_findings'].create_index(['created'], if_not_exists=True)
+
+    def analyze(self, text: str, summary: str = "", cancelled: Optional[threading.Event] = None) -> str:
+        """Analyze the document section by section and return the merged findings.
+
+        If `cancelled` is set, sections not yet started are skipped and CancelledError is
+        raised; sections finished so far stay checkpointed.
+        """
+        sections = self.text_splitter.split_text(text)
+        doc_key = hashlib.sha256(
+            f"{ANALYSIS_SECTION_TOKENS}:{text}".encode('utf-8')
+        ).hexdigest()
+
+        findings = self._load_checkpoints(doc_key)
+        missing = [i for i in range(len(sections)) if i not in findings]
+        if findings:
+            print(f"Map-reduce analysis: resuming, {len(findings)} of {len(sections)} sections already done")
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='section-analysis') as executor:
+            futures = {
+                executor.submit(self._analyze_section, sections[i], i, len(sections), summary, cancelled): i
+                for i in missing
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    findings[index] = future.result()
+                    self._save_checkpoint(doc_key, index, findings[index])
+                except CancelledError:
+                    pass
+                except Exception as e:
+                    errors.append(f"section {index + 1}: {str(e)}")
+
+        self._check_cancelled(cancelled)
+        if errors:
+            # Finished sections stay checkpointed; the next run only redoes the failed ones
+            raise Exception(f"Map-reduce analysis failed for {len(errors)} sections: {'; '.join(errors)}")
+
+        merged = self._reduce([findings[i] for i in range(len(sections))], summary, cancelled)
+        self._clear_checkpoints(doc_key)
+        return merged
+
+    def _analyze_section(self, section: str, index: int, total: int, summary: str,
+                         cancelled: Optional[threading.Event] = None) -> str:
+        """Map step: analyze one section, retrying with exponential backoff."""
+        self._check_cancelled(cancelled)
+        task_description = f"""
+        أنت تحلل الجزء {index + 1} من {total} من مستند قانوني طويل.
+        ملخص المستند كاملاً:
+        {summary}
+
+        نص هذا الجزء:
+        {section}
+
+        حدد في هذا الجزء فقط:
+        1. المخالفات القانونية المحتملة وفقاً للقوانين الإماراتية
+        2. المواد القانونية ذات الصلة
+        3. التوصيات للتصحيح
+        """
+        return self._run_with_retries(task_description, "نتائج تحليل هذا الجزء من المستند")
+
+    def _reduce(self, findings: List[str], summary: str, cancelled: Optional[threading.Event] = None) -> str:
+        """Reduce step: merge section findings, grouping them if they exceed one prompt."""
+        while True:
+            self._check_cancelled(cancelled)
+            groups, current, current_tokens = [], [], 0
+            for item in findings:
+                tokens = count_tokens(item)
+                # At least two items per group, so every round shrinks the list
+                if len(current) >= 2 and current_tokens + tokens > ANALYSIS_REDUCE_TOKENS:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(item)
+                current_tokens += tokens
+            groups.append(current)
+
+            findings = [self._merge(group, summary) for group in groups]
+            if len(findings) == 1:
+                return findings[0]
+
+    def _merge(self, findings: List[str], summary: str) -> str:
+        joined = "\n\n---\n\n".join(findings)
+        task_description = f"""
+        فيما يلي نتائج تحليل قانوني لأجزاء متتالية من مستند واحد.
+        ملخص المستند:
+        {summary}
+
+        النتائج:
+        {joined}
+
+        ادمج هذه النتائج في تحليل قانوني واحد متماسك وفقاً للقوانين الإماراتية:
+        1. احذف المخالفات والتوصيات المكررة
+        2. رتب المخالفات حسب خطورتها مع المواد القانونية ذات الصلة
+        3. اختم بالتوصيات للتصحيح
+        """
+        return self._run_with_retries(task_description, "تحليل قانوني شامل للمخالفات والتوصيات")
+
+    @staticmethod
+    def _check_cancelled(cancelled: Optional[threading.Event]):
+        if cancelled is not None and cancelled.is_set():
+            raise CancelledError("map-reduce analysis cancelled")
+
+    def _run_with_retries(self, task_description: str, expected_output: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with agent_pool.agent('judge', BASE_LLM_CONFIG) as judge_agent:
+                    task = Task(description=task_description, agent=judge_agent, expected_output=expected_output)
+                    crew = Crew(agents=[judge_agent], tasks=[task])
+                    return str(crew.kickoff())
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                print(f"Warning: Analysis call failed ({str(e)}), retrying in {delay}s")
+                time.sleep(delay)
+
+    def _load_checkpoints(self, doc_key: str) -> Dict[int, str]:
+        with self._lock:
+            return {
+                row['section_index']: row['findings']
+                for row in self.db.query(
+                    "select section_index, findings from section_findings where doc_key = ? and created > ?",
+                    [doc_key, time.time() - self.ttl]
+                )
+            }
+
+    def _save_checkpoint(self, doc_key: str, index: int, findings: str):
+        now = time.time()
+        with self._lock:
+            self.db['section_findings'].upsert({
+                'doc_key': doc_key,
+                'section_index': index,
+                'findings': findings,
+                'created': now
+            }, pk=('doc_key', 'section_index'))
+            self._evict(doc_key, now)
+
+    def _clear_checkpoints(self, doc_key: str):
+        with self._lock:
+            self.db['section_findings'].delete_where("doc_key = ?", [doc_key])
+
+    def _evict(self, doc_key: str, now: float):
+        """Drop expired checkpoints and the oldest beyond the cap, never those of `doc_key`."""
+        self.db.execute("delete from section_findings where created <= ?", [now - self.ttl])
+        self.db.execute(
+            "delete from section_findings where doc_key != ? and rowid in "
+            "(select rowid from section_findings order by created desc limit -1 offset ?)",
+            [doc_key, self.max_checkpoints]
+        )
+        self.db.conn.commit()
@@ -0,0 +1,356 @@
+"""Local full-text index of UAE legislation and case law.
+
+Source files live under LEGAL_CORPUS_DIR, one sub-directory per kind:
+
+    legislation/   laws and regulations, split into articles
+    case_law/      court judgments
+
+JSON files hold a list of records (or {"articles": [...]}) with "text" and optionally
+"title", "article" and "kind". HTML and PDF files are split into articles at their
+"المادة (n)" / "Article n" headings. Run `python legal_corpus.py` to build the index
+up front; it is otherwise refreshed incrementally while searching.
+"""
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+import PyPDF2
+
+from utils import ARABIC_FOLD_TABLE
+from config import LEGAL_CORPUS_DIR, LEGAL_CORPUS_INDEX_PATH, LEGAL_CORPUS_REFRESH_SECONDS, LEGAL_SEARCH_RESULTS
+
+KINDS = ('legislation', 'case_law')
+# Query terms found in more than this share of articles are dropped when others remain
+COMMON_TERM_RATIO = 0.05
+SUPPORTED_EXTENSIONS = ('.json', '.html', '.htm', '.pdf')
+
+# Definite article and attached prepositions, stripped so "المحكمة" and "للمحكمة" match "محكمة"
+ARABIC_PREFIX_PATTERN = re.compile(r'\b(?:[وف]?(?:بال|كال|ال)|[وف]?لل)(?=\w\w)')
+QUERY_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+ARTICLE_HEADING_PATTERN = re.compile(
+    r'^[ \t]*((?:المادة|مادة|Article)\s*[\(\[]?\s*[\d٠-٩]+\s*[\)\]]?)', re.MULTILINE
+)
+TAG_PATTERN = re.compile(r'<(script|style)\b.*?</\1>|<[^>]+>', re.DOTALL | re.IGNORECASE)
+BLOCK_TAG_PATTERN = re.compile(r'<(?:br|/p|/div|/h\d|/li|/tr)\b[^>]*>', re.IGNORECASE)
+
+
+def fold_for_index(text: str) -> str:
+    """Normalize text the same way for indexing and querying.
+
+    SQLite's unicode61 tokenizer splits words at Arabic diacritics and knows nothing
+    of alef/yaa/taa marbuta variants, so the text is folded before it reaches FTS5.
+    """
+    return ARABIC_PREFIX_PATTERN.sub('', text.translate(ARABIC_FOLD_TABLE).lower())
+
+
+class LegalCorpus:
+    """SQLite FTS5 index over article-level legal texts with BM25 ranking.
+
+    The folded text is indexed; the original text is kept alongside for snippets.
+    Files are tracked by modification time and content hash, so a refresh only
+    re-ingests files that are new or changed and drops those that were removed.
+    """
+
+    def __init__(self, corpus_dir: str = LEGAL_CORPUS_DIR, index_path: str = LEGAL_CORPUS_INDEX_PATH,
+                 refresh_seconds: float = LEGAL_CORPUS_REFRESH_SECONDS):
+        self.corpus_dir = corpus_dir
+        self.refresh_seconds = refresh_seconds
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            create table if not exists sources (
+                path text primary key, mtime real, size integer, sha text
+            );
+            create table if not exists articles (
+                id integer primary key, source text, kind text, title text, article text, text text
+            );
+            create index if not exists articles_source on articles(source);
+            create table if not exists term_frequencies (term text primary key, docs integer) without rowid;
+        """)
+        # One index per kind, so a kind-restricted search never intersects with a filter column
+        with self.conn:
+            for kind in KINDS:
+                self.conn.execute(
+                    f"create virtual table if not exists fts_{kind} using fts5("
+                    f"title, body, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                # Titles weigh more than body text
+                self.conn.execute(f"insert into fts_{kind} (fts_{kind}, rank) values ('rank', 'bm25(5.0, 1.0)')")
+        self._article_count = self.conn.execute("select count(*) from articles").fetchone()[0]
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = LEGAL_SEARCH_RESULTS) -> List[Dict]:
+        """Return the best-matching articles, ranked by BM25 with titles weighted up."""
+        if kind and kind not in KINDS:
+            raise ValueError(f"Unknown kind {kind!r}, expected one of {KINDS}")
+        self._maybe_refresh()
+        start = time.perf_counter()
+        terms = self._selective_terms(QUERY_TOKEN_PATTERN.findall(fold_for_index(query)))
+        if not terms:
+            return []
+
+        # All terms first; if nothing matches every term, any of them
+        rows = []
+        for operator in (' AND ', ' OR '):
+            rows = self._ranked("(" + operator.join(f'"{term}"' for term in terms) + ")", kind, limit)
+            if rows or len(terms) == 1:
+                break
+
+        results = [
+            {
+                'title': row['title'],
+                'article': row['article'],
+                'kind': row['kind'],
+                'source': row['source'],
+                'score': -row['rank'],
+                'snippet': self._snippet(row['text'], terms)
+            }
+            for row in rows
+        ]
+        print(f"Legal corpus: {len(results)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return results
+
+    def refresh(self) -> Dict:
+        """Ingest new and changed files and drop removed ones; return what changed."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> Dict:
+        changes = {'added': 0, 'updated': 0, 'removed': 0, 'articles': 0}
+        with self._lock:
+            known = {row['path']: row for row in self.conn.execute("select * from sources")}
+        seen = set()
+
+        for path in self._iter_files():
+            seen.add(path)
+            stat = os.stat(path)
+            previous = known.get(path)
+            if previous and previous['mtime'] == stat.st_mtime and previous['size'] == stat.st_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            sha = hashlib.sha256(data).hexdigest()
+            if previous and previous['sha'] == sha:
+                # Touched but unchanged: just remember the new mtime
+                with self._lock, self.conn:
+                    self.conn.execute("update sources set mtime = ?, size = ? where path = ?",
+                                      [stat.st_mtime, stat.st_size, path])
+                continue
+
+            try:
+                articles = list(self._parse(path, data))
+            except Exception as e:
+                print(f"Warning: Could not ingest {path}: {str(e)}")
+                continue
+            with self._lock, self.conn:
+                self._delete_source(path)
+                document_frequencies = Counter()
+                for article in articles:
+                    cursor = self.conn.execute(
+                        "insert into articles (source, kind, title, article, text) values (?, ?, ?, ?, ?)",
+                        [path, article['kind'], article['title'], article['article'], article['text']]
+                    )
+                    title = fold_for_index(f"{article['title']} {article['article']}")
+                    body = fold_for_index(article['text'])
+                    self.conn.execute(
+                        f"insert into fts_{article['kind']} (rowid, title, body) values (?, ?, ?)",
+                        [cursor.lastrowid, title, body]
+                    )
+                    document_frequencies.update(set(QUERY_TOKEN_PATTERN.findall(f"{title} {body}")))
+                self.conn.executemany(
+                    "insert into term_frequencies values (?, ?) "
+                    "on conflict (term) do update set docs = docs + excluded.docs",
+                    document_frequencies.items()
+                )
+                self.conn.execute("insert or replace into sources values (?, ?, ?, ?)",
+                                  [path, stat.st_mtime, stat.st_size, sha])
+            changes['updated' if previous else 'added'] += 1
+            changes['articles'] += len(articles)
+
+        for path in set(known) - seen:
+            with self._lock, self.conn:
+                self._delete_source(path)
+                self.conn.execute("delete from sources where path = ?", [path])
+            changes['removed'] += 1
+
+        with self._lock:
+            self._article_count = self.conn.execute("select count(*) from articles").fetchone()[0]
+        self._last_refresh = time.time()
+        if changes['added'] or changes['updated'] or changes['removed']:
+            print(f"Legal corpus: {changes['added']} files added, {changes['updated']} updated, "
+                  f"{changes['removed']} removed ({changes['articles']} articles indexed)")
+        return changes
+
+    def stats(self) -> Dict:
+        """Return the number of indexed files and articles."""
+        with self._lock:
+            return {
+                'files': self.conn.execute("select count(*) from sources").fetchone()[0],
+                'articles': self.conn.execute("select count(*) from articles").fetchone()[0]
+            }
+
+    def _ranked(self, match: str, kind: Optional[str], limit: int) -> List[sqlite3.Row]:
+        """Run an FTS5 query, ranking and limiting inside FTS5 so only the top rows are joined."""
+        rows = []
+        with self._lock:
+            for table_kind in ([kind] if kind else KINDS):
+                rows.extend(self.conn.execute(
+                    f"select a.source, a.kind, a.title, a.article, a.text, f.rank "
+                    f"from (select rowid, rank from fts_{table_kind} where fts_{table_kind} match ? "
+                    f"order by rank limit ?) f join articles a on a.id = f.rowid",
+                    [match, limit]
+                ).fetchall())
+        return sorted(rows, key=lambda row: row['rank'])[:limit]
+
+    def _selective_terms(self, terms: List[str]) -> List[str]:
+        """Drop terms absent from the index, which would empty an AND query, and near-stopwords,
+        which barely change BM25 but force it to score most of the index."""
+        if not terms:
+            return terms
+        with self._lock:
+            frequencies = dict(self.conn.execute(
+                f"select term, docs from term_frequencies where term in ({', '.join('?' * len(terms))})", terms
+            ).fetchall())
+        known = [term for term in dict.fromkeys(terms) if term in frequencies]
+        common = max(COMMON_TERM_RATIO * self._article_count, 100)  # Small corpora have no stopwords to spare
+        selective = [term for term in known if frequencies[term] <= common]
+        return selective or [min(known, key=frequencies.get)] if known else []
+
+    def _maybe_refresh(self):
+        if time.time() - self._last_refresh < self.refresh_seconds or self._refresh_lock.locked():
+            return
+        if self._last_refresh == 0.0 and not self.stats()['files']:
+            # Nothing indexed yet: build the index before answering
+            self.refresh()
+        else:
+            # Pick up new gazette files in the background; searches use the current index
+            self._last_refresh = time.time()
+            threading.Thread(target=self.refresh, name='legal-corpus-refresh', daemon=True).start()
+
+    def _iter_files(self) -> Iterator[str]:
+        for root, _, files in os.walk(self.corpus_dir):
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+    def _delete_source(self, path: str):
+        document_frequencies = Counter()
+        for row in self.conn.execute("select title, article, text from articles where source = ?", [path]):
+            document_frequencies.update(set(QUERY_TOKEN_PATTERN.findall(
+                fold_for_index(f"{row['title']} {row['article']} {row['text']}")
+            )))
+        self.conn.executemany(
+            "update term_frequencies set docs = docs - ? where term = ?",
+            [(count, term) for term, count in document_frequencies.items()]
+        )
+        self.conn.executemany(
+            "delete from term_frequencies where term = ? and docs <= 0", [(term,) for term in document_frequencies]
+        )
+        for kind in KINDS:
+            self.conn.execute(
+                f"delete from fts_{kind} where rowid in (select id from articles where source = ?)", [path]
+            )
+        self.conn.execute("delete from articles where source = ?", [path])
+
+    def _parse(self, path: str, data: bytes) -> Iterator[Dict]:
+        """Yield the articles of a source file."""
+        relative = os.path.relpath(path, self.corpus_dir).split(os.sep)
+        default_kind = relative[0] if relative[0] in KINDS else 'legislation'
+        default_title = os.path.splitext(os.path.basename(path))[0]
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == '.json':
+            records = json.loads(data.decode('utf-8'))
+            if isinstance(records, dict):
+                records = records.get('articles', [records])
+            for record in records:
+                if record.get('text'):
+                    yield {
+                        'kind': record['kind'] if record.get('kind') in KINDS else default_kind,
+                        'title': record.get('title', default_title),
+                        'article': str(record.get('article', '')),
+                        'text': record['text']
+                    }
+            return
+
+        if extension == '.pdf':
+            reader = PyPDF2.PdfReader(io.BytesIO(data))
+            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        else:
+            markup = BLOCK_TAG_PATTERN.sub('\n', data.decode('utf-8', errors='replace'))
+            text = html.unescape(TAG_PATTERN.sub(' ', markup))
+
+        first_line = next((line.strip() for line in text.splitlines() if line.strip()), default_title)
+        yield from self._split_articles(text, default_kind, first_line[:200])
+
+    @staticmethod
+    def _split_articles(text: str, kind: str, title: str) -> Iterator[Dict]:
+        """Split a law at its article headings; judgments and unstructured texts stay whole."""
+        parts = ARTICLE_HEADING_PATTERN.split(text)
+        preamble = parts[0].strip()
+        if len(parts) == 1 or kind == 'case_law':
+            if text.strip():
+                yield {'kind': kind, 'title': title, 'article': '', 'text': text.strip()}
+            return
+        if len(preamble) > len(title):
+            yield {'kind': kind, 'title': title, 'article': '', 'text': preamble}
+        for heading, body in zip(parts[1::2], parts[2::2]):
+            if body.strip():
+                yield {'kind': kind, 'title': title, 'article': heading.strip(), 'text': body.strip()}
+
+    @staticmethod
+    def _snippet(text: str, terms: List[str], width: int = 40) -> str:
+        """Return the window of the original text around the first matching word, matches in bold."""
+        words = text.split()
+        matches = [i for i, word in enumerate(words) if any(term in fold_for_index(word) for term in terms)]
+        if not matches:
+            return " ".join(words[:width])
+        start = max(0, matches[0] - width // 4)
+        window = set(matches)
+        snippet = " ".join(f"**{word}**" if i in window else word
+                           for i, word in enumerate(words[start:start + width], start=start))
+        return ("… " if start else "") + snippet + (" …" if start + width < len(words) else "")
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> LegalCorpus:
+    """Return the process-wide corpus, opening the index on first use."""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = LegalCorpus()
+        return _corpus
+
+
+def format_results(results: List[Dict], query: str) -> str:
+    """Render search results as text for the agents."""
+    if not results:
+        return f"No matching texts found in the local UAE legal corpus for: {query}"
+    blocks = []
+    for i, result in enumerate(results, start=1):
+        heading = " - ".join(part for part in (result['title'], result['article']) if part)
+        blocks.append(f"{i}. {heading}\n{result['snippet']}\n(source: {os.path.basename(result['source'])})")
+    return "\n\n".join(blocks)
+
+
+if __name__ == "__main__":
+    corpus = get_corpus()
+    corpus.refresh()
+    print(f"Legal corpus at {LEGAL_CORPUS_INDEX_PATH}: {corpus.stats()}")
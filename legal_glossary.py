@@ -0,0 +1,268 @@
+"""Bilingual Arabic/English legal glossary matched with an Aho-Corasick automaton.
+
+The glossary backs the "Arabic Legal Term Translation" agent tool and protects legal
+terms during machine translation: terms found in the source text are swapped for
+placeholders that Marian copies through, then replaced with the canonical target term.
+
+Extra terms are read from LEGAL_GLOSSARY_PATH, either a TSV file of
+"arabic<TAB>english" lines or a JSON list of {"ar": ..., "en": ...} records.
+"""
+import json
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from utils import is_arabic
+from config import LEGAL_GLOSSARY_PATH
+
+# Canonical translations of common UAE legal terms
+SEED_TERMS = [
+    ("المحكمة الاتحادية العليا", "Federal Supreme Court"),
+    ("محكمة النقض", "Court of Cassation"),
+    ("محكمة التمييز", "Court of Cassation"),
+    ("محكمة الاستئناف", "Court of Appeal"),
+    ("المحكمة الابتدائية", "Court of First Instance"),
+    ("النيابة العامة", "Public Prosecution"),
+    ("كاتب العدل", "Notary Public"),
+    ("الجريدة الرسمية", "Official Gazette"),
+    ("مرسوم بقانون اتحادي", "Federal Decree-Law"),
+    ("قانون اتحادي", "Federal Law"),
+    ("اللائحة التنفيذية", "Executive Regulations"),
+    ("قانون المعاملات المدنية", "Civil Transactions Law"),
+    ("قانون المعاملات التجارية", "Commercial Transactions Law"),
+    ("قانون الإجراءات المدنية", "Civil Procedures Law"),
+    ("قانون الإجراءات الجزائية", "Criminal Procedures Law"),
+    ("قانون الجرائم والعقوبات", "Crimes and Penalties Law"),
+    ("قانون العقوبات", "Penal Code"),
+    ("قانون الشركات التجارية", "Commercial Companies Law"),
+    ("قانون الأحوال الشخصية", "Personal Status Law"),
+    ("قانون تنظيم علاقات العمل", "Labour Relations Law"),
+    ("قانون الإثبات", "Law of Evidence"),
+    ("الطعن بالنقض", "cassation appeal"),
+    ("الدعوى المدنية", "civil action"),
+    ("الدعوى الجزائية", "criminal action"),
+    ("عقد العمل", "employment contract"),
+    ("صاحب العمل", "employer"),
+    ("مكافأة نهاية الخدمة", "end-of-service gratuity"),
+    ("الفصل التعسفي", "arbitrary dismissal"),
+    ("عقد الإيجار", "lease contract"),
+    ("المؤجر", "lessor"),
+    ("المستأجر", "lessee"),
+    ("القوة القاهرة", "force majeure"),
+    ("الشرط الجزائي", "penalty clause"),
+    ("حسن النية", "good faith"),
+    ("مدة التقادم", "limitation period"),
+    ("التحكيم", "arbitration"),
+    ("السجل التجاري", "commercial register"),
+    ("الرخصة التجارية", "trade licence"),
+    ("المنطقة الحرة", "free zone"),
+    ("مركز دبي المالي العالمي", "Dubai International Financial Centre"),
+    ("سوق أبوظبي العالمي", "Abu Dhabi Global Market"),
+    ("وزارة الموارد البشرية والتوطين", "Ministry of Human Resources and Emiratisation"),
+    ("النفقة", "maintenance"),
+    ("الحضانة", "custody"),
+]
+
+# Folds letter variants one-to-one and marks diacritics and tatweel with a character
+# the automaton steps over, so offsets in the folded text are offsets in the original
+SKIP = '\x00'
+MATCH_FOLD_TABLE = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ة': 'ه', 'ـ': SKIP,
+    **{chr(code): SKIP for code in [*range(0x064B, 0x0660), 0x0670, *range(0x06D6, 0x06EE)]}
+})
+# Single-letter Arabic proclitics (and, with, for, so, like) allowed before a term
+PROCLITICS = set('وبلفك')
+PLACEHOLDER_PATTERN = re.compile(r'GLOSS\s*(\d+)', re.IGNORECASE)
+
+
+def fold_for_matching(text: str) -> str:
+    folded = text.translate(MATCH_FOLD_TABLE).lower()
+    if len(folded) != len(text):
+        # A few characters lower-case to two (e.g. "İ"); keep the one-to-one mapping
+        folded = ''.join(char.lower()[0] for char in text.translate(MATCH_FOLD_TABLE))
+    return folded
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every occurrence of every
+    pattern, in time linear in the text length plus the number of matches."""
+
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Pattern ids ending at each state, including those reached through fail links
+        self.outputs: List[List[int]] = [[]]
+        self.lengths = [len(pattern) for pattern in patterns]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.outputs[state].append(index)
+
+        # Breadth-first, so a state's fail target is complete before its children use it
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def iter_matches(self, text: str, skip: str = SKIP):
+        """Yield (start, end, pattern id) for every match; `skip` characters are stepped over."""
+        goto, fail, outputs, lengths = self.goto, self.fail, self.outputs, self.lengths
+        state = 0
+        # Positions of the characters consumed so far, to map a match length back to its start
+        positions = []
+        for position, char in enumerate(text):
+            if char == skip:
+                continue
+            positions.append(position)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in outputs[state]:
+                yield positions[-lengths[index]], position + 1, index
+
+
+class LegalGlossary:
+    """Arabic/English legal terms with one automaton per source language."""
+
+    def __init__(self, terms: List[Tuple[str, str]]):
+        self.terms: Dict[str, List[Tuple[str, str]]] = {'ar': [], 'en': []}
+        self._lookup: Dict[str, Dict[str, int]] = {'ar': {}, 'en': {}}
+        for arabic, english in terms:
+            self._add('ar', arabic, english)
+            self._add('en', english, arabic)
+        self._automata = {
+            lang: AhoCorasick([fold_for_matching(source).replace(SKIP, '') for source, _ in entries])
+            for lang, entries in self.terms.items()
+        }
+
+    def _add(self, lang: str, source: str, target: str):
+        key = fold_for_matching(source).replace(SKIP, '')
+        # The first translation listed for a term is the canonical one
+        if key and key not in self._lookup[lang]:
+            self._lookup[lang][key] = len(self.terms[lang])
+            self.terms[lang].append((source, target))
+
+    def lookup(self, term: str) -> Optional[Tuple[str, str]]:
+        """Return (term, translation) for an exact glossary term in either language."""
+        key = fold_for_matching(term.strip()).replace(SKIP, '')
+        for lang in ('ar', 'en'):
+            if key in self._lookup[lang]:
+                return self.terms[lang][self._lookup[lang][key]]
+        return None
+
+    def find_terms(self, text: str, lang: str) -> List[Tuple[int, int, str, str]]:
+        """Return the leftmost-longest non-overlapping glossary terms in `text` as
+        (start, end, source term, target term), checking word boundaries."""
+        if lang not in self._automata:
+            return []
+        candidates = []
+        for start, end, index in self._automata[lang].iter_matches(fold_for_matching(text)):
+            # Take trailing diacritics along with the term
+            while end < len(text) and text[end].translate(MATCH_FOLD_TABLE) == SKIP:
+                end += 1
+            if self._at_boundary(text, start, end):
+                candidates.append((start, end, index))
+
+        matches, covered_until = [], 0
+        for start, end, index in sorted(candidates, key=lambda match: (match[0], -match[1])):
+            if start >= covered_until:
+                matches.append((start, end, *self.terms[lang][index]))
+                covered_until = end
+        return matches
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int) -> bool:
+        if end < len(text) and text[end].isalnum():
+            return False
+        if start == 0 or not text[start - 1].isalnum():
+            return True
+        # Allow one attached proclitic, as in "وعقد العمل" or "بمحكمة النقض"
+        return text[start - 1] in PROCLITICS and (start == 1 or not text[start - 2].isalnum())
+
+    def protect(self, text: str, src_lang: str, tgt_lang: str) -> Tuple[str, List[str]]:
+        """Replace glossary terms with placeholders; return the text and the target terms."""
+        if {src_lang, tgt_lang} != {'ar', 'en'}:
+            return text, []
+        parts, targets, previous = [], [], 0
+        for start, end, _, target in self.find_terms(text, src_lang):
+            parts.append(text[previous:start])
+            parts.append(f"GLOSS{len(targets)}")
+            targets.append(target)
+            previous = end
+        parts.append(text[previous:])
+        return ''.join(parts), targets
+
+    @staticmethod
+    def placeholders_intact(text: str, count: int) -> bool:
+        """Whether `text` has each of the `count` placeholders exactly once, and no others."""
+        return sorted(int(index) for index in PLACEHOLDER_PATTERN.findall(text)) == list(range(count))
+
+    @staticmethod
+    def restore(text: str, targets: List[str]) -> str:
+        """Put the canonical target terms in place of the placeholders."""
+        if not targets:
+            return text
+
+        def replace(match):
+            index = int(match.group(1))
+            return targets[index] if index < len(targets) else match.group(0)
+        return PLACEHOLDER_PATTERN.sub(replace, text)
+
+    def describe(self, term: str) -> str:
+        """Render a term lookup for the agents: the exact entry, or the glossary terms it contains."""
+        entry = self.lookup(term)
+        if entry:
+            return f"{entry[0]} = {entry[1]}"
+        found = self.find_terms(term, 'ar' if is_arabic(term) else 'en')
+        if not found:
+            return f"No glossary entry found for: {term}"
+        return "\n".join(f"{source} = {target}" for _, _, source, target in found)
+
+
+def load_terms(path: str) -> List[Tuple[str, str]]:
+    """Read extra glossary terms from a TSV or JSON file."""
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            return [(record['ar'], record['en']) for record in json.load(f)]
+        terms = []
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                arabic, english = line.rstrip('\n').split('\t')[:2]
+                terms.append((arabic.strip(), english.strip()))
+        return terms
+
+
+_glossary = None
+_glossary_lock = threading.Lock()
+
+
+def get_glossary() -> LegalGlossary:
+    """Return the process-wide glossary, compiling it on first use."""
+    global _glossary
+    with _glossary_lock:
+        if _glossary is None:
+            terms = list(SEED_TERMS)
+            if LEGAL_GLOSSARY_PATH and os.path.exists(LEGAL_GLOSSARY_PATH):
+                try:
+                    # File entries come first, so they override the built-in translations
+                    terms = load_terms(LEGAL_GLOSSARY_PATH) + terms
+                except Exception as e:
+                    print(f"Warning: Could not load legal glossary {LEGAL_GLOSSARY_PATH}: {str(e)}")
+            _glossary = LegalGlossary(terms)
+        return _glossary
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+from config import MODEL_MEMORY_BUDGET_MB
+
+
+def estimate_model_size(obj) -> int:
+    """Estimate the memory held by a model, pipeline or tuple of them, in bytes."""
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_model_size(item) for item in obj)
+    # Pipelines wrap the actual torch module
+    if hasattr(obj, 'model') and not hasattr(obj, 'state_dict'):
+        return estimate_model_size(obj.model)
+    if not hasattr(obj, 'state_dict'):
+        return 0
+
+    # The state dict also covers int8 packed weights, which are not parameters;
+    # tied weights (e.g. shared embeddings) are counted once
+    size = 0
+    seen = set()
+    for value in obj.state_dict().values():
+        for tensor in (value if isinstance(value, (tuple, list)) else (value,)):
+            if not hasattr(tensor, 'numel') or tensor.data_ptr() in seen:
+                continue
+            seen.add(tensor.data_ptr())
+            size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class ModelRegistry:
+    """Process-wide registry of lazily loaded models shared by every session.
+
+    Models are loaded the first time they are requested and handed out as shared,
+    read-only objects. When the loaded models exceed the memory budget the least
+    recently used ones are dropped; callers still holding a reference keep theirs
+    until they are done with it.
+    """
+
+    def __init__(self, memory_budget_mb: int = MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._loaders: Dict[str, Callable] = {}
+        self._models = OrderedDict()  # name -> (model, size in bytes)
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def register(self, name: str, loader: Callable):
+        """Register how to load a model without loading it."""
+        with self._lock:
+            self._loaders.setdefault(name, loader)
+
+    def get(self, name: str, loader: Optional[Callable] = None):
+        """Return the named model, loading it on first use."""
+        if loader is not None:
+            self.register(name, loader)
+
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name][0]
+            if name not in self._loaders:
+                raise KeyError(f"No loader registered for model: {name}")
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+            loader = self._loaders[name]
+
+        # Only one thread loads a given model; the others wait for it
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    return self._models[name][0]
+
+            start = time.perf_counter()
+            model = loader()
+            size = estimate_model_size(model)
+            print(f"Loaded model {name} ({size / 1024 / 1024:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+            with self._lock:
+                self._models[name] = (model, size)
+                self.loads += 1
+                self._evict(keep=name)
+            return model
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Load the given models (all registered ones by default) ahead of the first request."""
+        with self._lock:
+            names = list(names) if names is not None else list(self._loaders)
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warning: Could not warm up model {name}: {str(e)}")
+
+    def evict(self, name: str):
+        """Drop a loaded model from the registry."""
+        with self._lock:
+            if self._models.pop(name, None) is not None:
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        """Return the loaded models and their estimated sizes."""
+        with self._lock:
+            return {
+                'loaded': {name: size for name, (_, size) in self._models.items()},
+                'total_bytes': sum(size for _, size in self._models.values()),
+                'budget_bytes': self.memory_budget,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+    def _evict(self, keep: str):
+        total = sum(size for _, size in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            total -= self._models.pop(name)[1]
+            self.evictions += 1
+            print(f"Evicted model {name} to stay within the memory budget")
+
+
+# Shared by every session served by this process
+registry = ModelRegistry()
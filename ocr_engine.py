@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import pytesseract
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+
+from config import OCR_DPI, OCR_MAX_IN_FLIGHT, OCR_MAX_WORKERS, OCR_TESSERACT_CONFIG
+
+# PDF bytes shared with every page task of a worker process. Set once by the pool
+# initializer so the document is not pickled again for each page.
+_WORKER_PDF_BYTES = None
+
+
+def _init_worker(pdf_bytes: bytes):
+    """Store the PDF in the worker and keep tesseract single-threaded."""
+    global _WORKER_PDF_BYTES
+    _WORKER_PDF_BYTES = pdf_bytes
+    # Parallelism comes from the pool; tesseract's own OpenMP threads would oversubscribe the CPU
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+
+def _ocr_page(pdf_bytes: bytes, page_number: int, dpi: int, config: str, lang: str) -> str:
+    """Render a single page and run tesseract on it."""
+    images = convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_number, last_page=page_number)
+    try:
+        if not images:
+            return ""
+        return pytesseract.image_to_string(images[0], config=config, lang=lang)
+    finally:
+        for image in images:
+            image.close()
+
+
+def _ocr_worker_page(page_number: int, dpi: int, config: str, lang: str) -> str:
+    """Pool entry point: OCR one page of the PDF stored by `_init_worker`."""
+    return _ocr_page(_WORKER_PDF_BYTES, page_number, dpi, config, lang)
+
+
+class OCREngine:
+    """Render and recognize PDF pages in a bounded window across a process pool.
+
+    Only `max_in_flight` pages are rendered or waiting to be consumed at any time,
+    so memory stays flat regardless of the number of pages in the document.
+    """
+
+    def __init__(self, dpi: int = OCR_DPI, config: str = OCR_TESSERACT_CONFIG,
+                 lang: str = 'ara+eng', max_workers: Optional[int] = OCR_MAX_WORKERS,
+                 max_in_flight: int = OCR_MAX_IN_FLIGHT):
+        self.dpi = dpi
+        self.config = config
+        self.lang = lang
+        self.max_in_flight = max(max_in_flight, 1)
+        # More workers than pages in flight would only sit idle
+        self.max_workers = min(max_workers or os.cpu_count() or 1, self.max_in_flight)
+
+    def page_count(self, pdf_bytes: bytes) -> int:
+        """Return the number of pages in the PDF."""
+        return int(pdfinfo_from_bytes(pdf_bytes)['Pages'])
+
+    def iter_pages(self, pdf_bytes: bytes, page_numbers: Optional[Sequence[int]] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Tuple[int, str]]:
+        """Yield `(page_number, text)` in page order as soon as each page is recognized.
+
+        Page numbers are 1-based. `progress(done, total)` is called after every page.
+        """
+        if page_numbers is None:
+            page_numbers = range(1, self.page_count(pdf_bytes) + 1)
+        page_numbers = list(page_numbers)
+        total = len(page_numbers)
+        if not total:
+            return
+
+        if self.max_workers <= 1 or total == 1:
+            # Not worth starting a pool for a single page or a single worker
+            for done, page_number in enumerate(page_numbers, start=1):
+                text = _ocr_page(pdf_bytes, page_number, self.dpi, self.config, self.lang)
+                if progress:
+                    progress(done, total)
+                yield page_number, text
+            return
+
+        # Spawn keeps workers free of the parent's torch/thread state
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.max_workers, total),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(pdf_bytes,)
+        )
+        pending = {}
+        next_submit = 0
+        try:
+            for done, page_number in enumerate(page_numbers, start=1):
+                # Keep the window full; results are consumed strictly in order
+                while next_submit < total and len(pending) < self.max_in_flight:
+                    submit_page = page_numbers[next_submit]
+                    pending[submit_page] = executor.submit(
+                        _ocr_worker_page, submit_page, self.dpi, self.config, self.lang
+                    )
+                    next_submit += 1
+
+                text = pending.pop(page_number).result()
+                if progress:
+                    progress(done, total)
+                yield page_number, text
+        finally:
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def ocr_pages(self, pdf_bytes: bytes, page_numbers: Optional[Sequence[int]] = None,
+                  progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """OCR the given pages (all pages by default) and return their text in order."""
+        return [text for _, text in self.iter_pages(pdf_bytes, page_numbers, progress)]
@@ -1,111 +1,217 @@
 import PyPDF2
-import pytesseract
-from pdf2image import convert_from_bytes
 import arabic_reshaper
 from bidi.algorithm import get_display
-from transformers import pipeline
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import hashlib
 import io
 import os
-from typing import List, Dict
-from agents import create_judge_agent, create_advocate_agent
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from agents import agent_pool, BASE_LLM_CONFIG
 from crewai import Task, Crew
+from ocr_engine import OCREngine
+from summarizer import DocumentSummarizer
+from extractive_summarizer import ExtractiveSummarizer
+from extraction_cache import ExtractionCache
+from retrieval import ContextRetriever, count_tokens
+from legal_analysis import MapReduceAnalyzer
+from singleflight import SingleFlight
+from text_normalizer import normalize
+from text_layer import page_needs_ocr
+from config import (
+    OCR_MIN_PAGE_CHARS, OCR_MIN_SCRIPT_RATIO, OCR_MAX_MOJIBAKE_RATIO, LEGAL_ANALYSIS_MODE,
+    RETRIEVAL_TOKEN_BUDGETS, STAGE_TIMEOUTS, SUMMARY_MODE, SUMMARY_STREAM_BATCHES,
+    SUMMARY_PREVIEW_EVERY_PAGES, SUMMARY_PREVIEW_PAGES
+)
+
+# Shared by all sessions: colleagues uploading the same file at once get one pipeline run
+document_flights = SingleFlight('process_document')
+
+# Display names of the analysis stages that run concurrently after extraction
+STAGE_LABELS = {
+    'summary': 'دمج ملخصات المستند',
+    'legal_analysis': 'تحليل القضايا القانونية',
+    'legislation_mapping': 'ربط المستند بالتشريعات الإماراتية'
+}
+
+# Questions used to retrieve the passages each agent needs to see
+LEGAL_ANALYSIS_QUESTIONS = [
+    "ما المخالفات القانونية المحتملة في هذا المستند؟",
+    "ما التزامات الأطراف وحقوقهم والشروط الجزائية؟",
+    "ما البنود التي قد تخالف القوانين الإماراتية؟"
+]
+LEGISLATION_MAPPING_QUESTIONS = [
+    "ما القوانين والتشريعات الإماراتية التي يخضع لها المستند؟",
+    "ما المواد القانونية والمراسيم المشار إليها؟",
+    "ما طبيعة العلاقة القانونية وموضوع النزاع أو العقد؟"
+]
+
+# Shown in place of an analysis stage that failed or did not finish in time
+STAGE_FALLBACKS = {
+    'legal_analysis': "تعذر إكمال تحليل المخالفات القانونية.",
+    'legislation_mapping': "تعذر إكمال الخريطة التشريعية."
+}
+
+# Bump whenever _clean_text (or its text_normalizer profile) changes so cached pages are
+# re-extracted. Pages are cached in logical order; reshaping for display happens on the way out
+CLEANING_VERSION = 3
+
+
+def _check_cancelled(cancelled: Optional[threading.Event], stage: str):
+    """Raise CancelledError if the stage has been abandoned, e.g. after its timeout."""
+    if cancelled is not None and cancelled.is_set():
+        raise CancelledError(f"{stage} cancelled")
+
 
 class PDFProcessor:
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,  # Reduced chunk size for better memory management
-            chunk_overlap=50,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
-        # Initialize models with better memory management
-        self.summarizer = pipeline(
-            "summarization",
-            model="facebook/bart-large-cnn",
-            device_map="auto",  # Automatically choose best device
-            torch_dtype=torch.float32,  # Use float32 for better memory efficiency
-            batch_size=1  # Process one chunk at a time
-        )
+        # Models are shared process-wide and loaded on first use
+        self.summarizer = DocumentSummarizer()
+        self.extractive_summarizer = ExtractiveSummarizer()
+        self.ocr_engine = OCREngine()
+        self.extraction_cache = ExtractionCache()
+        self.retriever = ContextRetriever()
+        self.map_reduce_analyzer = MapReduceAnalyzer()
         self.progress_callback = None
-        
-        # Configure torch for memory efficiency
-        if torch.backends.mps.is_available():  # For Mac M1/M2
-            torch.backends.mps.set_per_process_memory_fraction(0.7)  # Use only 70% of available memory
-        elif torch.cuda.is_available():  # For CUDA devices
-            torch.cuda.empty_cache()
-            torch.cuda.set_per_process_memory_fraction(0.7)
+        self.summary_callback = None
         
     def set_progress_callback(self, callback):
         """Set a callback function to report progress."""
         self.progress_callback = callback
         
+    def set_summary_callback(self, callback):
+        """Set a callback function that receives the partial summary as it grows."""
+        self.summary_callback = callback
+
     def update_progress(self, message: str, progress: float):
         """Update progress through callback if available."""
         if self.progress_callback:
             self.progress_callback(message, progress)
 
-    def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
-        """Extract text from PDF, handling both searchable and scanned PDFs with improved accuracy."""
-        text = ""
+    def extract_text_from_pdf(self, pdf_bytes: bytes, display: bool = True) -> str:
+        """Extract text from PDF, handling both searchable and scanned PDFs with improved accuracy.
+
+        With `display` off, Arabic is returned in logical order and without reshaping, as
+        language detection and translation need it.
+        """
+        return "\n\n".join(page_text for page_text in self.iter_pages(pdf_bytes, display) if page_text)
+
+    def iter_pages(self, pdf_bytes: bytes, display: bool = True) -> Iterator[str]:
+        """Yield the cleaned text of each page, in order, as soon as it is extracted.
+
+        Scanned pages are OCR'd in the background while earlier pages are consumed.
+        Pages without any text are yielded as empty strings. With `display` on, Arabic
+        is reshaped and reordered for display.
+        """
+        pages = self._iter_logical_pages(pdf_bytes)
         try:
+            for page_text in pages:
+                yield self._process_arabic_text(page_text) if display and page_text else page_text
+        finally:
+            # Passes an early close on, so the OCR pool stops too
+            pages.close()
+
+    def _iter_logical_pages(self, pdf_bytes: bytes) -> Iterator[str]:
+        ocr_pages = None
+        try:
+            doc_key = self.extraction_cache.make_key(pdf_bytes, self._extraction_settings())
+
+            # Re-uploads of the same document are served straight from the cache
+            cached_pages = self.extraction_cache.get_document(doc_key)
+            if cached_pages is not None:
+                yield from cached_pages
+                return
+
             # Try to extract text directly first using PyPDF2
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
             extracted_text = []
-            
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text.strip():
-                    extracted_text.append(page_text)
-
-            # If direct extraction yielded results, process it
-            if extracted_text:
-                text = "\n\n".join(extracted_text)
-            else:
-                # If no text was extracted, use OCR with improved settings
-                images = convert_from_bytes(pdf_bytes, dpi=300)  # Higher DPI for better quality
-                for image in images:
-                    # Configure tesseract for better Arabic text recognition
-                    custom_config = r'--oem 1 --psm 3 -l ara+eng'
-                    page_text = pytesseract.image_to_string(
-                        image,
-                        config=custom_config,
-                        lang='ara+eng'
-                    )
-                    if page_text.strip():
-                        extracted_text.append(page_text)
-                
-                text = "\n\n".join(extracted_text)
+            ocr_page_numbers = []
 
-            # Clean up the text
-            text = self._clean_text(text)
-            
-            # Handle Arabic text with improved reshaping
-            text = self._process_arabic_text(text)
+            for page_number, page in enumerate(pdf_reader.pages, start=1):
+                # Pages stored by an earlier, interrupted extraction are reused
+                page_text = self.extraction_cache.get_page(doc_key, page_number)
+                if page_text is None:
+                    page_text = page.extract_text() or ""
+                    # Only pages without a usable text layer go to OCR
+                    if self._page_needs_ocr(page_text):
+                        ocr_page_numbers.append(page_number)
+                    else:
+                        page_text = self._clean_page(page_text)
+                        self.extraction_cache.store_page(doc_key, page_number, page_text)
+                extracted_text.append(page_text)
+
+            # OCR the failing pages in parallel with a bounded window
+            ocr_pages = self.ocr_engine.iter_pages(pdf_bytes, ocr_page_numbers)
+            ocr_page_set = set(ocr_page_numbers)
+            total_pages = len(extracted_text)
+
+            for page_number in range(1, total_pages + 1):
+                page_text = extracted_text[page_number - 1]
+                if page_number in ocr_page_set:
+                    _, ocr_text = next(ocr_pages)
+                    # Keep whatever the text layer had if OCR finds nothing either
+                    page_text = self._clean_page(ocr_text if ocr_text.strip() else page_text)
+                    self.extraction_cache.store_page(doc_key, page_number, page_text)
+
+                self.update_progress(
+                    f"استخراج الصفحة {page_number} من {total_pages}...",
+                    0.1 + (page_number / total_pages) * 0.6
+                )
+                yield page_text
+
+            self.extraction_cache.mark_complete(doc_key, total_pages)
 
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
+        finally:
+            # Stops the OCR pool if the consumer abandons the generator early
+            if ocr_pages is not None:
+                ocr_pages.close()
+
+    def iter_chunks(self, pdf_bytes: bytes) -> Iterator[str]:
+        """Yield summarization chunks as soon as the pages they span are extracted."""
+        return self._chunk_pages(self.iter_pages(pdf_bytes))
+
+    def _chunk_pages(self, pages: Iterable[str]) -> Iterator[str]:
+        """Split a stream of pages into chunks without waiting for the whole document."""
+        remainder = ""
+        for page_text in pages:
+            if not page_text:
+                continue
+            remainder = f"{remainder}\n\n{page_text}" if remainder else page_text
+            chunks = self.summarizer.text_splitter.split_text(remainder)
+            # The last chunk may still grow once the next page arrives
+            yield from chunks[:-1]
+            remainder = chunks[-1] if chunks else ""
+        if remainder:
+            yield remainder
 
-        return text
+    def _extraction_settings(self) -> Dict:
+        """Settings that affect extracted text and therefore form part of the cache key."""
+        return {
+            'dpi': self.ocr_engine.dpi,
+            'tesseract_config': self.ocr_engine.config,
+            'tesseract_lang': self.ocr_engine.lang,
+            'cleaning_version': CLEANING_VERSION,
+            'ocr_thresholds': [OCR_MIN_PAGE_CHARS, OCR_MIN_SCRIPT_RATIO, OCR_MAX_MOJIBAKE_RATIO]
+        }
+
+    def _clean_page(self, page_text: str) -> str:
+        """Clean a single page, keeping Arabic in logical order."""
+        if not page_text.strip():
+            return ""
+        return self._clean_text(page_text)
+
+    def _page_needs_ocr(self, page_text: str) -> bool:
+        """Check whether a page's text layer is too poor to use and should be OCR'd."""
+        return page_needs_ocr(page_text)
 
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text."""
-        # Remove control characters
-        text = "".join(char for char in text if char.isprintable() or char in "\n\r\t")
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        
-        # Fix common OCR issues
-        text = re.sub(r'(?&lt;=[a-z])(?=[A-Z])', ' ', text)
-        text = re.sub(r'([.!?])\s*(?=[A-Z])', r'\1\n', text)
-        
-        # Remove empty lines and extra whitespace
-        lines = [line.strip() for line in text.split('\n')]
-        text = '\n'.join(line for line in lines if line)
-        
-        return text.strip()
+        # Control characters, whitespace, paragraph breaks and common OCR issues in one profile
+        return normalize(text, 'pdf')
 
     def _process_arabic_text(self, text: str) -> str:
         """Process Arabic text with improved handling."""
@@ -124,10 +230,7 @@ class PDFProcessor:
             text = get_display(reshaped_text)
             
             # Fix common Arabic text issues
-            text = re.sub(r'([ء-ي])\s+([ء-ي])', r'\1\2', text)  # Remove spaces between Arabic letters
-            text = re.sub(r'[\u200B-\u200F\u202A-\u202E]', '', text)  # Remove Unicode control characters
-            
-            return text
+            return normalize(text, 'arabic_display')
         except Exception as e:
             print(f"Warning: Error in Arabic text processing: {str(e)}")
             return text  # Return original text if processing fails
@@ -136,95 +239,53 @@ class PDFProcessor:
         """Generate a summary of the document with improved memory management."""
         try:
             # Split text into smaller chunks
-            chunks = self.text_splitter.split_text(text)
-            summaries = []
-            
-            # Process chunks in batches to manage memory
-            batch_size = 3  # Process 3 chunks at a time
-            for i in range(0, len(chunks), batch_size):
-                # Clear GPU/MPS memory before processing new batch
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                elif torch.backends.mps.is_available():
-                    # Force garbage collection for MPS
-                    import gc
-                    gc.collect()
-                
-                batch = chunks[i:i + batch_size]
-                for chunk in batch:
-                    try:
-                        # Generate summary with controlled length and parameters
-                        summary = self.summarizer(
-                            chunk,
-                            max_length=130,
-                            min_length=30,
-                            do_sample=False,
-                            num_beams=2,  # Reduced beam search for memory efficiency
-                            early_stopping=True
-                        )
-                        summaries.append(summary[0]['summary_text'])
-                    except Exception as e:
-                        print(f"Warning: Error summarizing chunk: {str(e)}")
-                        # If summarization fails, include a portion of the original text
-                        summaries.append(chunk[:200] + "...")
-                
-                # Update progress
-                self.update_progress(
-                    "جاري تلخيص المستند...",
-                    min(0.3 + (i / len(chunks)) * 0.4, 0.7)
-                )
-            
-            # Combine summaries intelligently
-            final_summary = " ".join(summaries)
-            
-            # Clean up the final summary
-            final_summary = self._clean_text(final_summary)
-            final_summary = self._process_arabic_text(final_summary)
-            
-            return final_summary
+            chunks = self.summarizer.text_splitter.split_text(text)
+            self.update_progress("جاري تلخيص المستند...", 0.3)
+
+            # All chunks are known up front, so they are length-sorted across the whole document
+            summaries = self.summarizer.summarize_batch(chunks)
+
+            self.update_progress("دمج ملخصات المستند...", 0.7)
+            return self._combine_summaries(summaries)
             
         except Exception as e:
             print(f"Error in summarization: {str(e)}")
             # Fallback to a simple extractive summary
             return self._create_extractive_summary(text)
 
+    def summarize_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Summarize chunks as they arrive, yielding one summary per chunk in order."""
+        # Buffer several model batches so length sorting has chunks of different sizes to
+        # group; summarize_batch returns the summaries in arrival order
+        buffer_size = self.summarizer.batch_size * SUMMARY_STREAM_BATCHES
+        buffer = []
+        for chunk in chunks:
+            buffer.append(chunk)
+            if len(buffer) == buffer_size:
+                yield from self.summarizer.summarize_batch(buffer)
+                buffer = []
+        if buffer:
+            yield from self.summarizer.summarize_batch(buffer)
+
+    def _combine_summaries(self, summaries: List[str], cancelled: Optional[threading.Event] = None) -> str:
+        """Reduce chunk summaries into a final summary of bounded length."""
+        # Summarize the summaries until they fit the target length
+        final_summary = self.summarizer.reduce(summaries, cancelled)
+        return self._clean_summary(final_summary)
+
+    def _clean_summary(self, summary: str) -> str:
+        """Clean up summary text for display."""
+        summary = self._clean_text(summary)
+        summary = self._process_arabic_text(summary)
+        return summary
+
     def _create_extractive_summary(self, text: str, sentences_count: int = 5) -> str:
-        """Create a simple extractive summary as a fallback method."""
+        """Create an extractive TextRank summary; used as the fast mode and as a fallback."""
         try:
-            # Split text into sentences
-            sentences = re.split(r'[.!?]\s+', text)
-            
-            # Remove very short sentences and clean
-            sentences = [s.strip() for s in sentences if len(s.strip()) > 30]
-            
-            if not sentences:
+            summary = self.extractive_summarizer.summarize(text, sentences_count)
+            if not summary:
                 return text[:500] + "..."  # Return truncated text if no good sentences
-            
-            # Score sentences based on position and length
-            scored_sentences = []
-            for i, sentence in enumerate(sentences):
-                score = 0
-                # Prefer sentences from the beginning and end of the document
-                if i < len(sentences) * 0.3:  # First 30%
-                    score += 2
-                elif i > len(sentences) * 0.7:  # Last 30%
-                    score += 1
-                
-                # Prefer medium-length sentences
-                if 50 <= len(sentence) <= 200:
-                    score += 1
-                
-                scored_sentences.append((score, sentence))
-            
-            # Sort by score and select top sentences
-            scored_sentences.sort(reverse=True)
-            selected_sentences = [s[1] for s in scored_sentences[:sentences_count]]
-            
-            # Sort sentences by their original order
-            selected_sentences.sort(key=lambda s: sentences.index(s))
-            
-            # Join sentences and clean
-            summary = ". ".join(selected_sentences)
+
             summary = self._clean_text(summary)
             summary = self._process_arabic_text(summary)
             
@@ -234,13 +295,29 @@ class PDFProcessor:
             print(f"Error in extractive summary: {str(e)}")
             return text[:500] + "..."  # Return truncated text as last resort
             
-    def analyze_legal_issues(self, text: str) -> Dict:
-        """Analyze legal issues in the document using the Judge agent."""
-        judge_agent = create_judge_agent()
+    def _document_context(self, text: str, summary: str, stage: str, questions: List[str]) -> str:
+        """Build the document part of a prompt: the summary plus the most relevant passages."""
+        context = self.retriever.select_context(text, questions, RETRIEVAL_TOKEN_BUDGETS[stage], stage)
+        if not summary:
+            return context
+        return f"ملخص المستند:\n{summary}\n\nالمقاطع ذات الصلة من المستند:\n{context}"
+
+    def analyze_legal_issues(self, text: str, summary: str = "", mode: str = LEGAL_ANALYSIS_MODE,
+                             cancelled: Optional[threading.Event] = None) -> Dict:
+        """Analyze legal issues in the document using the Judge agent.
+
+        In "map_reduce" mode, documents over the stage's token budget are analyzed
+        section by section instead of through retrieved passages.
+        """
+        if mode == "map_reduce" and count_tokens(text) > RETRIEVAL_TOKEN_BUDGETS['legal_analysis']:
+            return {"legal_analysis": self.map_reduce_analyzer.analyze(text, summary, cancelled)}
+
+        document_context = self._document_context(text, summary, 'legal_analysis', LEGAL_ANALYSIS_QUESTIONS)
+        _check_cancelled(cancelled, 'legal_analysis')
         
         task_description = f"""
         تحليل المستند التالي وتحديد المخالفات القانونية المحتملة وفقاً للقوانين الإماراتية:
-        {text}
+        {document_context}
 
         يجب أن يتضمن التحليل:
         1. المخالفات القانونية المحتملة
@@ -248,23 +325,28 @@ class PDFProcessor:
         3. التوصيات للتصحيح
         """
 
-        task = Task(
-            description=task_description,
-            agent=judge_agent,
-            expected_output="تحليل قانوني شامل للمخالفات والتوصيات"
-        )
+        with agent_pool.agent('judge', BASE_LLM_CONFIG) as judge_agent:
+            task = Task(
+                description=task_description,
+                agent=judge_agent,
+                expected_output="تحليل قانوني شامل للمخالفات والتوصيات"
+            )
 
-        crew = Crew(agents=[judge_agent], tasks=[task])
-        result = crew.kickoff()
+            crew = Crew(agents=[judge_agent], tasks=[task])
+            result = crew.kickoff()
         return {"legal_analysis": result}
 
-    def map_to_uae_legislation(self, text: str) -> Dict:
+    def map_to_uae_legislation(self, text: str, summary: str = "",
+                               cancelled: Optional[threading.Event] = None) -> Dict:
         """Map document content to relevant UAE laws and regulations."""
-        advocate_agent = create_advocate_agent()
+        document_context = self._document_context(
+            text, summary, 'legislation_mapping', LEGISLATION_MAPPING_QUESTIONS
+        )
+        _check_cancelled(cancelled, 'legislation_mapping')
         
         task_description = f"""
         تحليل المستند التالي وربطه بالقوانين والتشريعات الإماراتية ذات الصلة:
-        {text}
+        {document_context}
 
         يجب أن يتضمن التحليل:
         1. القوانين الإماراتية ذات الصلة
@@ -272,47 +354,169 @@ class PDFProcessor:
         3. التفسير القانوني للعلاقة
         """
 
-        task = Task(
-            description=task_description,
-            agent=advocate_agent,
-            expected_output="خريطة تفصيلية للقوانين والتشريعات ذات الصلة"
-        )
+        with agent_pool.agent('advocate', BASE_LLM_CONFIG) as advocate_agent:
+            task = Task(
+                description=task_description,
+                agent=advocate_agent,
+                expected_output="خريطة تفصيلية للقوانين والتشريعات ذات الصلة"
+            )
 
-        crew = Crew(agents=[advocate_agent], tasks=[task])
-        result = crew.kickoff()
+            crew = Crew(agents=[advocate_agent], tasks=[task])
+            result = crew.kickoff()
         return {"legislation_mapping": result}
 
-    def process_document(self, pdf_bytes: bytes) -> Dict:
-        """Process the document through all steps with progress tracking."""
+    def _run_stages(self, stages: Dict[str, Tuple[Callable[[threading.Event], Any], Any]]) -> Dict:
+        """Run independent stages concurrently with per-stage timeouts.
+
+        `stages` maps each stage name to a (stage, fallback) pair. A stage is called with
+        a threading.Event that is set once it is abandoned, and should check it between
+        batches of work. Progress is reported from the calling thread as stages finish.
+        A stage that raises or exceeds its timeout gets its fallback as its result.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix='document-stage')
+        started = time.monotonic()
+        deadlines = {name: started + STAGE_TIMEOUTS.get(name, 300) for name in stages}
+        cancel_events = {name: threading.Event() for name in stages}
+        pending = {
+            executor.submit(self._run_stage, name, stage, cancel_events[name], fallback): name
+            for name, (stage, fallback) in stages.items()
+        }
+        results = {}
+        try:
+            while pending:
+                self._report_stages(pending.values(), len(results), len(stages))
+                timeout = max(0.0, min(deadlines[name] for name in pending.values()) - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if now >= deadlines[name]:
+                        print(f"Warning: Stage {name} timed out after {STAGE_TIMEOUTS.get(name, 300):.0f}s")
+                        cancel_events[name].set()
+                        future.cancel()
+                        results[pending.pop(future)] = stages[name][1]
+        finally:
+            # Abandoned stages stop at their next check; queued ones are cancelled outright
+            for event in cancel_events.values():
+                event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    @staticmethod
+    def _run_stage(name: str, stage: Callable[[threading.Event], Any], cancelled: threading.Event,
+                   fallback: Any) -> Any:
+        """Run one stage, returning its fallback if it raises or is cancelled."""
+        try:
+            return stage(cancelled)
+        except CancelledError:
+            return fallback
+        except Exception as e:
+            print(f"Warning: Stage {name} failed, using its fallback: {str(e)}")
+            return fallback
+
+    def _report_stages(self, running, completed: int, total: int):
+        """Report which stages are still running and the share of stages completed."""
+        labels = "، ".join(STAGE_LABELS.get(name, name) for name in running)
+        self.update_progress(f"جارٍ التنفيذ بالتوازي: {labels}...", 0.7 + 0.3 * completed / total)
+
+    def process_document(self, pdf_bytes: bytes, summary_mode: str = SUMMARY_MODE) -> Dict:
+        """Process the document through all steps with progress tracking.
+
+        `summary_mode` is "abstractive" (BART) or "extractive" (fast TextRank, no model).
+        If the same document is already being processed with the same mode, this call
+        waits for that run and returns its result instead of starting another.
+        """
+        key = f"{hashlib.sha256(pdf_bytes).hexdigest()}:{summary_mode}"
+        result, shared = document_flights.do(
+            key,
+            lambda: self._process_document(pdf_bytes, summary_mode),
+            on_join=lambda: self.update_progress("المستند نفسه قيد التحليل لطلب آخر، بانتظار النتيجة...", 0.1)
+        )
+        if shared:
+            if self.summary_callback:
+                self.summary_callback(result["summary"])
+            self.update_progress("اكتمل التحليل!", 1.0)
+        return result
+
+    def _process_document(self, pdf_bytes: bytes, summary_mode: str) -> Dict:
         try:
-            # Extract text from PDF
+            # Extract text from PDF and summarize it while later pages are still being extracted
             self.update_progress("استخراج النص من المستند...", 0.1)
-            text = self.extract_text_from_pdf(pdf_bytes)
+            pages = []
+            summaries = []
+            # Each chunk summary is cleaned once as it arrives; the preview only appends to it
+            partial_summaries = []
+            # Number of pages the last extractive preview saw
+            previewed = 0
+
+            def collect_pages():
+                nonlocal previewed
+                for page_text in self.iter_pages(pdf_bytes):
+                    pages.append(page_text)
+                    # Instant extractive preview until the first abstractive summaries arrive. It is
+                    # refreshed every few pages from the latest pages only, so its cost stays linear
+                    if (summary_mode != "extractive" and page_text and not summaries and self.summary_callback
+                            and (not previewed or len(pages) - previewed >= SUMMARY_PREVIEW_EVERY_PAGES)):
+                        previewed = len(pages)
+                        recent = [text for text in pages[-SUMMARY_PREVIEW_PAGES:] if text]
+                        self.summary_callback(self._create_extractive_summary("\n\n".join(recent)))
+                    yield page_text
+
+            if summary_mode == "extractive":
+                for _ in collect_pages():
+                    pass
+            else:
+                for summary in self.summarize_chunks(self._chunk_pages(collect_pages())):
+                    summaries.append(summary)
+                    if self.summary_callback:
+                        # Separate paragraphs, since each summary was reordered for display on its own
+                        partial_summaries.append(self._clean_summary(summary))
+                        self.summary_callback("\n\n".join(partial_summaries))
+
+            text = "\n\n".join(page_text for page_text in pages if page_text)
             
             if not text.strip():
                 raise ValueError("لم يتم العثور على نص قابل للقراءة في المستند")
 
-            # Generate summary
-            self.update_progress("إنشاء ملخص للمستند...", 0.3)
-            summary = self.summarize_document(text)
+            # The agents get the instant extractive overview, so they need not wait for BART
+            overview = self._create_extractive_summary(text)
 
-            # Analyze legal issues
-            self.update_progress("تحليل القضايا القانونية...", 0.5)
-            legal_analysis = self.analyze_legal_issues(text)
+            # The summary and the two LLM stages are independent, so they run concurrently
+            if summary_mode == "extractive":
+                summarize = lambda cancelled: overview
+            else:
+                summarize = lambda cancelled: self._combine_summaries(summaries, cancelled)
 
-            # Map to UAE legislation
-            self.update_progress("ربط المستند بالتشريعات الإماراتية...", 0.7)
-            legislation_mapping = self.map_to_uae_legislation(text)
+            # Held until every stage is done with the index, including stages abandoned on timeout
+            self.retriever.acquire(text)
+            try:
+                # The summary falls back to the extractive overview if BART fails or runs out of time
+                stage_results = self._run_stages({
+                    'summary': (summarize, overview),
+                    'legal_analysis': (
+                        lambda cancelled: self.analyze_legal_issues(text, overview, cancelled=cancelled)["legal_analysis"],
+                        STAGE_FALLBACKS['legal_analysis']
+                    ),
+                    'legislation_mapping': (
+                        lambda cancelled: self.map_to_uae_legislation(text, overview, cancelled)["legislation_mapping"],
+                        STAGE_FALLBACKS['legislation_mapping']
+                    )
+                })
+            finally:
+                self.retriever.release(text)
 
             self.update_progress("اكتمل التحليل!", 1.0)
 
             return {
-                "summary": summary,
-                "legal_analysis": legal_analysis["legal_analysis"],
-                "legislation_mapping": legislation_mapping["legislation_mapping"],
+                "summary": stage_results['summary'] or overview,
+                "legal_analysis": stage_results['legal_analysis'],
+                "legislation_mapping": stage_results['legislation_mapping'],
                 "raw_text": text  # Include raw text for translation if needed
             }
             
         except Exception as e:
             self.update_progress(f"حدث خطأ: {str(e)}", 0)
-            raise
\ No newline at end of file
+            raise
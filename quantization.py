@@ -0,0 +1,54 @@
+"""Dynamic int8 quantization of the CPU models, with artifacts saved to disk.
+
+Quantizing BART or a Marian model takes a while, so the quantized module is saved
+the first time and loaded directly on later startups. Run this module to build the
+artifacts ahead of deployment:
+
+    QUANTIZED_INFERENCE=1 python quantization.py
+"""
+import os
+from typing import Callable
+
+import torch
+
+from config import QUANTIZED_MODEL_DIR
+
+
+def quantize_model(model: torch.nn.Module) -> torch.nn.Module:
+    """Quantize the linear layers of a model to int8 for CPU inference."""
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def artifact_path(model_name: str) -> str:
+    """Path of the saved quantized model; pickled modules are tied to the torch version."""
+    safe_name = model_name.replace('/', '--')
+    return os.path.join(QUANTIZED_MODEL_DIR, f'{safe_name}-int8-torch{torch.__version__}.pt')
+
+
+def load_quantized_model(model_name: str, load_fp32: Callable[[], torch.nn.Module]) -> torch.nn.Module:
+    """Load the saved int8 model, quantizing and saving it first if needed."""
+    path = artifact_path(model_name)
+    if os.path.exists(path):
+        try:
+            return torch.load(path, map_location='cpu', weights_only=False)
+        except Exception as e:
+            print(f"Warning: Could not load quantized model {path}, rebuilding it: {str(e)}")
+
+    model = quantize_model(load_fp32())
+    os.makedirs(QUANTIZED_MODEL_DIR, exist_ok=True)
+    # Write to a temporary file first so a crash never leaves a truncated artifact behind
+    tmp_path = f'{path}.tmp'
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+
+if __name__ == "__main__":
+    from summarizer import _load_summarization_pipeline
+    from translator import DEFAULT_LANGUAGE_PAIRS, _load_marian
+
+    _load_summarization_pipeline(quantized=True)
+    for src, tgt in DEFAULT_LANGUAGE_PAIRS:
+        _load_marian(f'Helsinki-NLP/opus-mt-{src}-{tgt}', quantized=True)
+    print(f"Quantized models saved to {QUANTIZED_MODEL_DIR}")
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import sqlite_utils
+
+from utils import normalize_arabic
+from config import (
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH, RESPONSE_CACHE_SEMANTIC, RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_HOURS, RETRIEVAL_EMBEDDING_MODEL
+)
+
+# Name fragments of embedding models trained on Arabic as well as English
+MULTILINGUAL_EMBEDDING_MARKERS = ('multilingual', 'labse')
+
+
+def is_multilingual_model(model_name: str) -> bool:
+    """Whether an embedding model can compare Arabic queries; Chroma's default (empty name) cannot."""
+    return any(marker in model_name.lower() for marker in MULTILINGUAL_EMBEDDING_MARKERS)
+
+
+def config_fingerprint(llm_config: Dict) -> str:
+    """Hash the model settings that affect answers, leaving out credentials."""
+    settings = [
+        {key: value for key, value in entry.items() if key != 'api_key'}
+        for entry in llm_config.get('config_list', [])
+    ]
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    """Persistent cache of agent answers keyed on role, category, model config and query.
+
+    Queries are compared after Arabic normalization, so spelling variants of the same
+    question (hamza on alef, final yaa, taa marbuta, diacritics, spacing) hit the same
+    entry. Entries expire after a TTL and the least recently used are evicted beyond
+    `max_entries`. With `semantic` enabled, a miss falls back to the most similar
+    cached query of the same role and category by embedding, if it clears the
+    similarity threshold; it is turned off unless the embedding model is multilingual.
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, ttl_hours: float = RESPONSE_CACHE_TTL_HOURS,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, semantic: bool = RESPONSE_CACHE_SEMANTIC,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY, embedding_model: str = RETRIEVAL_EMBEDDING_MODEL):
+        if semantic and not is_multilingual_model(embedding_model):
+            print(f"Warning: Semantic response cache disabled, embedding model "
+                  f"'{embedding_model or 'Chroma default'}' is not multilingual")
+            semantic = False
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity = similarity
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite_utils.Database(sqlite3.connect(path, check_same_thread=False))
+        self.db['responses'].create({
+            'key': str,
+            'scope': str,
+            'query': str,
+            'response': str,
+            'embedding': bytes,
+            'created': float,
+            'last_access': float
+        }, pk='key', if_not_exists=True)
+        self.db['responses'].create_index(['scope'], if_not_exists=True)
+        self.db['responses'].create_index(['last_access'], if_not_exists=True)
+
+    @staticmethod
+    def make_key(role: str, category: str, llm_config: Dict, query: str) -> str:
+        """Cache key of a consultation; also used to coalesce identical in-flight requests.
+
+        `role` is the agent pool role ("judge", "advocate", ...), so an answer is only
+        ever returned to the role that produced it.
+        """
+        scope = ResponseCache._scope(role, category, llm_config)
+        return hashlib.sha256(f"{scope}:{normalize_arabic(query)}".encode('utf-8')).hexdigest()
+
+    def get(self, role: str, category: str, llm_config: Dict, query: str) -> Optional[str]:
+        """Return the cached response for this consultation, or None."""
+        key = self.make_key(role, category, llm_config, query)
+        now = time.time()
+        with self._lock:
+            rows = list(self.db.query(
+                "select response from responses where key = ? and created > ?", [key, now - self.ttl]
+            ))
+            if rows:
+                self._touch(key, now)
+                self.hits += 1
+                return rows[0]['response']
+
+        if self.semantic:
+            response = self._nearest(self._scope(role, category, llm_config), query, now)
+            if response is not None:
+                return response
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, role: str, category: str, llm_config: Dict, query: str, response: str):
+        """Store a response and evict expired and least recently used entries."""
+        normalized = normalize_arabic(query)
+        embedding = self._embed(normalized).tobytes() if self.semantic else None
+        now = time.time()
+        with self._lock:
+            self.db['responses'].upsert({
+                'key': self.make_key(role, category, llm_config, query),
+                'scope': self._scope(role, category, llm_config),
+                'query': normalized,
+                'response': response,
+                'embedding': embedding,
+                'created': now,
+                'last_access': now
+            }, pk='key')
+            self._evict(now)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the number of cached responses."""
+        with self._lock:
+            entries = self.db['responses'].count
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            'entries': entries
+        }
+
+    @staticmethod
+    def _scope(role: str, category: str, llm_config: Dict) -> str:
+        return f"{role}|{category}|{config_fingerprint(llm_config)}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        from model_registry import registry
+        from retrieval import EMBEDDING_MODEL_KEY
+
+        vector = np.asarray(registry.get(EMBEDDING_MODEL_KEY)([text])[0], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _nearest(self, scope: str, query: str, now: float) -> Optional[str]:
+        """Return the response of the most similar cached query in the same scope."""
+        query_vector = self._embed(normalize_arabic(query))
+        with self._lock:
+            rows = list(self.db.query(
+                "select key, response, embedding from responses "
+                "where scope = ? and created > ? and embedding is not null",
+                [scope, now - self.ttl]
+            ))
+            if not rows:
+                return None
+            matrix = np.stack([np.frombuffer(row['embedding'], dtype=np.float32) for row in rows])
+            scores = matrix @ query_vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+            self._touch(rows[best]['key'], now)
+            self.near_hits += 1
+            return rows[best]['response']
+
+    def _touch(self, key: str, now: float):
+        self.db.execute("update responses set last_access = ? where key = ?", [now, key])
+        self.db.conn.commit()
+
+    def _evict(self, now: float):
+        self.db.execute("delete from responses where created <= ?", [now - self.ttl])
+        self.db.execute(
+            "delete from responses where key in "
+            "(select key from responses order by last_access desc limit -1 offset ?)",
+            [self.max_entries]
+        )
+        self.db.conn.commit()
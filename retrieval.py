@@ -0,0 +1,127 @@
+import hashlib
+import threading
+from typing import Dict, List
+
+import chromadb
+from chromadb.utils import embedding_functions
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from model_registry import registry
+from config import RETRIEVAL_EMBEDDING_MODEL, RETRIEVAL_PASSAGE_TOKENS, RETRIEVAL_TOP_K
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+
+EMBEDDING_MODEL_KEY = 'embeddings'
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens, estimating from the length if tiktoken is unavailable."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 3)
+
+
+def _load_embedding_function():
+    """Load the local embedding model used to index document passages."""
+    if RETRIEVAL_EMBEDDING_MODEL:
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=RETRIEVAL_EMBEDDING_MODEL)
+    # Chroma's bundled ONNX all-MiniLM-L6-v2 (English only), downloaded once and run locally
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+registry.register(EMBEDDING_MODEL_KEY, _load_embedding_function)
+
+
+class ContextRetriever:
+    """Select the passages of a document most relevant to an agent's questions.
+
+    Passages are embedded into an in-memory Chroma collection per document, so the
+    judge and advocate stages share one index. Documents that already fit the token
+    budget are passed through whole. The index is reference counted: `acquire` and
+    every query hold a reference, and the collection is dropped only once the last
+    one is released, so a stage that outlives its caller never loses its index.
+    """
+
+    def __init__(self, passage_tokens: int = RETRIEVAL_PASSAGE_TOKENS, top_k: int = RETRIEVAL_TOP_K):
+        self.top_k = top_k
+        self.client = chromadb.Client()
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=passage_tokens,
+            chunk_overlap=passage_tokens // 10,
+            length_function=count_tokens,
+            separators=["\n\n", "\n", ".", " ", ""]
+        )
+        self._references: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def select_context(self, text: str, questions: List[str], token_budget: int, stage: str = "") -> str:
+        """Return the passages most relevant to `questions`, in document order, within the budget."""
+        total_tokens = count_tokens(text)
+        if total_tokens <= token_budget:
+            print(f"Retrieval [{stage}]: document fits the budget ({total_tokens} tokens), sending it whole")
+            return text
+
+        self.acquire(text)
+        try:
+            passages, collection = self._index(text)
+            results = collection.query(query_texts=questions, n_results=min(self.top_k, len(passages)))
+        finally:
+            self.release(text)
+
+        # A passage ranks by its best distance to any of the questions
+        best = {}
+        for ids, distances in zip(results['ids'], results['distances']):
+            for passage_id, distance in zip(ids, distances):
+                index = int(passage_id)
+                best[index] = min(distance, best.get(index, distance))
+
+        selected, used_tokens = [], 0
+        for index in sorted(best, key=best.get):
+            passage_tokens = count_tokens(passages[index])
+            if used_tokens + passage_tokens > token_budget:
+                continue
+            selected.append(index)
+            used_tokens += passage_tokens
+
+        print(f"Retrieval [{stage}]: {used_tokens} of {total_tokens} tokens sent "
+              f"({total_tokens - used_tokens} saved, {len(selected)} passages)")
+        return "\n...\n".join(passages[index] for index in sorted(selected))
+
+    def acquire(self, text: str):
+        """Keep the index of a document alive until the matching `release`."""
+        name = self._collection_name(text)
+        with self._lock:
+            self._references[name] = self._references.get(name, 0) + 1
+
+    def release(self, text: str):
+        """Release a reference to a document's index and drop the index with the last one."""
+        name = self._collection_name(text)
+        with self._lock:
+            references = self._references.get(name, 0) - 1
+            if references > 0:
+                self._references[name] = references
+                return
+            self._references.pop(name, None)
+            try:
+                self.client.delete_collection(name)
+            except Exception:
+                pass  # Never indexed, e.g. the document fit the budget
+
+    def _index(self, text: str):
+        passages = self.text_splitter.split_text(text)
+        collection = self.client.get_or_create_collection(
+            name=self._collection_name(text),
+            embedding_function=registry.get(EMBEDDING_MODEL_KEY)
+        )
+        # The second stage reuses the index built by the first
+        if collection.count() != len(passages):
+            collection.upsert(ids=[str(i) for i in range(len(passages))], documents=passages)
+        return passages, collection
+
+    @staticmethod
+    def _collection_name(text: str) -> str:
+        return f"doc-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]}"
@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Abandoned(Exception):
+    """Set on a call whose leader was interrupted, so its followers run the call themselves."""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one computation.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for it and receive the same result, or the same exception. Once the
+    call finishes the key is forgotten, so later calls compute afresh (caching is
+    left to the layers behind it). Only ordinary exceptions are shared: if the leader
+    is interrupted (a Streamlit rerun or stop, KeyboardInterrupt), that is re-raised
+    in the leader alone and the waiting callers retry the call themselves.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.executions = 0
+        self.coalesced = 0
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], on_join: Optional[Callable[[], None]] = None) -> Tuple[Any, bool]:
+        """Return `fn()`'s result and whether it was shared from another caller's call.
+
+        `on_join` is called before waiting when the call joins one already in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = Future()
+                self.executions += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            print(f"Singleflight [{self.name}]: joined an identical request in flight")
+            if on_join:
+                on_join()
+            try:
+                return call.result(), True
+            except _Abandoned:
+                return self.do(key, fn)
+
+        try:
+            call.set_result(fn())
+        except Exception as e:
+            call.set_exception(e)
+        except BaseException:
+            call.set_exception(_Abandoned())
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return call.result(), False
+
+    def stats(self) -> Dict:
+        """Return how many computations ran and how many requests were coalesced into them."""
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+# Crew agents reason in ReAct steps; only the text after this marker is the answer
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+_current = threading.local()
+
+
+class StreamingTokenHandler(BaseCallbackHandler):
+    """Forward the final-answer tokens of an LLM call to the stream of the calling thread.
+
+    One handler is attached to the shared chat client. Each streamed request runs its
+    crew in its own thread and registers a queue there, so concurrent requests never
+    see each other's tokens; calls made outside a stream are ignored.
+    """
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        if getattr(_current, 'stream', None) is not None:
+            _current.buffer = ""
+            _current.answer_started = False
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        stream = getattr(_current, 'stream', None)
+        if stream is None:
+            return
+        if _current.answer_started:
+            stream.put(token)
+            return
+        # Thoughts and tool calls come first; start forwarding at the final answer
+        _current.buffer += token
+        position = _current.buffer.find(FINAL_ANSWER_MARKER)
+        if position != -1:
+            _current.answer_started = True
+            answer = _current.buffer[position + len(FINAL_ANSWER_MARKER):].lstrip()
+            if answer:
+                stream.put(answer)
+
+
+class ResponseStream:
+    """Iterate over the tokens of an answer while `produce` runs in a background thread.
+
+    `produce` returns the complete answer; if the model did not stream it (a cached or
+    non-ReAct answer), the whole answer is yielded at once when it returns. The time to
+    the first token and the full text are available on the stream after iteration.
+    """
+
+    _DONE = object()
+
+    def __init__(self, produce: Callable[[], str], label: str = ""):
+        self.produce = produce
+        self.label = label
+        self.text = ""
+        self.time_to_first_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+
+    def __iter__(self) -> Iterator[str]:
+        tokens = queue.Queue()
+        outcome = {}
+        start = time.perf_counter()
+
+        def run():
+            _current.stream = tokens
+            _current.buffer = ""
+            _current.answer_started = False
+            try:
+                outcome['result'] = self.produce()
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                _current.stream = None
+                tokens.put(self._DONE)
+
+        threading.Thread(target=run, name=f"stream-{self.label}", daemon=True).start()
+
+        while True:
+            token = tokens.get()
+            if token is self._DONE:
+                break
+            yield from self._emit(token, start)
+
+        if 'error' in outcome:
+            raise outcome['error']
+        if not self.text:
+            yield from self._emit(outcome['result'], start)
+        else:
+            # The crew's return value is authoritative; keep it for the cache and history
+            self.text = outcome['result']
+        self.total_time = time.perf_counter() - start
+        print(f"Streaming [{self.label}]: first token after {self.time_to_first_token:.2f}s, "
+              f"complete after {self.total_time:.2f}s")
+
+    def _emit(self, token: str, start: float) -> Iterator[str]:
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - start
+        self.text += token
+        yield token
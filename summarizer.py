@@ -0,0 +1,159 @@
+import threading
+from concurrent.futures import CancelledError
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import List, Optional
+
+from model_registry import registry
+from quantization import load_quantized_model
+from config import (
+    QUANTIZED_INFERENCE, SUMMARY_BATCH_SIZE, SUMMARY_CHUNK_OVERLAP_TOKENS, SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_REDUCE_ROUNDS,
+    SUMMARY_MODEL, SUMMARY_TARGET_TOKENS
+)
+
+SUMMARIZER_MODEL_KEY = 'summarizer'
+
+
+def _load_summarization_pipeline(quantized: bool = QUANTIZED_INFERENCE):
+    """Load the summarization pipeline and configure torch memory limits."""
+    if quantized:
+        # Dynamic int8 quantization only runs on CPU
+        model = load_quantized_model(
+            SUMMARY_MODEL,
+            lambda: AutoModelForSeq2SeqLM.from_pretrained(SUMMARY_MODEL, torch_dtype=torch.float32)
+        )
+        return pipeline(
+            "summarization",
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(SUMMARY_MODEL),
+            device=-1
+        )
+
+    # Initialize models with better memory management
+    summarizer = pipeline(
+        "summarization",
+        model=SUMMARY_MODEL,
+        device_map="auto",  # Automatically choose best device
+        torch_dtype=torch.float32  # Use float32 for better memory efficiency
+    )
+
+    # Configure torch for memory efficiency
+    if torch.backends.mps.is_available():  # For Mac M1/M2
+        torch.backends.mps.set_per_process_memory_fraction(0.7)  # Use only 70% of available memory
+    elif torch.cuda.is_available():  # For CUDA devices
+        torch.cuda.empty_cache()
+        torch.cuda.set_per_process_memory_fraction(0.7)
+
+    return summarizer
+
+
+registry.register(SUMMARIZER_MODEL_KEY, _load_summarization_pipeline)
+
+
+class DocumentSummarizer:
+    """Abstractive summarizer that runs chunks through the model in real batches.
+
+    Chunks are sorted by token length and grouped so each batch is padded only to
+    the length of its longest member; summaries are returned in the input order.
+    Long documents are summarized map-reduce style: chunks packed close to the
+    model's token window are summarized, then the partial summaries are summarized
+    again until the result fits `target_tokens`.
+    """
+
+    def __init__(self, batch_size: int = SUMMARY_BATCH_SIZE,
+                 target_tokens: int = SUMMARY_TARGET_TOKENS):
+        self.batch_size = batch_size
+        self.target_tokens = target_tokens
+        self._text_splitter = None
+
+    @property
+    def pipeline(self):
+        # Shared across sessions and loaded on first use
+        return registry.get(SUMMARIZER_MODEL_KEY)
+
+    @property
+    def tokenizer(self):
+        return self.pipeline.tokenizer
+
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            # Measure chunks in model tokens rather than characters
+            self._text_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                self.tokenizer,
+                chunk_size=SUMMARY_CHUNK_TOKENS,
+                chunk_overlap=SUMMARY_CHUNK_OVERLAP_TOKENS,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        return self._text_splitter
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """Return the number of model tokens in each text, tokenized in one call."""
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.tokenizer.model_max_length
+        )
+        return [len(ids) for ids in encoded['input_ids']]
+
+    def reduce(self, summaries: List[str], cancelled: Optional[threading.Event] = None) -> str:
+        """Recursively summarize partial summaries until the result fits the target length."""
+        text = " ".join(summaries)
+        for _ in range(SUMMARY_MAX_REDUCE_ROUNDS):
+            if len(self.tokenizer.encode(text)) <= self.target_tokens:
+                break
+            text = " ".join(self.summarize_batch(self.text_splitter.split_text(text), cancelled=cancelled))
+        return text
+
+    def summarize_batch(self, chunks: List[str], batch_size: Optional[int] = None,
+                        cancelled: Optional[threading.Event] = None) -> List[str]:
+        """Summarize chunks in length-sorted batches and return summaries in input order.
+
+        If `cancelled` is set, raises CancelledError before the next batch is generated.
+        """
+        if not chunks:
+            return []
+        batch_size = batch_size or self.batch_size
+        lengths = self.count_tokens(chunks)
+        order = sorted(range(len(chunks)), key=lambda i: lengths[i])
+
+        summaries = [None] * len(chunks)
+        for start in range(0, len(order), batch_size):
+            if cancelled is not None and cancelled.is_set():
+                raise CancelledError("summarization cancelled")
+            bucket = order[start:start + batch_size]
+            texts = [chunks[i] for i in bucket]
+            try:
+                results = self._generate(texts)
+            except Exception as e:
+                print(f"Warning: Error summarizing batch, retrying chunk by chunk: {str(e)}")
+                results = [self._summarize_single(text) for text in texts]
+
+            for i, summary in zip(bucket, results):
+                summaries[i] = summary
+
+        return summaries
+
+    def _generate(self, texts: List[str]) -> List[str]:
+        # Generate summaries with controlled length and parameters
+        results = self.pipeline(
+            texts,
+            batch_size=len(texts),
+            max_length=130,
+            min_length=30,
+            do_sample=False,
+            num_beams=2,  # Reduced beam search for memory efficiency
+            early_stopping=True,
+            truncation=True
+        )
+        return [(result[0] if isinstance(result, list) else result)['summary_text'] for result in results]
+
+    def _summarize_single(self, text: str) -> str:
+        try:
+            return self._generate([text])[0]
+        except Exception as e:
+            print(f"Warning: Error summarizing chunk: {str(e)}")
+            # If summarization fails, include a portion of the original text
+            return text[:200] + "..."
@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+
+from agent_pool import AgentPool
+
+LLM_CONFIG = {"config_list": [{"model": "gpt-4-1106-preview", "api_key": "secret", "temperature": 0.3}]}
+
+
+class FakeAgent:
+    def __init__(self, llm_config):
+        self.llm_config = llm_config
+        self.in_use = False
+
+
+@pytest.fixture
+def pool():
+    pool = AgentPool()
+    pool.register('judge', FakeAgent)
+    return pool
+
+
+def test_checkout_is_exclusive_under_concurrency(pool):
+    threads, rounds = 8, 50
+    start = threading.Barrier(threads)
+    overlaps = []
+
+    def work():
+        start.wait(5)
+        for _ in range(rounds):
+            with pool.agent('judge', LLM_CONFIG) as agent:
+                if agent.in_use:
+                    overlaps.append(agent)
+                agent.in_use = True
+                # Give another thread the chance to get the same agent, if the pool allowed it
+                threading.Event().wait(0.0005)
+                agent.in_use = False
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join(30)
+
+    stats = pool.stats()
+    assert overlaps == []
+    # Never more agents than concurrent users, and every checkout is accounted for
+    assert 1 <= stats['builds'] <= threads
+    assert stats['builds'] + stats['reuses'] == threads * rounds
+    assert stats['idle'] == stats['builds']
+
+
+def test_agent_returns_to_the_pool_when_the_block_raises(pool):
+    with pytest.raises(RuntimeError):
+        with pool.agent('judge', LLM_CONFIG) as agent:
+            raise RuntimeError("LLM call failed")
+    assert pool.stats()['idle'] == 1
+    with pool.agent('judge', LLM_CONFIG) as again:
+        assert again is agent
+    assert pool.stats()['builds'] == 1
+    assert pool.stats()['reuses'] == 1
+
+
+def test_agents_are_not_shared_across_configs(pool):
+    other_config = {"config_list": [dict(LLM_CONFIG["config_list"][0], temperature=0.9)]}
+    with pool.agent('judge', LLM_CONFIG) as agent:
+        pass
+    with pool.agent('judge', other_config) as other:
+        assert other is not agent
+        assert other.llm_config is other_config
@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import extraction_cache
+from extraction_cache import ExtractionCache
+
+PAGE = "x" * 1000
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # A strictly increasing clock keeps the recency order deterministic
+    clock = itertools.count(1)
+    monkeypatch.setattr(extraction_cache.time, 'time', lambda: float(next(clock)))
+    cache = ExtractionCache(path=str(tmp_path / "extraction.db"))
+    cache.max_bytes = 2500
+    return cache
+
+
+def store_document(cache, doc_key, pages=1):
+    for page_number in range(1, pages + 1):
+        cache.store_page(doc_key, page_number, PAGE)
+    cache.mark_complete(doc_key, pages)
+
+
+def test_make_key_depends_on_content_and_settings():
+    key = ExtractionCache.make_key(b"pdf", {'dpi': 300})
+    assert key == ExtractionCache.make_key(b"pdf", {'dpi': 300})
+    assert key != ExtractionCache.make_key(b"other pdf", {'dpi': 300})
+    assert key != ExtractionCache.make_key(b"pdf", {'dpi': 200})
+
+
+def test_complete_document_is_served_in_page_order(cache):
+    cache.store_page("doc", 2, "second")
+    cache.store_page("doc", 1, "first")
+    assert cache.get_document("doc") is None
+    cache.mark_complete("doc", 2)
+    assert cache.get_document("doc") == ["first", "second"]
+    assert cache.get_page("doc", 2) == "second"
+
+
+def test_least_recently_used_document_is_evicted(cache):
+    store_document(cache, "a")
+    store_document(cache, "b")
+    # Reading "a" makes "b" the least recently used
+    assert cache.get_document("a") == [PAGE]
+    store_document(cache, "c")
+
+    assert cache.get_document("b") is None
+    assert cache.get_document("a") == [PAGE]
+    assert cache.get_document("c") == [PAGE]
+    assert cache.stats()['size_bytes'] <= cache.max_bytes
+
+
+def test_document_being_stored_is_never_evicted(cache):
+    store_document(cache, "big", pages=3)
+    assert cache.get_document("big") == [PAGE] * 3
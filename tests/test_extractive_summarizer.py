@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from extractive_summarizer import ExtractiveSummarizer
+
+# The third sentence shares its terms with most of the others, the last with none
+SENTENCES = [
+    "The tenant shall pay the monthly rent before the fifth day.",
+    "Late rent payments incur a penalty agreed by the landlord.",
+    "The landlord may terminate the lease when the tenant fails to pay rent.",
+    "Termination of the lease requires written notice from the landlord.",
+    "Weather conditions near the coast vary considerably during summer.",
+]
+TEXT = " ".join(SENTENCES)
+
+
+@pytest.fixture
+def summarizer():
+    return ExtractiveSummarizer()
+
+
+def test_central_sentence_ranks_first_and_unrelated_last(summarizer):
+    scores = summarizer.rank(SENTENCES)
+    assert scores.sum() == pytest.approx(1.0)
+    assert int(np.argmax(scores)) == 2
+    assert int(np.argmin(scores)) == 4
+
+
+def test_ranking_is_deterministic(summarizer):
+    assert np.array_equal(summarizer.rank(SENTENCES), summarizer.rank(SENTENCES))
+    assert summarizer.summarize(TEXT, 3) == summarizer.summarize(TEXT, 3)
+
+
+def test_selected_sentences_keep_their_original_order(summarizer):
+    scores = summarizer.rank(SENTENCES)
+    top = sorted(np.argsort(-scores)[:2])
+    assert summarizer.summarize(TEXT, 2) == " ".join(SENTENCES[i] for i in top)
+    # The best sentence is not the first one, yet it does not come first in the summary
+    assert not summarizer.summarize(TEXT, 2).startswith(SENTENCES[2])
+
+
+def test_arabic_sentences_are_split_and_folded(summarizer):
+    text = ("يلتزم المستأجر بدفع الأجرة الشهرية في موعدها المحدد؟ "
+            "يجوز للمؤجر فسخ العقد إذا تأخر المستأجر في دفع الاجرة. "
+            "تختلف درجات الحرارة على الساحل خلال فصل الصيف.")
+    assert summarizer.summarize(text, 1) == "يجوز للمؤجر فسخ العقد إذا تأخر المستأجر في دفع الاجرة."
+
+
+def test_single_sentence_is_returned_whole(summarizer):
+    assert summarizer.rank(SENTENCES[:1]).tolist() == [1.0]
+    assert summarizer.summarize(SENTENCES[0]) == SENTENCES[0]
+
+
+def test_empty_and_fragment_only_text_give_no_summary(summarizer):
+    assert summarizer.rank([]).size == 0
+    assert summarizer.summarize("") == ""
+    assert summarizer.summarize("Article 1.\nSee above.") == ""
+
+
+def test_ties_keep_the_earlier_sentences(summarizer):
+    # Sentences made only of function words all score the same
+    sentences = [
+        "This is as it was, and that is as it has to be for it.",
+        "That is as it was, and this is as it has to be for it.",
+        "It is as it was, and this is as it has to be for that.",
+        "It was as it is, and that was as it has to be for this.",
+    ]
+    assert summarizer.summarize(" ".join(sentences), 2) == " ".join(sentences[:2])
@@ -0,0 +1,81 @@
+import unicodedata
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+pytest.importorskip("langdetect")
+
+from language_detection import detect_language, detect_paragraph_languages, sample_text
+
+ARABIC = "يلتزم صاحب العمل بدفع أجر العامل في المواعيد المتفق عليها في عقد العمل."
+URDU = "آجر معاہدے میں طے شدہ تاریخوں پر ملازم کی اجرت ادا کرے گا۔"
+HINDI = "नियोक्ता अनुबंध में तय तारीखों पर कर्मचारी को मजदूरी का भुगतान करेगा।"
+CHINESE = "雇主应当在合同约定的日期向雇员支付工资。"
+ENGLISH = "The employer shall pay the wages of the employee on the dates agreed in the contract."
+
+
+def presentation_form(char, position):
+    for form in (position, "ISOLATED"):
+        try:
+            return unicodedata.lookup(f"{unicodedata.name(char)} {form} FORM")
+        except (KeyError, ValueError):
+            continue
+    return char
+
+
+def reshape_for_display(text):
+    """Approximate arabic_reshaper + get_display: contextual presentation forms, in visual order."""
+    words = []
+    for word in text.split(' '):
+        last = len(word) - 1
+        words.append(''.join(
+            presentation_form(char, "ISOLATED" if last == 0 else
+                              "INITIAL" if index == 0 else "FINAL" if index == last else "MEDIAL")
+            for index, char in enumerate(word)
+        ))
+    return ' '.join(words)[::-1]
+
+
+@pytest.mark.parametrize("text, language", [
+    (ARABIC, 'ar'),
+    (URDU, 'ur'),
+    (HINDI, 'hi'),
+    (CHINESE, 'zh'),
+    (ENGLISH, 'en'),
+])
+def test_detects_language_from_script(text, language):
+    assert detect_language(text) == language
+
+
+@pytest.mark.parametrize("text, language", [(ARABIC, 'ar'), (URDU, 'ur')])
+def test_reshaped_display_text_is_detected(text, language):
+    reshaped = reshape_for_display(text)
+    # Letters only in presentation forms, which the detector has to map back to their script
+    assert not any(char.isalpha() and '\u0600' <= char <= '\u06ff' for char in reshaped)
+    assert detect_language(reshaped) == language
+
+
+def test_arabic_typed_with_farsi_yeh_and_keheh_is_arabic():
+    # Persian keyboards produce U+06CC for yeh and U+06A9 for kaf
+    text = (ARABIC + " ويجب كتابة العقد باللغة العربية.").replace("ي", "\u06cc").replace("ك", "\u06a9")
+    assert "\u06cc" in text and "\u06a9" in text
+    assert detect_language(text) == 'ar'
+
+
+def test_too_few_letters_gives_no_language():
+    assert detect_language("12. (3) - 4") is None
+
+
+def test_each_paragraph_gets_its_own_language():
+    paragraphs = [ARABIC, ENGLISH, "5.", URDU, reshape_for_display(ARABIC)]
+    assert detect_paragraph_languages(paragraphs) == ['ar', 'en', None, 'ur', 'ar']
+    assert detect_paragraph_languages([]) == []
+
+
+def test_long_text_is_sampled_across_the_document():
+    text = "a" * 15000 + "b" * 15000
+    sample = sample_text(text, sample_chars=1000, windows=10)
+    assert len(sample.replace('\n', '')) == 1000
+    assert 'a' in sample and 'b' in sample
+    assert sample_text(ENGLISH) == ENGLISH
@@ -0,0 +1,126 @@
+import os
+import re
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("crewai")
+pytest.importorskip("langchain")
+
+# agents refuses to import without a key; the agent is never called here
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import legal_analysis
+from legal_analysis import MapReduceAnalyzer
+
+SECTIONS = [f"section-{i} نص البند" for i in range(5)]
+DOCUMENT = "\n\n".join(SECTIONS)
+
+
+class ParagraphSplitter:
+    def split_text(self, text):
+        return text.split("\n\n")
+
+
+class FakeJudge:
+    """Stands in for `_run_with_retries`: answers map steps by section and records every call."""
+
+    def __init__(self, cancel_after=None):
+        self.sections = []
+        self.merges = 0
+        self.cancel_after = cancel_after
+        self.cancelled = threading.Event()
+
+    def __call__(self, task_description, expected_output):
+        match = re.search(r'section-(\d+)', task_description)
+        if match:
+            self.sections.append(int(match.group(1)))
+            if self.cancel_after is not None and len(self.sections) >= self.cancel_after:
+                # Interrupted while this step runs: it finishes, later ones are skipped
+                self.cancelled.set()
+            return f"findings {match.group(1)}"
+        self.merges += 1
+        return "merged: " + ", ".join(re.findall(r'findings \d+', task_description))
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    analyzer = MapReduceAnalyzer(checkpoint_path=str(tmp_path / "checkpoints.db"), max_concurrency=1,
+                                 max_retries=0, ttl_hours=1, max_checkpoints=3)
+    analyzer.text_splitter = ParagraphSplitter()
+    return analyzer
+
+
+def checkpoint_rows(analyzer):
+    return [(row['doc_key'], row['section_index'])
+            for row in analyzer.db.query("select doc_key, section_index from section_findings order by created")]
+
+
+def test_rerun_resumes_from_checkpoints(analyzer):
+    judge = FakeJudge(cancel_after=2)
+    analyzer._run_with_retries = judge
+    with pytest.raises(CancelledError):
+        analyzer.analyze(DOCUMENT, cancelled=judge.cancelled)
+    assert judge.sections == [0, 1]
+    assert judge.merges == 0
+    assert len(checkpoint_rows(analyzer)) == 2
+
+    rerun = FakeJudge()
+    analyzer._run_with_retries = rerun
+    merged = analyzer.analyze(DOCUMENT)
+    # Only the sections missing from the checkpoints go to the agent again
+    assert sorted(rerun.sections) == [2, 3, 4]
+    assert merged == "merged: " + ", ".join(f"findings {i}" for i in range(5))
+    # A finished run leaves no checkpoints behind
+    assert checkpoint_rows(analyzer) == []
+
+
+def test_failed_section_is_the_only_one_redone(analyzer):
+    calls = []
+
+    def flaky(task_description, expected_output):
+        section = re.search(r'section-(\d+)', task_description)
+        if section:
+            calls.append(int(section.group(1)))
+            if section.group(1) == "3" and calls.count(3) == 1:
+                raise RuntimeError("rate limited")
+            return f"findings {section.group(1)}"
+        return "merged"
+
+    analyzer._run_with_retries = flaky
+    with pytest.raises(Exception, match="section 4"):
+        analyzer.analyze(DOCUMENT)
+    assert analyzer.analyze(DOCUMENT) == "merged"
+    assert calls == [0, 1, 2, 3, 4, 3]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(legal_analysis.time, 'time', lambda: now[0])
+    return now
+
+
+def test_expired_checkpoints_are_not_resumed_and_are_evicted(analyzer, clock):
+    analyzer._save_checkpoint("old", 0, "findings")
+    clock[0] += 3600
+    assert analyzer._load_checkpoints("old") == {}
+    analyzer._save_checkpoint("new", 0, "findings")
+    assert checkpoint_rows(analyzer) == [("new", 0)]
+
+
+def test_oldest_checkpoints_of_other_documents_are_evicted_beyond_the_cap(analyzer, clock):
+    for index in range(3):
+        clock[0] += 1
+        analyzer._save_checkpoint("first", index, "findings")
+    clock[0] += 1
+    analyzer._save_checkpoint("second", 0, "findings")
+    assert checkpoint_rows(analyzer) == [("first", 1), ("first", 2), ("second", 0)]
+
+    # The document being analyzed keeps all its sections, even beyond the cap
+    for index in range(1, 4):
+        clock[0] += 1
+        analyzer._save_checkpoint("second", index, "findings")
+    assert checkpoint_rows(analyzer) == [("second", index) for index in range(4)]
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("PyPDF2")
+
+from legal_corpus import LegalCorpus
+
+LABOUR_LAW = [
+    {"title": "قانون العمل", "article": 45, "text": "يجوز لصاحب العمل فسخ عقد العمل دون إنذار إذا ارتكب العامل خطأ جسيما."},
+    {"title": "قانون العمل", "article": 46, "text": "يستحق العامل مكافأة نهاية الخدمة عن كل سنة من سنوات العمل."},
+    {"title": "فسخ العقود", "article": 1, "text": "تسري أحكام هذا الباب على العقود الملزمة للجانبين."},
+]
+JUDGMENT = "حكمت المحكمة بإلزام المدعى عليه بدفع الأجور المتأخرة للعامل مع التعويض."
+
+
+def write_json(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    corpus_dir = tmp_path / "corpus"
+    write_json(corpus_dir / "legislation" / "labour.json", LABOUR_LAW)
+    write_json(corpus_dir / "case_law" / "wages.json", [{"title": "الطعن رقم 12", "text": JUDGMENT}])
+    return corpus_dir
+
+
+@pytest.fixture
+def corpus(tmp_path, corpus_dir):
+    return LegalCorpus(str(corpus_dir), str(tmp_path / "index" / "corpus.db"), refresh_seconds=3600)
+
+
+def test_first_search_builds_the_index(corpus):
+    results = corpus.search("مكافأة نهاية الخدمة")
+    assert [(result['title'], result['article']) for result in results] == [("قانون العمل", "46")]
+    assert "**مكافأة**" in results[0]['snippet']
+    assert corpus.stats() == {'files': 2, 'articles': 4}
+
+
+def test_matches_in_the_title_rank_first(corpus):
+    results = corpus.search("فسخ")
+    # Both articles mention it, but a title match weighs more than the body
+    assert [result['article'] for result in results] == ["1", "45"]
+    assert results[0]['score'] > results[1]['score']
+
+
+def test_spelling_variants_and_kind_filter(corpus):
+    # Folded alef and prefixes: "الاجور" matches "الأجور" in the judgment
+    results = corpus.search("الاجور المتاخرة")
+    assert [result['kind'] for result in results] == ['case_law']
+    assert corpus.search("الاجور المتاخرة", kind='legislation') == []
+    with pytest.raises(ValueError):
+        corpus.search("عقد", kind='statutes')
+
+
+def test_changed_and_removed_files_are_reindexed(corpus, corpus_dir):
+    assert corpus.search("إنذار")
+    labour = corpus_dir / "legislation" / "labour.json"
+    write_json(labour, [dict(LABOUR_LAW[0], text="يجوز للعامل ترك العمل قبل انتهاء مدة العقد بإشعار مسبق.")])
+    # Make sure the change is seen even on filesystems with coarse timestamps
+    stat = os.stat(labour)
+    os.utime(labour, (stat.st_atime, stat.st_mtime + 10))
+
+    assert corpus.refresh() == {'added': 0, 'updated': 1, 'removed': 0, 'articles': 1}
+    assert corpus.search("إنذار") == []
+    assert [result['article'] for result in corpus.search("بإشعار مسبق")] == ["45"]
+
+    os.remove(corpus_dir / "case_law" / "wages.json")
+    assert corpus.refresh()['removed'] == 1
+    assert corpus.search("الأجور المتأخرة") == []
+    assert corpus.stats() == {'files': 1, 'articles': 1}
+
+
+def test_touched_but_unchanged_file_is_not_reingested(corpus, corpus_dir):
+    corpus.refresh()
+    labour = corpus_dir / "legislation" / "labour.json"
+    stat = os.stat(labour)
+    os.utime(labour, (stat.st_atime, stat.st_mtime + 10))
+    assert corpus.refresh() == {'added': 0, 'updated': 0, 'removed': 0, 'articles': 0}
+    assert corpus.stats() == {'files': 2, 'articles': 4}
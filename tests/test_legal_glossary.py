@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+
+from legal_glossary import SEED_TERMS, LegalGlossary
+
+
+@pytest.fixture(scope="module")
+def glossary():
+    return LegalGlossary(SEED_TERMS)
+
+
+def test_protect_and_restore_arabic_to_english(glossary):
+    protected, targets = glossary.protect("يجوز أن يلجأ المستأجر إلى محكمة الاستئناف.", 'ar', 'en')
+    assert protected == "يجوز أن يلجأ GLOSS0 إلى GLOSS1."
+    assert targets == ["lessee", "Court of Appeal"]
+    assert glossary.restore("The GLOSS0 may appeal to the gloss 1.", targets) == \
+        "The lessee may appeal to the Court of Appeal."
+
+
+def test_protect_prefers_the_longest_term(glossary):
+    protected, targets = glossary.protect("صدر مرسوم بقانون اتحادي جديد", 'ar', 'en')
+    assert protected == "صدر GLOSS0 جديد"
+    assert targets == ["Federal Decree-Law"]
+
+
+def test_protect_matches_spelling_variants_and_proclitics(glossary):
+    # Diacritics and a bare alef in place of hamza, after the proclitic "و"
+    protected, targets = glossary.protect("والقُوة القاهرة تعفي من التنفيذ", 'ar', 'en')
+    assert protected == "وGLOSS0 تعفي من التنفيذ"
+    assert targets == ["force majeure"]
+
+
+def test_protect_respects_word_boundaries(glossary):
+    protected, targets = glossary.protect("The employers met the Penal Codes committee.", 'en', 'ar')
+    assert targets == []
+    assert protected == "The employers met the Penal Codes committee."
+
+
+def test_protect_only_applies_between_arabic_and_english(glossary):
+    assert glossary.protect("محكمة الاستئناف", 'ar', 'zh') == ("محكمة الاستئناف", [])
+
+
+@pytest.mark.parametrize("text, count, intact", [
+    ("The GLOSS0 may appeal to the GLOSS1.", 2, True),
+    ("The GLOSS1 may appeal to the gloss 0.", 2, True),
+    ("The GLOSS0 may appeal.", 2, False),
+    ("The GLOSS0 and the GLOSS0 may appeal to the GLOSS1.", 2, False),
+    ("The GLOSS0 may appeal to the GLOSS2.", 2, False),
+    ("No terms here.", 0, True),
+])
+def test_placeholders_intact(text, count, intact):
+    assert LegalGlossary.placeholders_intact(text, count) is intact
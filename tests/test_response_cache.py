@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+
+from response_cache import ResponseCache
+
+LLM_CONFIG = {"config_list": [{"model": "gpt-4-1106-preview", "api_key": "secret", "temperature": 0.3}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "responses.db"), semantic=False)
+
+
+def test_spelling_variants_hit_the_same_entry(cache):
+    cache.put("judge", "عقود", LLM_CONFIG, "ما هي شروط فسخ العقد؟", "answer")
+    assert cache.get("judge", "عقود", LLM_CONFIG, "ما هى شروط  فسخ العقد؟") == "answer"
+
+
+def test_answers_are_scoped_to_the_role(cache):
+    cache.put("judge", "عقود", LLM_CONFIG, "ما هي شروط فسخ العقد؟", "judge answer")
+    assert cache.get("advocate", "عقود", LLM_CONFIG, "ما هي شروط فسخ العقد؟") is None
+    assert cache.get("judge", "عمل", LLM_CONFIG, "ما هي شروط فسخ العقد؟") is None
+
+
+def test_key_ignores_the_api_key():
+    other_key = {"config_list": [dict(LLM_CONFIG["config_list"][0], api_key="other")]}
+    assert ResponseCache.make_key("judge", "عقود", LLM_CONFIG, "سؤال") == \
+        ResponseCache.make_key("judge", "عقود", other_key, "سؤال")
+
+
+@pytest.mark.parametrize("model, semantic", [
+    ("", False),
+    ("all-MiniLM-L6-v2", False),
+    ("paraphrase-multilingual-MiniLM-L12-v2", True),
+])
+def test_semantic_lookup_requires_a_multilingual_model(tmp_path, model, semantic):
+    cache = ResponseCache(path=str(tmp_path / "responses.db"), semantic=True, embedding_model=model)
+    assert cache.semantic is semantic
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Build `callers` threads that call flight.do and collect what each gets back."""
+    results = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    return threads, results
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test')
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        return "result"
+
+    leader, results = run_concurrently(flight, "key", compute, 1)
+    leader[0].start()
+    assert entered.wait(5)
+    followers, follower_results = run_concurrently(flight, "key", compute, 3)
+    for thread in followers:
+        thread.start()
+    # Wait until every follower has joined the call in flight
+    while flight.stats()['coalesced'] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [("result", False)]
+    assert follower_results == [("result", True)] * 3
+    assert flight.stats() == {'executions': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_exception_is_shared_and_key_is_forgotten():
+    flight = SingleFlight('test')
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    # The failed call is not remembered, so the next one computes afresh
+    assert flight.do("key", lambda: 42) == (42, False)
+    assert flight.stats()['executions'] == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight('test')
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()['coalesced'] == 0
+
+
+class Rerun(BaseException):
+    """Stands in for Streamlit's RerunException, which is not an Exception."""
+
+
+def test_interrupted_leader_releases_followers_to_retry():
+    flight = SingleFlight('test')
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            entered.set()
+            release.wait(5)
+            raise Rerun()
+        return "result"
+
+    leader_results = []
+
+    def lead():
+        try:
+            flight.do("key", compute)
+        except Rerun as e:
+            leader_results.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    assert entered.wait(5)
+    followers, follower_results = run_concurrently(flight, "key", compute, 3)
+    for thread in followers:
+        thread.start()
+    while flight.stats()['coalesced'] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    # Only the leader sees the interruption; the followers compute the result again
+    assert len(leader_results) == 1
+    assert sorted(value for value, _ in follower_results) == ["result"] * 3
+    assert flight.stats()['in_flight'] == 0
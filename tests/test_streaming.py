@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from streaming import ResponseStream, StreamingTokenHandler
+
+REACT_TOKENS = ["Thought", ": I should check", " the law.\n", "Final", " Answer", ":", " يحق", " للعامل", " مكافأة"]
+
+
+def llm_call(handler, tokens):
+    handler.on_llm_start({}, ["prompt"])
+    for token in tokens:
+        handler.on_llm_new_token(token)
+
+
+def test_only_the_final_answer_is_streamed():
+    handler = StreamingTokenHandler()
+
+    def produce():
+        # A tool-using step first: its thoughts never reach the user
+        llm_call(handler, ["Thought: search", " the corpus\nAction: search"])
+        llm_call(handler, REACT_TOKENS)
+        return "يحق للعامل مكافأة"
+
+    stream = ResponseStream(produce, "test")
+    assert list(stream) == [" يحق", " للعامل", " مكافأة"]
+    assert stream.text == "يحق للعامل مكافأة"
+    assert stream.time_to_first_token is not None
+
+
+def test_answer_text_in_the_marker_token_is_kept():
+    handler = StreamingTokenHandler()
+
+    def produce():
+        llm_call(handler, ["Thought: done\nFinal Answer: يحق", " للعامل"])
+        return "يحق للعامل"
+
+    assert list(ResponseStream(produce, "test")) == ["يحق", " للعامل"]
+
+
+def test_unstreamed_answer_is_yielded_whole():
+    stream = ResponseStream(lambda: "cached answer", "test")
+    assert list(stream) == ["cached answer"]
+    assert stream.text == "cached answer"
+
+
+def test_errors_are_raised_to_the_reader():
+    def produce():
+        raise RuntimeError("LLM unavailable")
+
+    with pytest.raises(RuntimeError):
+        list(ResponseStream(produce, "test"))
+
+
+def test_tokens_go_to_the_stream_of_the_calling_thread():
+    handler = StreamingTokenHandler()
+    # Both requests are in the middle of their answer at the same time
+    both_streaming = threading.Barrier(2)
+
+    def produce(name):
+        def run():
+            handler.on_llm_start({}, ["prompt"])
+            handler.on_llm_new_token("Final Answer:")
+            for index in range(3):
+                handler.on_llm_new_token(f" {name}{index}")
+                if index == 0:
+                    both_streaming.wait(5)
+            return f"{name}0 {name}1 {name}2"
+        return run
+
+    received = {}
+
+    def read(name):
+        received[name] = list(ResponseStream(produce(name), name))
+
+    readers = [threading.Thread(target=read, args=(name,)) for name in ("a", "b")]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join(5)
+
+    assert received == {"a": [" a0", " a1", " a2"], "b": [" b0", " b1", " b2"]}
+
+
+def test_calls_outside_a_stream_are_ignored():
+    handler = StreamingTokenHandler()
+    # No stream registered on this thread: nothing to forward to and nothing raised
+    llm_call(handler, REACT_TOKENS)
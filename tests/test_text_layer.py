@@ -0,0 +1,52 @@
+import unicodedata
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+
+from text_layer import page_needs_ocr
+
+ARABIC_PAGE = (
+    "يلتزم صاحب العمل بدفع أجر العامل في المواعيد المتفق عليها في عقد العمل. "
+    "يجوز لأي من الطرفين إنهاء العقد لسبب مشروع بموجب إخطار كتابي لا تقل مدته عن ثلاثين يوماً. "
+) * 3
+
+
+def to_presentation_forms(text):
+    """Replace each Arabic letter with its isolated presentation form, as some PDF ToUnicode maps do."""
+    forms = []
+    for char in text:
+        try:
+            forms.append(unicodedata.lookup(f"{unicodedata.name(char)} ISOLATED FORM"))
+        except (KeyError, ValueError):
+            forms.append(char)
+    return ''.join(forms)
+
+
+def test_digital_arabic_page_keeps_its_text_layer():
+    assert not page_needs_ocr(ARABIC_PAGE)
+
+
+def test_digital_page_in_presentation_forms_keeps_its_text_layer():
+    page = to_presentation_forms(ARABIC_PAGE)
+    assert page != ARABIC_PAGE
+    assert not page_needs_ocr(page)
+
+
+def test_digital_english_page_keeps_its_text_layer():
+    assert not page_needs_ocr("The employer shall pay the wages on the agreed dates. " * 5)
+
+
+def test_nearly_empty_page_needs_ocr():
+    assert page_needs_ocr("12 / 3")
+
+
+def test_broken_font_mapping_needs_ocr():
+    # Glyphs mapped to an unrelated script are letters, but neither Arabic nor Latin
+    assert page_needs_ocr("ᚠᚢᚦᚨᚱᚲ ᚷᚹᚺᚾᛁᛃ " * 20)
+
+
+def test_mojibake_page_needs_ocr():
+    # UTF-8 Arabic decoded as Latin-1
+    assert page_needs_ocr(ARABIC_PAGE.encode('utf-8').decode('latin-1'))
@@ -0,0 +1,41 @@
+import pytest
+
+from text_normalizer import PROFILES, normalize
+
+
+def test_pdf_profile_keeps_paragraphs_and_fixes_ocr_layout():
+    text = "The  Court‏ ruled\x07 today.Next \t sentence\n\n\n  New paragraph theCourt"
+    assert normalize(text, 'pdf') == "The Court ruled today.\nNext sentence\n\nNew paragraph the Court"
+
+
+def test_arabic_display_profile_drops_bidi_marks_and_joins_spaced_letters():
+    assert normalize("‏قال‫ ا ل م ح ك م ة اليوم", 'arabic_display') == "قال المحكمة اليوم"
+    # Two spaced letters are not enough to be a letter-spaced word
+    assert normalize("و ب العمل", 'arabic_display') == "و ب العمل"
+
+
+def test_translation_ar_profile_cleans_marian_output():
+    text = "المادة5 من القانون،, هل؟? نعم!! Law‏القانون"
+    assert normalize(text, 'translation_ar') == "المادة 5 من القانون، هل؟ نعم! Law القانون"
+
+
+def test_translation_en_profile_fixes_spacing_and_capitalisation():
+    text = "the court ruled .it was final ,and binding.  costs are 1,000 and 3.5 percent."
+    assert normalize(text, 'translation_en') == \
+        "The court ruled. It was final, and binding. Costs are 1,000 and 3.5 percent."
+
+
+def test_translation_input_profile_keeps_paragraphs_and_drops_symbols():
+    text = "Article 5 * of the\nlaw ★ applies.\n \n\tالمادة @ الخامسة\r\nتطبق.\n\n\n"
+    assert normalize(text, 'translation_input') == "Article 5 of the law applies.\n\nالمادة الخامسة تطبق."
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_profiles_are_idempotent(profile):
+    text = "The  court‏ ruled.\n\nقال ا ل م ح ك م ة،, 5 * نعم!!\n"
+    once = normalize(text, profile)
+    assert normalize(once, profile) == once
+
+
+def test_unknown_profile_only_strips():
+    assert normalize("  as  is \n", 'unknown') == "as  is"
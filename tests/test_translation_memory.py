@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+
+import translation_memory
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return TranslationMemory(path=str(tmp_path / "memory.db"), max_entries=100, fuzzy_threshold=0.8)
+
+
+def test_key_depends_on_the_language_pair():
+    assert TranslationMemory.make_key("عقد العمل", 'ar', 'en') == TranslationMemory.make_key("عقد العمل", 'ar', 'en')
+    assert TranslationMemory.make_key("عقد العمل", 'ar', 'en') != TranslationMemory.make_key("عقد العمل", 'ar', 'zh')
+
+
+def test_exact_lookup_ignores_spelling_variants(memory):
+    memory.put_many([("أنهى صاحب العمل العقد.", "The employer ended the contract.")], 'ar', 'en')
+    # Hamza, diacritics, final yaa and spacing are folded before hashing
+    found = memory.get_many(["انهي  صاحبُ العمل العقد.", "جملة أخرى."], 'ar', 'en')
+    assert found == {"انهي  صاحبُ العمل العقد.": "The employer ended the contract."}
+    assert memory.get_many(["أنهى صاحب العمل العقد."], 'ar', 'zh') == {}
+    assert memory.stats()['hits'] == 1
+
+
+def test_fuzzy_suggestions_are_ranked_and_thresholded(memory):
+    memory.put_many([
+        ("The lessee shall pay the rent monthly.", "يدفع المستأجر الأجرة شهرياً."),
+        ("The lessee shall pay the rent yearly.", "يدفع المستأجر الأجرة سنوياً."),
+        ("Arbitration is final.", "التحكيم نهائي."),
+    ], 'en', 'ar')
+    suggestions = memory.suggest("The lessee shall pay the rent weekly.", 'en', 'ar')
+    assert [suggestion['source'] for suggestion in suggestions] == [
+        "The lessee shall pay the rent yearly.", "The lessee shall pay the rent monthly."
+    ]
+    assert all(suggestion['score'] >= 0.8 for suggestion in suggestions)
+    # An exact match is served by get_many, not offered as a suggestion
+    assert memory.suggest("The lessee shall pay the rent monthly.", 'en', 'ar')[0]['source'] != \
+        "The lessee shall pay the rent monthly."
+
+
+def test_least_recently_used_segments_are_evicted(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(translation_memory.time, 'time', lambda: float(next(clock)))
+    memory = TranslationMemory(path=str(tmp_path / "memory.db"), max_entries=2)
+    memory.put_many([("first.", "1")], 'en', 'ar')
+    memory.put_many([("second.", "2")], 'en', 'ar')
+    memory.put_many([("third.", "3")], 'en', 'ar')
+    assert memory.get_many(["first.", "second.", "third."], 'en', 'ar') == {"second.": "2", "third.": "3"}
@@ -0,0 +1,171 @@
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain")
+pytest.importorskip("langdetect")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import translator
+from translation_memory import TranslationMemory
+from translator import ModelUnavailableError, Translator, plan_route
+
+SENTENCE = "يجوز أن يلجأ المستأجر إلى محكمة الاستئناف."
+PROTECTED = "يجوز أن يلجأ GLOSS0 إلى GLOSS1."
+
+
+class WordTokenizer:
+    """Counts one token per word, which is all the chunking code asks of a tokenizer."""
+
+    def __call__(self, texts, add_special_tokens=True, **kwargs):
+        return {'input_ids': [[0] * len(text.split()) for text in texts]}
+
+
+@pytest.fixture(autouse=True)
+def available_models(monkeypatch):
+    monkeypatch.setattr(translator, '_unavailable_pairs', set())
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    memory = TranslationMemory(path=str(tmp_path / "memory.db"))
+    monkeypatch.setattr(translator, 'get_translation_memory', lambda: memory)
+    return memory
+
+
+@pytest.fixture
+def model_outputs(monkeypatch, memory):
+    """Stand in for Marian: the "model" of a pair is the pair itself, and each input chunk
+    is translated by looking up (pair, chunk) in the returned dict."""
+    outputs = {}
+    monkeypatch.setattr(Translator, '_load_model', lambda self, src, tgt: (WordTokenizer(), (src, tgt)))
+    monkeypatch.setattr(Translator, '_generate', staticmethod(
+        lambda tokenizer, model, chunks, batch_size: [outputs[(*model, chunk)] for chunk in chunks]
+    ))
+    return outputs
+
+
+def test_glossary_terms_are_restored_and_stored(memory, model_outputs):
+    model_outputs['ar', 'en', PROTECTED] = "The GLOSS0 may appeal to the GLOSS1."
+    aligned = Translator().translate_aligned([SENTENCE], 'ar', 'en')
+    assert aligned == [[[(SENTENCE, "The lessee may appeal to the Court of Appeal.")]]]
+    assert memory.get_many([PROTECTED], 'ar', 'en') == {PROTECTED: "The GLOSS0 may appeal to the GLOSS1."}
+
+
+def test_lost_placeholder_is_translated_without_protection(memory, model_outputs):
+    model_outputs['ar', 'en', PROTECTED] = "The GLOSS0 may appeal to the court."
+    model_outputs['ar', 'en', SENTENCE] = "The tenant may appeal to the appeals court."
+    aligned = Translator().translate_aligned([SENTENCE], 'ar', 'en')
+    assert aligned == [[[(SENTENCE, "The tenant may appeal to the appeals court.")]]]
+    # The broken translation never reaches the translation memory
+    assert memory.get_many([PROTECTED], 'ar', 'en') == {}
+
+
+def test_plan_route_prefers_a_direct_model():
+    assert plan_route('ar', 'en') == [('ar', 'en')]
+    assert plan_route('en', 'ur') == [('en', 'ur')]
+
+
+def test_plan_route_pivots_through_english():
+    assert plan_route('ar', 'zh') == [('ar', 'en'), ('en', 'zh')]
+    assert plan_route('hi', 'ur') == [('hi', 'en'), ('en', 'ur')]
+
+
+def test_plan_route_avoids_unavailable_pairs():
+    translator._unavailable_pairs.add('en-zh')
+    assert plan_route('ar', 'zh') == []
+    assert plan_route('ar', 'en') == [('ar', 'en')]
+
+
+def test_hop_whose_model_fails_to_load_is_routed_around(monkeypatch, model_outputs):
+    monkeypatch.setattr(translator, 'MARIAN_MODELS', {
+        ('ar', 'en'): 'ar-en', ('en', 'zh'): 'en-zh', ('ar', 'ur'): 'ar-ur', ('ur', 'zh'): 'ur-zh'
+    })
+
+    def load_model(self, src, tgt):
+        if (src, tgt) == ('en', 'zh'):
+            translator._unavailable_pairs.add('en-zh')
+            return None
+        return WordTokenizer(), (src, tgt)
+    monkeypatch.setattr(Translator, '_load_model', load_model)
+    model_outputs['ar', 'en', "انتهى العقد."] = "The contract ended."
+    model_outputs['ar', 'ur', "انتهى العقد."] = "معاہدہ ختم ہو گیا۔"
+    model_outputs['ur', 'zh', "معاہدہ ختم ہو گیا۔"] = "合同已终止。"
+
+    assert Translator().translate_aligned(["انتهى العقد."], 'ar', 'zh') == [[[("انتهى العقد.", "合同已终止。")]]]
+    assert plan_route('ar', 'zh') == [('ar', 'ur'), ('ur', 'zh')]
+
+
+def test_no_route_raises(monkeypatch, model_outputs):
+    def load_model(self, src, tgt):
+        translator._unavailable_pairs.add(f'{src}-{tgt}')
+        return None
+    monkeypatch.setattr(Translator, '_load_model', load_model)
+    with pytest.raises(ModelUnavailableError):
+        Translator().translate_aligned(["انتهى العقد."], 'ar', 'zh')
+
+
+def test_failed_paragraphs_are_kept_and_reported(model_outputs):
+    model_outputs['ar', 'en', "انتهى العقد."] = "The contract ended."
+    # No output for the Urdu paragraph, so its generate call fails
+    failed = []
+    aligned = Translator().translate_aligned(["انتهى العقد.\n\nیہ معاہدہ ختم ہو گیا ہے۔"], 'arabic', 'english',
+                                             failed=failed)
+    assert aligned == [[[("انتهى العقد.", "The contract ended.")],
+                        [("یہ معاہدہ ختم ہو گیا ہے۔", "یہ معاہدہ ختم ہو گیا ہے۔")]]]
+    assert failed == [(0, 1)]
+
+
+def test_chunk_is_split_only_when_sentences_and_placeholders_line_up(memory, model_outputs):
+    first = "انتهى العقد."
+    chunk = f"{first} {PROTECTED}"
+    # Two sentences, but the placeholders ended up in the first one
+    model_outputs['ar', 'en', chunk] = "The GLOSS0 contract ended. The party may appeal to the GLOSS1."
+    model_outputs['ar', 'en', first] = "The contract ended."
+    model_outputs['ar', 'en', PROTECTED] = "The GLOSS0 may appeal to the GLOSS1."
+
+    aligned = Translator().translate_aligned([f"{first} {SENTENCE}"], 'ar', 'en')
+    assert aligned == [[[(first, "The contract ended."), (SENTENCE, "The lessee may appeal to the Court of Appeal.")]]]
+    assert memory.get_many([first, PROTECTED], 'ar', 'en') == {
+        first: "The contract ended.", PROTECTED: "The GLOSS0 may appeal to the GLOSS1."
+    }
+
+
+def test_aligned_chunk_is_split_into_its_segments(memory, model_outputs):
+    first = "انتهى العقد."
+    model_outputs['ar', 'en', f"{first} {PROTECTED}"] = "The contract ended. The GLOSS0 may appeal to the GLOSS1."
+    aligned = Translator().translate_aligned([f"{first} {SENTENCE}"], 'ar', 'en')
+    assert aligned == [[[(first, "The contract ended."), (SENTENCE, "The lessee may appeal to the Court of Appeal.")]]]
+
+
+def stream_paragraphs(model_outputs):
+    """Eight paragraphs; 4 and 6 are Urdu, and the ur-en hop has no outputs, so it fails."""
+    paragraphs = []
+    for number in range(8):
+        if number in (4, 6):
+            paragraphs.append(f"معاہدہ نمبر {number} ختم ہو گیا ہے۔")
+        else:
+            paragraphs.append(f"انتهى العقد رقم {number}.")
+            model_outputs['ar', 'en', paragraphs[-1]] = f"Contract {number} ended."
+    return paragraphs
+
+
+def test_stream_reports_the_numbers_of_failed_paragraphs(model_outputs):
+    paragraphs = stream_paragraphs(model_outputs)
+    failed = []
+    received = list(Translator().translate_stream("\n\n".join(paragraphs), 'ar', 'en', failed=failed))
+    assert failed == [4, 6]
+    assert [pairs[0][1] for pairs in received] == [
+        paragraphs[number] if number in (4, 6) else f"Contract {number} ended." for number in range(8)
+    ]
+
+
+def test_stream_closed_early_keeps_the_failures_it_yielded(model_outputs):
+    paragraphs = stream_paragraphs(model_outputs)
+    failed = []
+    stream = Translator().translate_stream("\n\n".join(paragraphs), 'ar', 'en', failed=failed)
+    # Paragraphs 3 to 6 form one window; stop right after paragraph 4
+    for _ in range(5):
+        next(stream)
+    stream.close()
+    assert failed == [4]
@@ -0,0 +1,31 @@
+"""Quality checks for the text layer of a PDF page.
+
+Pages whose text layer fails these checks are sent to OCR; the rest keep the text
+PyPDF2 extracted.
+"""
+import re
+
+from utils import ARABIC_CHARS
+from config import OCR_MIN_PAGE_CHARS, OCR_MIN_SCRIPT_RATIO, OCR_MAX_MOJIBAKE_RATIO
+
+# Character classes used to judge the quality of a page's text layer
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+# Arabic includes the presentation forms many Arabic PDFs map their glyphs to
+SCRIPT_PATTERN = re.compile(f'[A-Za-z{ARABIC_CHARS}]')
+# Replacement characters, C1 controls, private use glyphs and the Latin-1 letters
+# that UTF-8 Arabic turns into when decoded with the wrong code page (e.g. "Ø§Ù„")
+MOJIBAKE_PATTERN = re.compile('[\ufffd\u0080-\u009f\ue000-\uf8ff\u00c3\u00c2\u00d8\u00d9\u00da\u00db]')
+
+
+def page_needs_ocr(page_text: str) -> bool:
+    """Check whether a page's text layer is too poor to use and should be OCR'd."""
+    letters = len(LETTER_PATTERN.findall(page_text))
+    if letters < OCR_MIN_PAGE_CHARS:
+        return True
+
+    # Most letters should be Arabic or Latin; anything else is usually a broken font mapping
+    if len(SCRIPT_PATTERN.findall(page_text)) / letters < OCR_MIN_SCRIPT_RATIO:
+        return True
+
+    characters = len(page_text) - page_text.count(' ')
+    return len(MOJIBAKE_PATTERN.findall(page_text)) / characters > OCR_MAX_MOJIBAKE_RATIO
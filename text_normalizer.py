@@ -0,0 +1,140 @@
+"""Text normalization shared by PDF extraction and translation.
+
+Each profile is a short, fixed sequence of steps built once at import: patterns compiled
+up front, and C-level string methods (`str.split`, `str.isprintable`, `in`) that decide
+cheaply whether a costlier pass is needed at all. Cleaning a page or a translated
+sentence therefore costs a few passes in C rather than a Python loop over its
+characters and a dozen separate substitutions.
+"""
+import re
+from typing import Callable, Dict, List, Tuple, Union
+
+ARABIC_LETTER = '[ء-ي]'
+
+
+def _character_class(codes: List[int]) -> str:
+    """Compress sorted code points into a regex character class of ranges."""
+    ranges = []
+    start = previous = codes[0]
+    for code in codes[1:]:
+        if code != previous + 1:
+            ranges.append((start, previous))
+            start = code
+        previous = code
+    ranges.append((start, previous))
+    return '[' + ''.join(
+        re.escape(chr(low)) if low == high else f'{re.escape(chr(low))}-{re.escape(chr(high))}'
+        for low, high in ranges
+    ) + ']'
+
+
+# Characters that are neither printable nor whitespace: controls, format characters such as
+# bidi marks and zero-width spaces, surrogates, private use and unassigned code points
+UNPRINTABLE_PATTERN = re.compile(_character_class(
+    [code for code in range(0x10000) if not chr(code).isprintable() and not chr(code).isspace()]
+) + '+')
+# Zero-width and bidi control characters left in model output or after bidi reordering
+BIDI_CONTROLS = ''.join(map(chr, [*range(0x200B, 0x2010), *range(0x202A, 0x202F)]))
+BIDI_CONTROL_PATTERN = re.compile(f'[{BIDI_CONTROLS}]+')
+
+# A blank line, whatever the whitespace on it, is a paragraph break
+BLANK_LINES_PATTERN = re.compile(r'\n[^\S\n]*\n\s*')
+# OCR runs words together ("theCourt") and loses the line break after a sentence
+CAMEL_CASE_PATTERN = re.compile(r'([a-z])(?=[A-Z])')
+SENTENCE_START_PATTERN = re.compile(r'([.!?]) *(?=[A-Z])')
+# Three or more single Arabic letters separated by spaces are one letter-spaced word. The
+# pattern starts at the preceding whitespace, which lets the regex engine skip ahead cheaply
+SPACED_LETTERS_PATTERN = re.compile(f'\\s{ARABIC_LETTER}(?: {ARABIC_LETTER}){{2,}}(?!{ARABIC_LETTER})')
+# Doubled punctuation from the model: "،," ".," "؟?" "!!" keep their first mark
+DOUBLED_PUNCTUATION_PATTERN = re.compile(r'(?<=[،.]),|(?<=؟)\?|(?<=!)!')
+# Arabic next to digits or Latin letters without a space
+MIXED_SCRIPT_PATTERN = re.compile(f'([0-9a-zA-Z])(?={ARABIC_LETTER})|({ARABIC_LETTER})(?=[0-9a-zA-Z])')
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+(?=[.,!?])')
+# A missing space after punctuation, except inside numbers ("3.5", "1,000") and before closing marks
+MISSING_SPACE_PATTERN = re.compile(r'([.,!?])(?![\s\d.,!?)\]"\'])')
+LOWERCASE_SENTENCE_START_PATTERN = re.compile(r'(?:^|(?<=\. ))[a-z]')
+# Symbols Marian has no use for; letters, digits, whitespace and sentence punctuation are kept
+TRANSLATION_UNSUPPORTED_PATTERN = re.compile(r'[^\w\s.,!?؟،؛:;()。！？।۔-]+')
+
+
+def _clean_paragraphs(text: str) -> str:
+    """Keep paragraph breaks, fold every other whitespace run to a space and drop unprintables."""
+    paragraphs = []
+    for paragraph in BLANK_LINES_PATTERN.split(text):
+        paragraph = ' '.join(paragraph.split())
+        # Only plain spaces are left, so isprintable() tells whether anything needs removing
+        if not paragraph.isprintable():
+            paragraph = ' '.join(UNPRINTABLE_PATTERN.sub('', paragraph).split())
+        if paragraph:
+            paragraphs.append(paragraph)
+    return '\n\n'.join(paragraphs)
+
+
+def _clean_translation_input(text: str) -> str:
+    """Keep paragraph breaks, drop unsupported symbols and fold line breaks and spaces to one space."""
+    paragraphs = (' '.join(TRANSLATION_UNSUPPORTED_PATTERN.sub('', paragraph).split())
+                  for paragraph in BLANK_LINES_PATTERN.split(text))
+    return '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def _remove_bidi_controls(text: str) -> str:
+    if any(control in text for control in BIDI_CONTROLS):
+        text = BIDI_CONTROL_PATTERN.sub('', text)
+    return text
+
+
+def _join_spaced_letters(text: str) -> str:
+    # A leading space lets a letter-spaced word at the very start match too
+    joined = SPACED_LETTERS_PATTERN.sub(
+        lambda match: match.group(0)[0] + match.group(0)[1:].replace(' ', ''), ' ' + text
+    )
+    return joined[1:]
+
+
+def _collapse_spaces(text: str) -> str:
+    return ' '.join(text.split())
+
+
+Step = Union[Callable[[str], str], Tuple[re.Pattern, Union[str, Callable]]]
+
+PROFILES: Dict[str, List[Step]] = {
+    # Text extracted from a PDF page or produced by the summarizer
+    'pdf': [
+        _clean_paragraphs,
+        (CAMEL_CASE_PATTERN, '\\1 '),
+        (SENTENCE_START_PATTERN, '\\1\n'),
+    ],
+    # Arabic text after reshaping and bidi reordering
+    'arabic_display': [
+        _remove_bidi_controls,
+        _join_spaced_letters,
+    ],
+    # Text about to be translated: single line breaks are layout, blank lines separate paragraphs
+    'translation_input': [
+        _clean_translation_input,
+    ],
+    # Marian output, by target language
+    'translation_ar': [
+        _remove_bidi_controls,
+        _join_spaced_letters,
+        (DOUBLED_PUNCTUATION_PATTERN, ''),
+        (MIXED_SCRIPT_PATTERN, '\\1\\2 '),
+    ],
+    'translation_en': [
+        (SPACE_BEFORE_PUNCTUATION_PATTERN, ''),
+        (MISSING_SPACE_PATTERN, '\\1 '),
+        _collapse_spaces,
+        (LOWERCASE_SENTENCE_START_PATTERN, lambda match: match.group(0).upper()),
+    ],
+}
+
+
+def normalize(text: str, profile: str) -> str:
+    """Apply the steps of `profile` to `text` and strip it; unknown profiles only strip."""
+    for step in PROFILES.get(profile, []):
+        if callable(step):
+            text = step(text)
+        else:
+            pattern, replacement = step
+            text = pattern.sub(replacement, text)
+    return text.strip()
@@ -0,0 +1,161 @@
+import difflib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import sqlite_utils
+
+from utils import normalize_arabic
+from config import TRANSLATION_MEMORY_FUZZY_THRESHOLD, TRANSLATION_MEMORY_MAX_ENTRIES, TRANSLATION_MEMORY_PATH
+
+# Candidates compared per fuzzy lookup, taken from the segments closest in length
+FUZZY_CANDIDATES = 200
+
+
+class TranslationMemory:
+    """Persistent segment-level translation memory.
+
+    Segments are keyed by the hash of the normalized source sentence and the language
+    pair. Exact hits are served without running the model; for the rest, segments of
+    similar length are compared with difflib and those above `fuzzy_threshold` are
+    offered as suggestions. The least recently used segments are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH, max_entries: int = TRANSLATION_MEMORY_MAX_ENTRIES,
+                 fuzzy_threshold: float = TRANSLATION_MEMORY_FUZZY_THRESHOLD):
+        self.max_entries = max_entries
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite_utils.Database(sqlite3.connect(path, check_same_thread=False))
+        self.db['segments'].create({
+            'key': str,
+            'pair': str,
+            'source': str,
+            'normalized': str,
+            'length': int,
+            'target': str,
+            'uses': int,
+            'last_access': float
+        }, pk='key', if_not_exists=True)
+        self.db['segments'].create_index(['pair', 'length'], if_not_exists=True)
+        self.db['segments'].create_index(['last_access'], if_not_exists=True)
+
+    @staticmethod
+    def make_key(normalized: str, src_lang: str, tgt_lang: str) -> str:
+        return hashlib.sha256(f"{src_lang}-{tgt_lang}:{normalized}".encode('utf-8')).hexdigest()
+
+    def get_many(self, segments: List[str], src_lang: str, tgt_lang: str) -> Dict[str, str]:
+        """Return the stored translations of the segments that have an exact match."""
+        keys: Dict[str, List[str]] = {}
+        for segment in dict.fromkeys(segments):
+            keys.setdefault(self.make_key(normalize_arabic(segment), src_lang, tgt_lang), []).append(segment)
+        now = time.time()
+        found, hit_keys = {}, []
+        with self._lock:
+            key_list = list(keys)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                for row in self.db.query(
+                    f"select key, target from segments where key in ({', '.join('?' * len(batch))})", batch
+                ):
+                    hit_keys.append(row['key'])
+                    for segment in keys[row['key']]:
+                        found[segment] = row['target']
+            if hit_keys:
+                for start in range(0, len(hit_keys), 500):
+                    batch = hit_keys[start:start + 500]
+                    self.db.execute(
+                        f"update segments set uses = uses + 1, last_access = ? "
+                        f"where key in ({', '.join('?' * len(batch))})", [now, *batch]
+                    )
+                self.db.conn.commit()
+            self.hits += len(hit_keys)
+            self.misses += len(keys) - len(hit_keys)
+        return found
+
+    def put_many(self, pairs: List[Tuple[str, str]], src_lang: str, tgt_lang: str):
+        """Store (source, target) segment pairs and evict the least recently used beyond the limit."""
+        now = time.time()
+        records = []
+        for source, target in pairs:
+            normalized = normalize_arabic(source)
+            records.append({
+                'key': self.make_key(normalized, src_lang, tgt_lang),
+                'pair': f"{src_lang}-{tgt_lang}",
+                'source': source,
+                'normalized': normalized,
+                'length': len(normalized),
+                'target': target,
+                'uses': 0,
+                'last_access': now
+            })
+        with self._lock:
+            self.db['segments'].upsert_all(records, pk='key')
+            self.db.execute(
+                "delete from segments where key in "
+                "(select key from segments order by last_access desc limit -1 offset ?)",
+                [self.max_entries]
+            )
+            self.db.conn.commit()
+
+    def suggest(self, segment: str, src_lang: str, tgt_lang: str, limit: int = 3) -> List[Dict]:
+        """Return stored translations of similar segments, best first, above the fuzzy threshold."""
+        normalized = normalize_arabic(segment)
+        length = len(normalized)
+        # A ratio of at least t needs the lengths within a factor of t of each other
+        low, high = int(length * self.fuzzy_threshold), int(length / max(self.fuzzy_threshold, 1e-6)) + 1
+        with self._lock:
+            candidates = list(self.db.query(
+                "select source, normalized, target from segments "
+                "where pair = ? and length between ? and ? order by abs(length - ?) limit ?",
+                [f"{src_lang}-{tgt_lang}", low, high, length, FUZZY_CANDIDATES]
+            ))
+
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(normalized)
+        suggestions = []
+        for candidate in candidates:
+            matcher.set_seq1(candidate['normalized'])
+            # Cheap upper bounds first; the full ratio only for plausible candidates
+            if matcher.real_quick_ratio() < self.fuzzy_threshold or matcher.quick_ratio() < self.fuzzy_threshold:
+                continue
+            score = matcher.ratio()
+            if score >= self.fuzzy_threshold and candidate['normalized'] != normalized:
+                suggestions.append({'score': score, 'source': candidate['source'], 'target': candidate['target']})
+        return sorted(suggestions, key=lambda s: s['score'], reverse=True)[:limit]
+
+    def stats(self) -> Dict:
+        """Return segment hit/miss counters and the number of stored segments."""
+        with self._lock:
+            entries = self.db['segments'].count
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """Return the process-wide translation memory, shared by all sessions."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
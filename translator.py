@@ -1,12 +1,142 @@
 from transformers import MarianMTModel, MarianTokenizer, pipeline
 import torch
-from langdetect import detect
+from functools import partial
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
 import re
+from model_registry import registry
+from legal_glossary import get_glossary
+from language_detection import detect_language, detect_paragraph_languages
+from translation_memory import get_translation_memory
+from text_normalizer import normalize
+from quantization import load_quantized_model
+from config import (
+    QUANTIZED_INFERENCE, TRANSLATION_BATCH_SIZE, TRANSLATION_CHUNK_TOKENS,
+    TRANSLATION_STREAM_WINDOW
+)
+
+# Language pairs whose models are known up front and can be warmed up at server start
+DEFAULT_LANGUAGE_PAIRS = [('en', 'ar'), ('ar', 'en')]
+
+# Published Marian models for the languages offered in the UI; there are none between
+# Arabic and Chinese, Hindi or Urdu, so those pairs are translated through English
+MARIAN_MODELS = {
+    ('en', 'ar'): 'Helsinki-NLP/opus-mt-en-ar',
+    ('ar', 'en'): 'Helsinki-NLP/opus-mt-ar-en',
+    ('en', 'zh'): 'Helsinki-NLP/opus-mt-en-zh',
+    ('zh', 'en'): 'Helsinki-NLP/opus-mt-zh-en',
+    ('en', 'hi'): 'Helsinki-NLP/opus-mt-en-hi',
+    ('hi', 'en'): 'Helsinki-NLP/opus-mt-hi-en',
+    ('en', 'ur'): 'Helsinki-NLP/opus-mt-en-ur',
+    ('ur', 'en'): 'Helsinki-NLP/opus-mt-ur-en',
+}
+
+# Sentence ends: terminal punctuation followed by a space, or a full-width mark (no space follows in Chinese)
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?؟।۔])\s+|(?<=[。！？])\s*')
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n\s*\n')
+# Where a sentence too long for the model is split first
+CLAUSE_BOUNDARY_PATTERN = re.compile(r'(?<=[,;:،؛])\s+')
+# Words after which a full stop does not end the sentence
+ABBREVIATIONS = {
+    'art', 'arts', 'no', 'nos', 'para', 'sec', 'cl', 'p', 'pp', 'vol', 'e.g', 'i.e', 'etc', 'vs',
+    'mr', 'mrs', 'ms', 'dr', 'co', 'ltd', 'inc', 'u.a.e', 'approx'
+}
+
+# Pairs whose model failed to load, so they are not retried on every request
+_unavailable_pairs = set()
+
+
+class ModelUnavailableError(ValueError):
+    """No translation model, or chain of models, is available for a language pair."""
+
+
+def _model_key(src_lang: str, tgt_lang: str) -> str:
+    return f'marian:{src_lang}-{tgt_lang}'
+
+
+def _load_marian(model_name: str, quantized: bool = QUANTIZED_INFERENCE):
+    """Load a Marian tokenizer and model pair, optionally int8 quantized."""
+    tokenizer = MarianTokenizer.from_pretrained(model_name)
+    if quantized:
+        model = load_quantized_model(model_name, lambda: MarianMTModel.from_pretrained(model_name))
+    else:
+        model = MarianMTModel.from_pretrained(model_name)
+    return tokenizer, model
+
+
+# Registration is cheap: models load on first use and are evicted LRU under the memory budget
+for (_src, _tgt), _model_name in MARIAN_MODELS.items():
+    registry.register(_model_key(_src, _tgt), partial(_load_marian, _model_name))
+
+
+def plan_route(src_lang: str, tgt_lang: str) -> List[Tuple[str, str]]:
+    """Return the fewest model hops from `src_lang` to `tgt_lang`, e.g. [('ar', 'en'), ('en', 'zh')].
+
+    Pairs whose model failed to load are routed around; an empty list means no route.
+    """
+    previous = {src_lang: None}
+    frontier = deque([src_lang])
+    while frontier:
+        lang = frontier.popleft()
+        if lang == tgt_lang:
+            route = []
+            while previous[lang] is not None:
+                route.append((previous[lang], lang))
+                lang = previous[lang]
+            return route[::-1]
+        for hop_src, hop_tgt in MARIAN_MODELS:
+            if hop_src == lang and hop_tgt not in previous and f'{hop_src}-{hop_tgt}' not in _unavailable_pairs:
+                previous[hop_tgt] = lang
+                frontier.append(hop_tgt)
+    return []
+
+
+def split_paragraphs(text: str) -> List[str]:
+    return [paragraph.strip() for paragraph in PARAGRAPH_BREAK_PATTERN.split(text) if paragraph.strip()]
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    """Split a paragraph into sentences, keeping "Art. 5", "e.g. ..." and list numbers ("1. ") together."""
+    sentences, start = [], 0
+    for match in SENTENCE_END_PATTERN.finditer(paragraph):
+        if match.start() == start:
+            continue
+        if paragraph[match.start() - 1] == '.':
+            words = paragraph[start:match.start()].split()
+            last_word = words[-1].lstrip('(["\'').rstrip('.').lower() if words else ''
+            if last_word in ABBREVIATIONS or len(last_word) == 1 or (last_word.isdigit() and len(last_word) <= 2):
+                continue
+        sentences.append(paragraph[start:match.start()])
+        start = match.end()
+    sentences.append(paragraph[start:])
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def pack(lengths: List[int], budget: int) -> List[List[int]]:
+    """Greedily group consecutive items into runs whose lengths sum to at most `budget`.
+
+    An item longer than the budget on its own forms a run by itself.
+    """
+    groups, current, used = [], [], 0
+    for index, length in enumerate(lengths):
+        if current and used + length > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += length
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _token_counts(tokenizer, texts: List[str]) -> List[int]:
+    if not texts:
+        return []
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
+
 
 class Translator:
     def __init__(self):
-        self.models = {}
-        self.tokenizers = {}
         self.language_codes = {
             'arabic': 'ar',
             'english': 'en',
@@ -14,201 +144,378 @@ class Translator:
             'hindi': 'hi',
             'urdu': 'ur'
         }
-        
-        # Initialize models for each language pair
-        self._load_model('en', 'ar')  # English to Arabic
-        self._load_model('ar', 'en')  # Arabic to English
-        # Add other language pairs as needed
+        # Models are loaded lazily from the shared registry on first use
         
     def _load_model(self, src_lang, tgt_lang):
-        """Load translation model for a specific language pair."""
-        model_name = f'Helsinki-NLP/opus-mt-{src_lang}-{tgt_lang}'
+        """Load translation model for a specific language pair, or None if unavailable."""
+        model_name = MARIAN_MODELS.get((src_lang, tgt_lang))
         key = f'{src_lang}-{tgt_lang}'
         
-        if key not in self.models:
-            try:
-                self.tokenizers[key] = MarianTokenizer.from_pretrained(model_name)
-                self.models[key] = MarianMTModel.from_pretrained(model_name)
-            except Exception as e:
-                print(f"Error loading model for {key}: {str(e)}")
+        if model_name is None or key in _unavailable_pairs:
+            return None
+        try:
+            return registry.get(_model_key(src_lang, tgt_lang), partial(_load_marian, model_name))
+        except Exception as e:
+            print(f"Error loading model for {key}: {str(e)}")
+            _unavailable_pairs.add(key)
+            return None
                 
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         """Translate text from source language to target language with improved handling."""
-        src_code = self.language_codes.get(source_lang.lower())
-        tgt_code = self.language_codes.get(target_lang.lower())
+        return self.translate_batch([text], source_lang, target_lang)[0]
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str,
+                        batch_size: int = TRANSLATION_BATCH_SIZE) -> List[str]:
+        """Translate many texts at once, e.g. the paragraphs of a document or several documents.
+
+        Paragraph breaks are kept; see `_translate_hop` for how the work is chunked.
+        """
+        aligned = self.translate_aligned(texts, source_lang, target_lang, batch_size)
+        return ['\n\n'.join(' '.join(target for _, target in paragraph) for paragraph in text)
+                for text in aligned]
+
+    def translate_stream(self, text: str, source_lang: str, target_lang: str, start: int = 0,
+                         batch_size: int = TRANSLATION_BATCH_SIZE,
+                         max_window: int = TRANSLATION_STREAM_WINDOW,
+                         failed: Optional[List[int]] = None) -> Iterator[List[Tuple[str, str]]]:
+        """Yield the (source sentence, translation) pairs of each paragraph, in order, as soon as it is ready.
+
+        Paragraphs are translated in windows that start at a single paragraph and double up
+        to `max_window`, so the first paragraph is out after one short generate call while
+        later windows still fill whole batches. Work happens only as the caller iterates:
+        closing the generator cancels the rest. `start` skips paragraphs already received,
+        to resume an interrupted stream. The numbers of paragraphs that could not be
+        translated, and are yielded as they are, are appended to `failed`.
+        """
+        paragraphs = split_paragraphs(self.preprocess_text(text))
+        window = 1
+        while start < len(paragraphs):
+            # Each paragraph of the window is one text, so a failure is reported as (text, 0)
+            window_failed = []
+            translated = self.translate_aligned(paragraphs[start:start + window], source_lang, target_lang,
+                                                batch_size, failed=window_failed)
+            failed_indexes = {index for index, _ in window_failed}
+            for index, aligned in enumerate(translated):
+                # Recorded as the paragraph is yielded, so a caller that stops early keeps it
+                if failed is not None and index in failed_indexes:
+                    failed.append(start + index)
+                yield aligned[0]
+            start += window
+            window = min(window * 2, max_window)
+
+    def translate_aligned(self, texts: List[str], source_lang: str, target_lang: str,
+                          batch_size: int = TRANSLATION_BATCH_SIZE,
+                          max_tokens: int = TRANSLATION_CHUNK_TOKENS,
+                          failed: Optional[List[Tuple[int, int]]] = None) -> List[List[List[Tuple[str, str]]]]:
+        """Translate texts and return, per text and paragraph, (source sentence, translation) pairs.
+
+        Each paragraph is labelled with its own language, so a bilingual contract comes out
+        entirely in the target language: paragraphs already in it are kept as they are and
+        the rest are translated from the language they are in. `source_lang` applies to
+        paragraphs with too few letters to label. A paragraph that fails to translate is
+        kept as it is and its (text, paragraph) numbers are appended to `failed`; only a
+        language with no route of available models to the target raises.
+        """
+        src_code = self._language_code(source_lang)
+        tgt_code = self._language_code(target_lang)
         
         if not src_code or not tgt_code:
             raise ValueError("Unsupported language")
+
+        # Preprocess text
+        paragraphs = [split_paragraphs(self.preprocess_text(text)) for text in texts]
+        aligned = [[None] * len(text_paragraphs) for text_paragraphs in paragraphs]
+        groups: Dict[str, List[Tuple[int, int]]] = {}
+        for index, text_paragraphs in enumerate(paragraphs):
+            for number, (paragraph, lang) in enumerate(zip(text_paragraphs, detect_paragraph_languages(text_paragraphs))):
+                lang = lang or src_code
+                if lang == tgt_code:
+                    aligned[index][number] = [(sentence, sentence) for sentence in split_sentences(paragraph)]
+                else:
+                    groups.setdefault(lang, []).append((index, number))
+
+        for lang, positions in groups.items():
+            if lang != src_code:
+                print(f"Translation: {len(positions)} paragraphs detected as {lang}")
+            translated = self._translate_paragraphs(
+                [paragraphs[index][number] for index, number in positions], lang, tgt_code, batch_size, max_tokens
+            )
+            for (index, number), pairs in zip(positions, translated):
+                if pairs is None:
+                    pairs = [(paragraphs[index][number], paragraphs[index][number])]
+                    if failed is not None:
+                        failed.append((index, number))
+                aligned[index][number] = pairs
+        return aligned
+
+    def _translate_paragraphs(self, paragraphs: List[str], src_code: str, tgt_code: str,
+                              batch_size: int, max_tokens: int) -> List[Optional[List[Tuple[str, str]]]]:
+        """Translate paragraphs along the shortest route of available models.
+
+        If a model on the route fails to load, its pair is marked unavailable and the route
+        is planned again around it; ModelUnavailableError is raised only once no route is
+        left. Paragraphs that could not be translated come back as None.
+        """
+        while True:
+            route = plan_route(src_code, tgt_code)
+            if not route:
+                raise ModelUnavailableError(f"Translation model not available for {src_code} to {tgt_code}")
+            try:
+                return self._translate_route(paragraphs, route, batch_size, max_tokens)
+            except ModelUnavailableError as e:
+                print(f"Translation: {str(e)}, planning another route")
+
+    def _translate_route(self, paragraphs: List[str], route: List[Tuple[str, str]],
+                         batch_size: int, max_tokens: int) -> List[Optional[List[Tuple[str, str]]]]:
+        """Translate paragraphs hop by hop along `route`, keeping the source sentence alignment."""
+        if len(route) > 1:
+            # Pivot through English. Each hop goes through the translation memory, so
+            # translating one document into several targets translates to English only once.
+            print(f"Translation route: {' -> '.join([route[0][0]] + [hop_tgt for _, hop_tgt in route])}")
+        aligned = self._translate_hop(paragraphs, *route[0], batch_size, max_tokens)
+        for hop_src, hop_tgt in route[1:]:
+            # Each sentence's pivot is translated on its own, so the alignment carries through
+            pivots = [target for paragraph in aligned if paragraph is not None for _, target in paragraph]
+            translated = iter(self._translate_hop(pivots, hop_src, hop_tgt, batch_size, max_tokens))
+            next_aligned = []
+            for paragraph in aligned:
+                sentences = [next(translated) for _ in paragraph] if paragraph is not None else [None]
+                if any(sentence is None for sentence in sentences):
+                    next_aligned.append(None)
+                    continue
+                next_aligned.append([(source, ' '.join(target for _, target in sentence))
+                                     for (source, _), sentence in zip(paragraph, sentences)])
+            aligned = next_aligned
+        return aligned
+
+    def _translate_hop(self, paragraphs: List[str], src_code: str, tgt_code: str,
+                       batch_size: int, max_tokens: int) -> List[Optional[List[Tuple[str, str]]]]:
+        """Translate paragraphs with one model and return the (source sentence, translation) pairs of each.
+
+        Sentences are the unit of the translation memory and of the alignment. Those not in
+        the memory are packed, paragraph by paragraph, into chunks of up to `max_tokens`
+        Marian tokens, which are generated in length-sorted batches of `batch_size`. A
+        sentence longer than the budget is split at clauses and words, so nothing is
+        truncated by the model.
+        """
+        loaded = self._load_model(src_code, tgt_code)
             
-        key = f'{src_code}-{tgt_code}'
-        
-        if key not in self.models:
-            self._load_model(src_code, tgt_code)
-            
-        if key not in self.models:
-            raise ValueError(f"Translation model not available for {source_lang} to {target_lang}")
+        if loaded is None:
+            raise ModelUnavailableError(f"Translation model not available for {src_code} to {tgt_code}")
             
-        tokenizer = self.tokenizers[key]
-        model = self.models[key]
+        tokenizer, model = loaded
         
         try:
-            # Preprocess text
-            text = self.preprocess_text(text)
-            
-            # Split text into manageable chunks
-            chunks = self._split_text_into_chunks(text)
-            translated_chunks = []
+            glossary = get_glossary()
+            memory = get_translation_memory()
+            # (paragraph, source sentence, protected segment, glossary terms)
+            units = []
+            for number, sentences in enumerate(self._segment(tokenizer, paragraphs, max_tokens)):
+                for sentence in sentences:
+                    # Legal terms are not left to the model: they pass through as placeholders
+                    segment, terms = glossary.protect(sentence, src_code, tgt_code)
+                    units.append((number, sentence, segment, terms))
+
+            # Recurring segments come from the translation memory; each new one is translated once
+            translations = memory.get_many([unit[2] for unit in units], src_code, tgt_code)
+            pending: Dict[int, List[str]] = {}
+            seen = set(translations)
+            for number, _, segment, _ in units:
+                if segment not in seen:
+                    seen.add(segment)
+                    pending.setdefault(number, []).append(segment)
+            term_counts = {segment: len(terms) for _, _, segment, terms in units}
+            if pending:
+                chunks = self._pack_chunks(tokenizer, list(pending.values()), max_tokens)
+                generated = self._translate_chunks(tokenizer, model, chunks, batch_size, term_counts)
+                # A translation that dropped or repeated a placeholder is never stored
+                memory.put_many([(segment, translation) for segment, translation in generated.items()
+                                 if glossary.placeholders_intact(translation, term_counts[segment])],
+                                src_code, tgt_code)
+                translations.update(generated)
+            generated_count = sum(map(len, pending.values()))
+            print(f"Translation memory: {len(units) - generated_count} of {len(units)} segments reused")
+
+            # Sentences whose placeholders did not survive Marian are translated again without
+            # term protection, rather than restored into the wrong terms or left as "GLOSS0"
+            unprotected = list(dict.fromkeys(
+                sentence for _, sentence, segment, _ in units
+                if not glossary.placeholders_intact(translations[segment], term_counts[segment])
+            ))
+            if unprotected:
+                print(f"Translation: {len(unprotected)} segments lost their glossary placeholders, "
+                      f"translating them without term protection")
+            fallbacks = dict(zip(unprotected, self._generate(tokenizer, model, unprotected, batch_size)))
+
+            aligned = [[] for _ in paragraphs]
+            for number, sentence, segment, terms in units:
+                if sentence in fallbacks:
+                    aligned[number].append((sentence, self._post_process_translation(fallbacks[sentence], tgt_code)))
+                    continue
+                # Post-process translation
+                translated = self._post_process_translation(translations[segment], tgt_code)
+                # Substitute the canonical translations of the protected terms
+                aligned[number].append((sentence, glossary.restore(translated, terms)))
+            return aligned
             
-            for chunk in chunks:
-                # Clear GPU memory
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                
-                # Tokenize with improved settings
-                inputs = tokenizer(
-                    chunk,
-                    return_tensors="pt",
-                    padding=True,
-                    truncation=True,
+        except Exception as e:
+            print(f"Translation error ({src_code} to {tgt_code}), "
+                  f"{len(paragraphs)} paragraphs left untranslated: {str(e)}")
+            return [None] * len(paragraphs)
+
+    def suggest(self, text: str, source_lang: str, target_lang: str, limit: int = 3) -> List[Dict]:
+        """Return translation memory suggestions for the segments of `text` without an exact match."""
+        src_code = self._language_code(source_lang)
+        tgt_code = self._language_code(target_lang)
+        loaded = self._load_model(src_code, tgt_code)
+        if loaded is None:
+            return []
+        glossary = get_glossary()
+        memory = get_translation_memory()
+        paragraphs = self._segment(loaded[0], split_paragraphs(self.preprocess_text(text)), TRANSLATION_CHUNK_TOKENS)
+        segments = [glossary.protect(sentence, src_code, tgt_code)[0]
+                    for sentences in paragraphs for sentence in sentences]
+        exact = memory.get_many(segments, src_code, tgt_code)
+        results = []
+        for segment in dict.fromkeys(segments):
+            if segment not in exact:
+                suggestions = memory.suggest(segment, src_code, tgt_code, limit)
+                if suggestions:
+                    results.append({'segment': segment, 'suggestions': suggestions})
+        return results
+
+    def _segment(self, tokenizer, paragraphs: List[str], max_tokens: int) -> List[List[str]]:
+        """Split each paragraph into sentences, splitting those over `max_tokens` tokens further."""
+        segmented = []
+        for paragraph in paragraphs:
+            sentences = split_sentences(paragraph)
+            segments = []
+            for sentence, count in zip(sentences, _token_counts(tokenizer, sentences)):
+                if count > max_tokens:
+                    segments.extend(self._fit_to_budget(tokenizer, sentence, max_tokens))
+                else:
+                    segments.append(sentence)
+            segmented.append(segments)
+        return segmented
+
+    @staticmethod
+    def _fit_to_budget(tokenizer, sentence: str, max_tokens: int) -> List[str]:
+        """Split an over-long sentence at clause boundaries, then words, into pieces that fit."""
+        pieces = CLAUSE_BOUNDARY_PATTERN.split(sentence)
+        counts = _token_counts(tokenizer, pieces)
+        if max(counts) > max_tokens:
+            words = []
+            for piece, count in zip(pieces, counts):
+                words.extend(piece.split() if count > max_tokens else [piece])
+            # A single word beyond the budget (e.g. a long unbroken string) is cut by characters;
+            # a character is at most two tokens with its word-start marker
+            step = max(max_tokens // 2, 1)
+            pieces = []
+            for word, count in zip(words, _token_counts(tokenizer, words)):
+                pieces.extend([word[i:i + step] for i in range(0, len(word), step)] if count > max_tokens else [word])
+            counts = _token_counts(tokenizer, pieces)
+        return [' '.join(pieces[i] for i in group) for group in pack(counts, max_tokens)]
+
+    @staticmethod
+    def _pack_chunks(tokenizer, paragraphs: List[List[str]], max_tokens: int) -> List[List[str]]:
+        """Group consecutive segments of each paragraph into chunks of up to `max_tokens` tokens."""
+        chunks = []
+        for segments in paragraphs:
+            counts = _token_counts(tokenizer, segments)
+            chunks.extend([segments[i] for i in group] for group in pack(counts, max_tokens))
+        return chunks
+
+    def _translate_chunks(self, tokenizer, model, chunks: List[List[str]], batch_size: int,
+                          term_counts: Dict[str, int]) -> Dict[str, str]:
+        """Translate packed chunks and split each translation back into its segments.
+
+        A chunk is only split when its translation has as many sentences as the chunk has
+        segments and each sentence carries exactly the glossary placeholders of its segment
+        (`term_counts`); otherwise the split cannot be trusted and the chunk's segments are
+        translated again one by one, so every returned pair is aligned. A single segment's
+        translation is taken whole; whether its placeholders survived is checked by the caller.
+        """
+        glossary = get_glossary()
+        outputs = self._generate(tokenizer, model, [' '.join(chunk) for chunk in chunks], batch_size)
+        translations, unaligned = {}, []
+        for chunk, output in zip(chunks, outputs):
+            parts = split_sentences(output) if len(chunk) > 1 else [output]
+            if len(chunk) == 1 or (len(parts) == len(chunk) and all(
+                glossary.placeholders_intact(part, term_counts[segment]) for segment, part in zip(chunk, parts)
+            )):
+                translations.update(zip(chunk, parts))
+            else:
+                unaligned.extend(chunk)
+        if unaligned:
+            print(f"Translation: {len(unaligned)} segments did not align within their chunk, translating them singly")
+            translations.update(zip(unaligned, self._generate(tokenizer, model, unaligned, batch_size)))
+        return translations
+
+    @staticmethod
+    def _generate(tokenizer, model, chunks: List[str], batch_size: int) -> List[str]:
+        """Translate chunks in length-sorted batches and return them in input order."""
+        if not chunks:
+            return []
+        # Tokenize everything once, unpadded; each batch is padded only to its own longest chunk
+        encoded = tokenizer(chunks, truncation=True, max_length=512, add_special_tokens=True)['input_ids']
+        order = sorted(range(len(chunks)), key=lambda i: len(encoded[i]), reverse=True)
+        results = [None] * len(chunks)
+
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = tokenizer.pad({'input_ids': [encoded[i] for i in batch]}, return_tensors="pt")
+            inputs = {name: tensor.to(model.device) for name, tensor in inputs.items()}
+
+            # Generate translation with improved settings
+            with torch.no_grad():
+                translated = model.generate(
+                    **inputs,
+                    num_beams=2,  # Reduced for memory efficiency
+                    length_penalty=0.6,
                     max_length=512,
-                    add_special_tokens=True
+                    min_length=0,
+                    early_stopping=True
                 )
-                
-                # Generate translation with improved settings
-                with torch.no_grad():
-                    translated = model.generate(
-                        **inputs,
-                        num_beams=2,  # Reduced for memory efficiency
-                        length_penalty=0.6,
-                        max_length=512,
-                        min_length=0,
-                        early_stopping=True
-                    )
-                
-                # Decode the translation
-                result = tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-                translated_chunks.append(result)
-            
-            # Combine chunks
-            final_translation = ' '.join(translated_chunks)
-            
-            # Post-process translation
-            final_translation = self._post_process_translation(final_translation, target_lang)
-            
-            return final_translation
-            
-        except Exception as e:
-            print(f"Translation error: {str(e)}")
-            return text  # Return original text if translation fails
+
+            # Decode the translation
+            for i, result in zip(batch, tokenizer.batch_decode(translated, skip_special_tokens=True)):
+                results[i] = result
+        return results
+
+    def _language_code(self, language: str):
+        """Resolve a language name or code to its code, or None if unsupported."""
+        language = language.lower()
+        if language in self.language_codes.values():
+            return language
+        return self.language_codes.get(language)
         
     def detect_language(self, text: str) -> str:
-        """Detect the language of the input text."""
-        try:
-            # Clean text for better detection
-            cleaned_text = re.sub(r'[^\w\s]', '', text)
-            detected = detect(cleaned_text)
-            
-            # Map detected language code to our supported languages
-            lang_code_map = {
-                'ar': 'arabic',
-                'en': 'english',
-                'zh': 'chinese',
-                'hi': 'hindi',
-                'ur': 'urdu'
-            }
-            
-            return lang_code_map.get(detected, 'english')  # Default to English if unknown
-        except:
-            return 'english'  # Default to English if detection fails
+        """Detect the dominant language of the input text."""
+        return self._language_name(detect_language(text))
+
+    def detect_paragraph_languages(self, text: str) -> List[str]:
+        """Detect the language of each paragraph, as `translate_aligned` sees them."""
+        paragraphs = split_paragraphs(self.preprocess_text(text))
+        return [self._language_name(code) for code in detect_paragraph_languages(paragraphs)]
+
+    def _language_name(self, code) -> str:
+        names = {code: name for name, code in self.language_codes.items()}
+        return names.get(code, 'english')  # Default to English if unknown
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text before translation."""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Remove special characters that might interfere with translation
-        text = re.sub(r'[^\w\s\.,!?-]', '', text)
-        
-        return text
+        # Drop symbols that might interfere with translation and fold layout whitespace,
+        # keeping blank lines as paragraph breaks
+        return normalize(text, 'translation_input')
     
     def get_supported_languages(self):
         """Return list of supported languages."""
         return list(self.language_codes.keys())
         
-    def _split_text_into_chunks(self, text: str, max_chunk_size: int = 450) -> list:
-        """Split text into manageable chunks for translation."""
-        # First try to split by paragraphs
-        paragraphs = text.split('\n\n')
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for para in paragraphs:
-            # If a single paragraph is too long, split it by sentences
-            if len(para) > max_chunk_size:
-                sentences = re.split(r'([.!?])\s+', para)
-                i = 0
-                while i < len(sentences):
-                    sentence = sentences[i]
-                    if i + 1 < len(sentences):
-                        sentence += sentences[i + 1]  # Add back the punctuation
-                        i += 2
-                    else:
-                        i += 1
-                        
-                    if current_length + len(sentence) > max_chunk_size:
-                        if current_chunk:
-                            chunks.append(' '.join(current_chunk))
-                            current_chunk = []
-                            current_length = 0
-                    
-                    current_chunk.append(sentence)
-                    current_length += len(sentence)
-            else:
-                if current_length + len(para) > max_chunk_size:
-                    chunks.append(' '.join(current_chunk))
-                    current_chunk = []
-                    current_length = 0
-                
-                current_chunk.append(para)
-                current_length += len(para)
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
-
     def _post_process_translation(self, text: str, target_lang: str) -> str:
         """Post-process translated text based on target language."""
-        if target_lang.lower() in ['arabic', 'ar']:
-            # Fix Arabic-specific issues
-            text = re.sub(r'([ء-ي])\s+([ء-ي])', r'\1\2', text)  # Remove spaces between Arabic letters
-            text = re.sub(r'[\u200B-\u200F\u202A-\u202E]', '', text)  # Remove Unicode control characters
-            
-            # Fix common Arabic punctuation issues
-            text = text.replace('،,', '،')
-            text = text.replace('.,', '.')
-            text = text.replace('؟?', '؟')
-            text = text.replace('!!', '!')
-            
-            # Ensure proper spacing around numbers and Latin text
-            text = re.sub(r'([0-9])([ء-ي])', r'\1 \2', text)
-            text = re.sub(r'([ء-ي])([0-9])', r'\1 \2', text)
-            text = re.sub(r'([a-zA-Z])([ء-ي])', r'\1 \2', text)
-            text = re.sub(r'([ء-ي])([a-zA-Z])', r'\1 \2', text)
-            
-        elif target_lang.lower() in ['english', 'en']:
-            # Fix English-specific issues
-            text = re.sub(r'\s+([.,!?])', r'\1', text)  # Fix spacing before punctuation
-            text = re.sub(r'([.,!?])(?=[^\s])', r'\1 ', text)  # Fix spacing after punctuation
-            text = re.sub(r'\s+', ' ', text)  # Normalize spaces
-            text = text.replace(' ,', ',')
-            text = text.replace(' .', '.')
-            
-            # Capitalize first letter of sentences
-            text = '. '.join(s.capitalize() for s in text.split('. '))
-            
-        return text.strip()
+        code = self._language_code(target_lang)
+        return normalize(text, f'translation_{code}')
 
     def get_language_name(self, code: str) -> str:
         """Get the display name for a language code."""
@@ -3,10 +3,28 @@ import re
 from langchain.tools import Tool
 from config import UAE_LEGAL_DOMAINS
 
+# Arabic, Arabic Supplement and Arabic Extended-A blocks, plus the presentation forms
+# that reshaped text and some PDF ToUnicode maps produce
+ARABIC_RANGES = [(0x0600, 0x06FF), (0x0750, 0x077F), (0x08A0, 0x08FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)]
+ARABIC_CHARS = ''.join(f'{chr(start)}-{chr(end)}' for start, end in ARABIC_RANGES)
+ARABIC_PATTERN = re.compile(f'[{ARABIC_CHARS}]+')
+
+# Alef variants, alef maqsura and taa marbuta folded to one form; tatweel and
+# diacritics (harakat, superscript alef, Quranic marks) removed
+ARABIC_FOLD_TABLE = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ة': 'ه', 'ـ': None,
+    **{chr(code): None for code in [*range(0x064B, 0x0660), 0x0670, *range(0x06D6, 0x06EE)]}
+})
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 def is_arabic(text: str) -> bool:
     """Check if the text contains Arabic characters."""
-    arabic_pattern = re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]+')
-    return bool(arabic_pattern.search(text))
+    return bool(ARABIC_PATTERN.search(text))
+
+def normalize_arabic(text: str) -> str:
+    """Normalize text for matching: fold Arabic letter variants, strip diacritics and collapse whitespace."""
+    text = text.translate(ARABIC_FOLD_TABLE)
+    return WHITESPACE_PATTERN.sub(' ', text).strip().lower()
 
 def create_uae_legal_tools() -> List[Tool]:
     """Create tools for UAE legal research."""
@@ -30,22 +48,30 @@ def create_uae_legal_tools() -> List[Tool]:
     return tools
 
 def search_uae_legal_database(query: str) -> str:
-    """Simulate searching UAE legal databases."""
-    # In a real implementation, this would connect to actual UAE legal databases
-    return f"Found relevant UAE legal information for: {query}"
+    """Search the local index of UAE laws and regulations."""
+    # Imported here because legal_corpus itself builds on the helpers in this module
+    from legal_corpus import get_corpus, format_results
+    return format_results(get_corpus().search(query, kind='legislation'), query)
 
 def translate_legal_term(term: str) -> str:
-    """Simulate legal term translation."""
-    # In a real implementation, this would use a legal terms dictionary
-    return f"Translation for: {term}"
+    """Translate a legal term between Arabic and English using the legal glossary."""
+    from legal_glossary import get_glossary
+    return get_glossary().describe(term)
 
 def search_uae_case_law(query: str) -> str:
-    """Simulate searching UAE case law."""
-    # In a real implementation, this would search actual UAE case law databases
-    return f"Found relevant UAE case law for: {query}"
+    """Search the local index of UAE court judgments."""
+    from legal_corpus import get_corpus, format_results
+    return format_results(get_corpus().search(query, kind='case_law'), query)
 
 def format_legal_response(response: str, language: str = 'ar') -> str:
     """Format legal responses with proper styling and language direction."""
     if language == 'ar':
         return f'<div dir="rtl">{response}</div>'
-    return response
\ No newline at end of file
+    return response
+
+def format_legal_response_stream(tokens, language: str = 'ar'):
+    """Format a streamed response, yielding the formatted text so far after each token."""
+    response = ""
+    for token in tokens:
+        response += token
+        yield format_legal_response(response, language)